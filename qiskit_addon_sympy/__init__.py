@@ -9,6 +9,20 @@
 
 __version__ = '0.1.0'
 
-from .statevector_simulator import SympyStatevectorSimulator
-from .unitary_simulator import SympyUnitarySimulator
+import sys
+
 from .sympyprovider import SympyProvider
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        """Import the simulators on first use, see `sympyprovider.BACKENDS`."""
+        if name == 'SympyStatevectorSimulator':
+            from . import statevector_simulator
+            return statevector_simulator.SympyStatevectorSimulator
+        if name == 'SympyUnitarySimulator':
+            from . import unitary_simulator
+            return unitary_simulator.SympyUnitarySimulator
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+else:
+    from .statevector_simulator import SympyStatevectorSimulator
+    from .unitary_simulator import SympyUnitarySimulator
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Exact integer arithmetic for Clifford+T circuits.
+
+When every u gate of a circuit has `theta` a multiple of pi/2 and `phi`, `lambda`
+multiples of pi/4 (after `regulate`), every amplitude of the state, and every entry
+of the unitary, lies in the ring Z[1/sqrt(2), w] with w = exp(i*pi/4).
+Such a number is stored as four integers (a0, a1, a2, a3) and a power k of sqrt(2):
+
+    (a0 + a1*w + a2*w**2 + a3*w**3) / sqrt(2)**k
+
+A `CyclotomicArray` keeps the coefficients of a whole state (or unitary) in one
+NumPy int64 array, with a single k shared by all its entries, so that a gate is a
+handful of vectorized integer operations. Amplitudes are converted to sympy
+expressions only at the end of the simulation.
+"""
+
+import numpy as np
+from sympy import I, Rational, sqrt
+
+from .simulatortools import pi_fraction, ugate_parameters
+
+# Coefficients beyond this bound may overflow in the next gate.
+MAX_COEFFICIENT = 2 ** 60
+
+# The cx gate, with the control as first qubit.
+CX_MONOMIALS = [[0, None, None, None],
+                [None, None, None, 0],
+                [None, None, 0, None],
+                [None, 0, None, None]]
+
+
+def ugate_monomials(parameters):
+    """Return the matrix of a u gate as monomials in w, if it is a Clifford+T gate.
+
+    Every entry of the matrix of U(theta, phi, lambda) with `theta` a multiple of
+    pi/2 and `phi`, `lambda` multiples of pi/4 is either 0 or +-w**p / sqrt(2)**k,
+    with the same k for the whole matrix.
+
+    Args:
+        parameters (list): the parameters carried by the u1, u2 or u3 gate
+
+    Returns:
+        tuple or None: (monomials, k) where `monomials[row][col]` is None for a
+            zero entry and the power p of w (modulo 8) otherwise, or None if the gate
+            is not a Clifford+T gate.
+    """
+    theta, phi, lamb = [pi_fraction(param) for param in ugate_parameters(parameters)]
+    if theta is None or phi is None or lamb is None or theta % 2:
+        return None
+
+    # cos(theta/2) and sin(theta/2), with theta/2 = half*pi/4, are 0, +-1 or
+    # +-1/sqrt(2); as powers of w, -1 is w**4.
+    half = (theta // 2) % 8
+    if half % 2:
+        cos_power = 0 if half in (1, 7) else 4
+        sin_power = 0 if half in (1, 3) else 4
+        sqrt2_power = 1
+    else:
+        cos_power = {0: 0, 2: None, 4: 4, 6: None}[half]
+        sin_power = {0: None, 2: 0, 4: None, 6: 4}[half]
+        sqrt2_power = 0
+
+    def _times(power, *extra):
+        return None if power is None else (power + sum(extra)) % 8
+
+    monomials = [[_times(cos_power), _times(sin_power, 4, lamb)],
+                 [_times(sin_power, phi), _times(cos_power, phi, lamb)]]
+    return monomials, sqrt2_power
+
+
+def is_cyclotomic_circuit(circuit):
+    """Tell whether all the gates of an experiment are Clifford+T gates.
+
+    Args:
+        circuit (QobjExperiment): Qobj experiment
+
+    Returns:
+        bool: True if the experiment only contains cx, id, barrier, and u gates for
+            which `ugate_monomials` succeeds
+    """
+    for operation in circuit.instructions:
+        if getattr(operation, 'conditional', None):
+            return False
+        if operation.name in ('U', 'u1', 'u2', 'u3'):
+            try:
+                if ugate_monomials(getattr(operation, 'params', None)) is None:
+                    return False
+            except (TypeError, ValueError):
+                return False
+        elif operation.name not in ('CX', 'cx', 'id', 'barrier'):
+            return False
+    return True
+
+
+def _times_omega(coefficients, power):
+    """Multiply ring elements by w**power.
+
+    Args:
+        coefficients (ndarray): coefficients, the last axis being of length 4
+        power (int): the power of w
+
+    Returns:
+        ndarray: the coefficients of the product
+    """
+    power %= 8
+    shift = power % 4
+    result = np.roll(coefficients, shift, axis=-1)
+    result[..., :shift] *= -1  # w**4 == -1
+    if power >= 4:
+        result = -result
+    return result
+
+
+class CyclotomicArray:
+    """An array of elements of Z[1/sqrt(2), w] with a shared power of sqrt(2)."""
+
+    def __init__(self, coefficients, sqrt2_power=0):
+        """Create the array.
+
+        Args:
+            coefficients (ndarray): int64 array, the last axis holding the 4
+                coefficients of every element
+            sqrt2_power (int): the power of sqrt(2) dividing every element
+        """
+        self.coefficients = coefficients
+        self.sqrt2_power = sqrt2_power
+
+    @classmethod
+    def zero_state(cls, number_of_qubits):
+        """Return the state |0...0> as a flat array of 2**n amplitudes."""
+        coefficients = np.zeros((2 ** number_of_qubits, 4), dtype=np.int64)
+        coefficients[0, 0] = 1
+        return cls(coefficients)
+
+    @classmethod
+    def identity(cls, number_of_qubits):
+        """Return the 2**n x 2**n identity, indexed by [row, column]."""
+        dim = 2 ** number_of_qubits
+        coefficients = np.zeros((dim, dim, 4), dtype=np.int64)
+        coefficients[np.arange(dim), np.arange(dim), 0] = 1
+        return cls(coefficients)
+
+    def apply_gate(self, monomials, sqrt2_power, qubits):
+        """Apply in place a gate whose entries are monomials in w.
+
+        The gate acts on the first axis of the array, which is indexed by basis
+        states, qubit 0 being the least significant bit.
+
+        Args:
+            monomials (list[list]): `monomials[row][col]` is None for a zero entry
+                and the power of w otherwise. Rows and columns are indexed by
+                `b0 + 2*b1 + ...`, `bj` being the bit of `qubits[j]`.
+            sqrt2_power (int): the power of sqrt(2) dividing the whole gate
+            qubits (list[int]): the qubits the gate acts on
+
+        Raises:
+            OverflowError: if the coefficients grow too large for int64
+        """
+        shape = self.coefficients.shape
+        number_of_qubits = shape[0].bit_length() - 1
+        tensor = self.coefficients.reshape((2,) * number_of_qubits + shape[1:])
+        axes = [number_of_qubits - 1 - qubit for qubit in qubits]
+        # After moving the gate axes to the front, tensor[b_{m-1}, ..., b_0]
+        # holds the sub-array where qubits[j] has the bit b_j.
+        tensor = np.moveaxis(tensor, axes[::-1], range(len(axes)))
+        flat = tensor.reshape((2 ** len(qubits),) + tensor.shape[len(axes):])
+
+        result = np.zeros_like(flat)
+        for row, entries in enumerate(monomials):
+            for col, power in enumerate(entries):
+                if power is not None:
+                    result[row] += _times_omega(flat[col], power)
+
+        tensor = np.moveaxis(result.reshape(tensor.shape), range(len(axes)), axes[::-1])
+        self.coefficients = np.ascontiguousarray(tensor).reshape(shape)
+        self.sqrt2_power += sqrt2_power
+        self._reduce()
+
+    def _reduce(self):
+        """Divide the coefficients by sqrt(2) as long as they stay integers.
+
+        Raises:
+            OverflowError: if the coefficients grow too large for int64
+        """
+        while self.sqrt2_power > 0:
+            # sqrt(2) == w - w**3
+            doubled = _times_omega(self.coefficients, 1) - _times_omega(self.coefficients, 3)
+            if np.any(doubled % 2):
+                break
+            self.coefficients = doubled // 2
+            self.sqrt2_power -= 1
+        if np.abs(self.coefficients).max() > MAX_COEFFICIENT:
+            raise OverflowError('cyclotomic coefficients exceed the int64 range')
+
+    def to_sympy(self):
+        """Convert every element to a sympy expression.
+
+        Returns:
+            ndarray: object array of sympy expressions, of the shape of the
+                coefficient array without its last axis
+        """
+        # (a0 + a1*w + a2*w**2 + a3*w**3) =
+        #     (a0 + (a1 - a3)/sqrt(2)) + I*(a2 + (a1 + a3)/sqrt(2))
+        half, odd = divmod(self.sqrt2_power, 2)
+        denominator = 2 ** half
+        converted = {}
+
+        def _convert(coefficients):
+            # pylint: disable=invalid-name
+            a0, a1, a2, a3 = (int(coefficient) for coefficient in coefficients)
+            if odd:
+                # divide once more by sqrt(2): x/sqrt(2) == x*sqrt(2)/2
+                real = Rational(a1 - a3, 2 * denominator) + \
+                    Rational(a0, 2 * denominator) * sqrt(2)
+                imag = Rational(a1 + a3, 2 * denominator) + \
+                    Rational(a2, 2 * denominator) * sqrt(2)
+            else:
+                real = Rational(a0, denominator) + Rational(a1 - a3, 2 * denominator) * sqrt(2)
+                imag = Rational(a2, denominator) + Rational(a1 + a3, 2 * denominator) * sqrt(2)
+            return real + I * imag
+
+        flat = self.coefficients.reshape(-1, 4)
+        result = np.empty(flat.shape[0], dtype=object)
+        for index, coefficients in enumerate(flat):
+            key = tuple(coefficients)
+            if key not in converted:
+                converted[key] = _convert(coefficients)
+            result[index] = converted[key]
+        return result.reshape(self.coefficients.shape[:-1])
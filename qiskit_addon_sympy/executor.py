@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Executors running the jobs of the Sympy backends.
+
+Every `SympyProvider` owns an executor, created on its first job with the
+options of the provider, see `create_executor`, and released by its `shutdown`
+method. The backends created without a provider share `default_executor()`.
+"""
+
+import importlib
+import logging
+import sys
+import threading
+from concurrent import futures
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ('process', 'thread')
+
+# The parameters of the u1, u2 and u3 gates the standard gates compile to:
+# h, x, y, z, s, sdg, t and tdg.
+STANDARD_UGATES = ([0.0, np.pi], [np.pi, 0.0, np.pi], [np.pi, np.pi / 2, np.pi / 2],
+                   [np.pi], [np.pi / 2], [-np.pi / 2], [np.pi / 4], [-np.pi / 4])
+
+_DEFAULT_EXECUTOR = None
+_DEFAULT_EXECUTOR_LOCK = threading.Lock()
+
+
+def default_kind():
+    """Return the kind of executor used by default: processes, but on macOS
+    and Windows, where starting them is expensive and fragile, threads."""
+    return 'thread' if sys.platform in ['darwin', 'win32'] else 'process'
+
+
+def initialize_worker(ugate_cache_size=None):
+    """Prepare a worker process for its first job: import the simulators, and
+    sympy with them, and fill `UGATE_CACHE` with the matrices of the standard gates.
+
+    Args:
+        ugate_cache_size (int): the maximum number of entries of `UGATE_CACHE`
+            in the worker, or None to keep the default
+    """
+    # pylint: disable=cyclic-import
+    from .simulatortools import UGATE_CACHE, compute_ugate_matrix, ugate_parameters
+    for module in ('statevector_simulator', 'unitary_simulator'):
+        importlib.import_module('.' + module, __package__)
+    if ugate_cache_size is not None:
+        UGATE_CACHE.resize(ugate_cache_size)
+    for parameters in STANDARD_UGATES:
+        compute_ugate_matrix(ugate_parameters(parameters))
+
+
+def create_executor(kind=None, max_workers=None, max_tasks_per_child=None,
+                    ugate_cache_size=None):
+    """Create an executor for the jobs.
+
+    Args:
+        kind (str): 'process' or 'thread', or None for `default_kind()`
+        max_workers (int): the number of workers, by default the number of
+            processors for processes, and the default of ThreadPoolExecutor
+            for threads
+        max_tasks_per_child (int): the number of jobs after which a worker
+            process is replaced, to release its memory, or None to keep it.
+            Python 3.11 or later is required, and the workers are then spawned.
+        ugate_cache_size (int): the maximum number of entries of `UGATE_CACHE`
+            in every worker process, or for threads, in this process; None keeps
+            the default. Setting it for processes requires Python 3.7 or later.
+
+    Returns:
+        futures.Executor: the executor
+
+    Raises:
+        ValueError: if the kind is unknown
+    """
+    kind = kind or default_kind()
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError('unknown executor "{}", expected one of {}'.format(
+            kind, ', '.join(EXECUTOR_KINDS)))
+    if kind == 'thread':
+        if ugate_cache_size is not None:
+            from .simulatortools import UGATE_CACHE  # pylint: disable=cyclic-import
+            UGATE_CACHE.resize(ugate_cache_size)
+        return futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    options = {}
+    if sys.version_info >= (3, 7):
+        options['initializer'] = initialize_worker
+        options['initargs'] = (ugate_cache_size,)
+    elif ugate_cache_size is not None:
+        logger.warning('ugate_cache_size requires Python 3.7 for processes, ignoring it.')
+    if max_tasks_per_child is not None:
+        if sys.version_info >= (3, 11):
+            options['max_tasks_per_child'] = max_tasks_per_child
+        else:
+            logger.warning('max_tasks_per_child requires Python 3.11, ignoring it.')
+    return futures.ProcessPoolExecutor(max_workers=max_workers, **options)
+
+
+def default_executor():
+    """Return the executor shared by the backends without a provider,
+    creating it on first use."""
+    global _DEFAULT_EXECUTOR  # pylint: disable=global-statement
+    with _DEFAULT_EXECUTOR_LOCK:
+        if _DEFAULT_EXECUTOR is None:
+            _DEFAULT_EXECUTOR = create_executor()
+        return _DEFAULT_EXECUTOR
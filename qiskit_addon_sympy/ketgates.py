@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=abstract-method,too-many-ancestors
+
+"""Gates of the 'ket' engine of the statevector simulator.
+
+The engine applies sympy.physics.quantum gates to a Qubit. Importing
+sympy.physics.quantum takes longer than the rest of this package, so this module
+is only imported when a circuit runs on the 'ket' engine.
+"""
+
+from sympy import ImmutableMatrix, Matrix, pi, I, exp
+# pylint: disable=unused-import
+from sympy.physics.quantum.gate import H, X, Y, Z, S, T, CNOT, IdentityGate, OneQubitGate, CGate
+from sympy.physics.quantum.qapply import qapply
+from sympy.physics.quantum.qubit import Qubit
+from sympy.physics.quantum.represent import represent
+
+
+class SDGGate(OneQubitGate):
+    """implements the SDG gate"""
+    gate_name = 'SDG'
+
+    def get_target_matrix(self, format='sympy'):
+        """Return the Matrix that corresponds to the gate.
+
+        Returns:
+            Matrix: the matrix that corresponds to the gate.
+                    Matrix is a type from sympy.
+                    Each entry in it can be in the symbolic form.
+        """
+        # pylint: disable=redefined-builtin,unused-argument
+        return Matrix([[1, 0], [0, -I]])
+
+
+class TDGGate(OneQubitGate):
+    """implements the TDG gate"""
+    gate_name = 'TDG'
+
+    def get_target_matrix(self, format='sympy'):
+        """Return the Matrix that corresponds to the gate.
+
+        Returns:
+            Matrix: the matrix that corresponds to the gate
+        """
+        # pylint: disable=redefined-builtin,unused-argument
+        return Matrix([[1, 0], [0, exp(-I*pi/4)]])
+
+
+class UGateGeneric(OneQubitGate):
+    """implements the general U gate"""
+    _u_mat = None
+    gate_name = 'U'
+
+    def set_target_matrix(self, u_matrix):
+        """this API sets the raw matrix that corresponds to the U gate
+            the client should use this API whenever she creates a UGateGeneric object!
+            Args:
+                u_matrix (Matrix): set the matrix that corresponds to the gate
+        """
+        self._u_mat = ImmutableMatrix(u_matrix)
+        # The matrix is part of the identity of the gate, see _hashable_content.
+        self._mhash = None
+
+    def _hashable_content(self):
+        """Make u gates on the same qubits with different matrices compare unequal.
+
+        Otherwise, the sympy cache may return the result of applying another u gate.
+        """
+        return super()._hashable_content() + (self._u_mat,)
+
+    def get_target_matrix(self, format='sympy'):
+        """return the Matrix that corresponds to the gate
+        Returns:
+            Matrix: the matrix that corresponds to the gate
+        """
+        # pylint: disable=redefined-builtin,unused-argument
+        return self._u_mat
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Exact outcome distributions of the final state of an experiment.
+
+The probabilities are computed from the nonzero amplitudes only, each distinct
+amplitude once. A marginal distribution is summed over the index structure: the
+outcome of every basis state is gathered from the bits of its index with numpy,
+and the probabilities of each outcome are added in a single sympy Add.
+
+`sample_counts` draws shots from an exact distribution: it is converted to floats
+once, and all the shots are drawn together from a multinomial distribution, at a
+cost independent of their number.
+
+`expectation_values` computes exact expectation values of Pauli strings without
+building their matrices: a Pauli string maps the basis state x to a phase times
+the basis state x ^ flip, where flip has the bits of its X and Y factors, so
+<psi|P|psi> is a sum over the pairs of nonzero amplitudes of x and x ^ flip.
+"""
+
+import numpy as np
+from sympy import Add, I, Integer, im, re, sympify
+
+
+def probability(amplitude):
+    """Return the exact probability |amplitude|**2, as re**2 + im**2."""
+    return re(amplitude)**2 + im(amplitude)**2
+
+
+def basis_indices(indices, number_of_qubits):
+    """Return the basis state indices as a numpy array, of Python integers
+    beyond 62 qubits."""
+    return np.asarray(indices, dtype=np.int64 if number_of_qubits < 63 else object)
+
+
+def outcome_probabilities(amplitudes):
+    """Return the probabilities of the basis states of nonzero amplitudes.
+
+    Args:
+        amplitudes (dict): the nonzero amplitudes by basis state index
+
+    Returns:
+        dict: the probabilities by basis state index
+    """
+    distinct = {}
+    probabilities = {}
+    for index, amplitude in amplitudes.items():
+        if amplitude not in distinct:
+            distinct[amplitude] = probability(amplitude)
+        probabilities[index] = distinct[amplitude]
+    return probabilities
+
+
+def marginal_probabilities(probabilities, qubits, number_of_qubits):
+    """Sum the probabilities of the basis states over all but some qubits.
+
+    Args:
+        probabilities (dict): the nonzero probabilities by basis state index
+        qubits (list[int]): the qubits kept; bit j of the index of an outcome
+            of the marginal is the value of qubits[j]
+        number_of_qubits (int): the number of qubits of the state
+
+    Returns:
+        ndarray: the 2**len(qubits) probabilities of the marginal
+
+    Raises:
+        ValueError: if the qubits are repeated or out of range
+    """
+    qubits = [int(qubit) for qubit in qubits]
+    if len(set(qubits)) != len(qubits) or \
+            any(not 0 <= qubit < number_of_qubits for qubit in qubits):
+        raise ValueError('invalid marginal qubits {}, expected distinct qubits '
+                         'of 0 to {}'.format(qubits, number_of_qubits - 1))
+    indices = basis_indices(list(probabilities), number_of_qubits)
+    values = np.empty(len(indices), dtype=object)
+    values[:] = list(probabilities.values())
+    outcomes = np.zeros(len(indices), dtype=np.int64)
+    for bit, qubit in enumerate(qubits):
+        outcomes |= ((indices >> qubit) & 1).astype(np.int64) << bit
+
+    marginal = np.empty(2 ** len(qubits), dtype=object)
+    marginal[:] = [Integer(0)] * len(marginal)
+    order = np.argsort(outcomes, kind='stable')
+    outcomes, values = outcomes[order], values[order]
+    starts = np.flatnonzero(np.r_[True, outcomes[1:] != outcomes[:-1]])[:len(outcomes)]
+    for start, end in zip(starts, np.append(starts[1:], len(outcomes))):
+        marginal[outcomes[start]] = Add(*values[start:end])
+    return marginal
+
+
+def sample_counts(probabilities, number_of_bits, shots, seed=None):
+    """Draw shots from an exact distribution and return their histogram.
+
+    Args:
+        probabilities (dict): the nonzero probabilities by outcome index
+        number_of_bits (int): the number of bits of the outcomes
+        shots (int): the number of shots
+        seed (int): the seed of the random generator, or None for a random one
+
+    Returns:
+        dict: the number of shots of every outcome drawn, keyed by its
+            bitstring, whose bit 0 is the rightmost
+
+    Raises:
+        TypeError: if a probability is not a number, e.g. has free symbols
+    """
+    distinct = {}
+    for value in probabilities.values():
+        if value not in distinct:
+            distinct[value] = complex(value).real
+    weights = np.array([distinct[value] for value in probabilities.values()])
+    weights = np.clip(weights, 0, None)
+    counts = np.random.RandomState(seed).multinomial(shots, weights / weights.sum())
+    width = '0{}b'.format(number_of_bits)
+    return {format(index, width): int(count)
+            for index, count in zip(probabilities, counts) if count}
+
+
+def pauli_masks(pauli, number_of_qubits):
+    """Return the masks of a Pauli string.
+
+    Args:
+        pauli (str): one of I, X, Y and Z per qubit, whose last one is qubit 0
+        number_of_qubits (int): the number of qubits of the state
+
+    Returns:
+        tuple(int, int, int): the mask of the X and Y factors, the mask of the Z
+            and Y factors, and the number of Y factors
+
+    Raises:
+        ValueError: if the string is not a Pauli string on `number_of_qubits` qubits
+    """
+    if not isinstance(pauli, str) or len(pauli) != number_of_qubits or \
+            set(pauli) - set('IXYZ'):
+        raise ValueError('invalid Pauli string {!r}, expected one of I, X, Y and Z '
+                         'for each of the {} qubits'.format(pauli, number_of_qubits))
+    flip = phase = 0
+    for qubit, factor in enumerate(reversed(pauli)):
+        if factor in 'XY':
+            flip |= 1 << qubit
+        if factor in 'YZ':
+            phase |= 1 << qubit
+    return flip, phase, pauli.count('Y')
+
+
+def pauli_expectation(amplitudes, pauli, number_of_qubits):
+    """Return the exact expectation value of a Pauli string.
+
+    Args:
+        amplitudes (dict): the nonzero amplitudes of the state by basis state index
+        pauli (str): the Pauli string, see `pauli_masks`
+        number_of_qubits (int): the number of qubits of the state
+
+    Returns:
+        sympy.Expr: <psi|P|psi>
+
+    Raises:
+        ValueError: if the Pauli string is invalid
+    """
+    flip, phase, y_factors = pauli_masks(pauli, number_of_qubits)
+    indices = basis_indices(sorted(amplitudes), number_of_qubits)
+    parities = np.zeros(len(indices), dtype=np.int64)
+    for qubit in range(number_of_qubits):
+        if phase >> qubit & 1:
+            parities ^= ((indices >> qubit) & 1).astype(np.int64)
+    signs = 1 - 2 * parities
+
+    if not flip:
+        # a diagonal string: the signed sum of the probabilities
+        probabilities = outcome_probabilities(amplitudes)
+        return Add(*[sign * probabilities[index]
+                     for index, sign in zip(indices.tolist(), signs.tolist())])
+
+    values = np.empty(len(indices), dtype=object)
+    values[:] = [amplitudes[index] for index in indices.tolist()]
+    partners = indices ^ flip
+    positions = np.searchsorted(indices, partners).clip(0, max(len(indices) - 1, 0))
+    # every pair x, x ^ flip once, as the term of x ^ flip is the conjugate of that of x
+    pairs = np.flatnonzero((indices[positions] == partners) & (indices < partners))
+    terms = signs[pairs].astype(object) * np.conjugate(values[positions[pairs]]) * values[pairs]
+    return 2 * re(I ** y_factors * Add(*terms))
+
+
+def expectation_values(amplitudes, observables, number_of_qubits):
+    """Return the exact expectation values of weighted Pauli strings.
+
+    Args:
+        amplitudes (dict): the nonzero amplitudes of the state by basis state index
+        observables (list): Pauli strings, see `pauli_masks`, or (coefficient,
+            Pauli string) pairs, the coefficient being a number, a sympy
+            expression or a string sympy parses
+        number_of_qubits (int): the number of qubits of the state
+
+    Returns:
+        ndarray: the expectation value of every observable, times its coefficient
+
+    Raises:
+        ValueError: if an observable is invalid
+    """
+    values = np.empty(len(observables), dtype=object)
+    for position, observable in enumerate(observables):
+        coefficient = 1
+        if not isinstance(observable, str):
+            try:
+                coefficient, observable = observable
+                coefficient = sympify(coefficient)
+            except (TypeError, ValueError, SyntaxError) as err:
+                raise ValueError('invalid observable {!r}: {}'.format(observable, err))
+        values[position] = coefficient * pauli_expectation(amplitudes, observable,
+                                                           number_of_qubits)
+    return values
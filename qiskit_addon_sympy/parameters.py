@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Symbolic gate parameters: simulate a circuit once, bind its parameters many times.
+
+The parameters of the u gates of a qobj may be sympy expressions with free
+symbols. The simulators then return a parametric statevector or unitary, whose
+parameters `bind_parameters` substitutes exactly, for many parameter sets at
+once, and which `lambdify_parameters` turns into a vectorized numpy function.
+
+qiskit only compiles numeric parameters: compile the circuit with placeholder
+angles, then replace them with symbols in the qobj with `assign_symbols`.
+
+Conversely, `run_templates` finds the experiments of a qobj that only differ in
+the angles of their u gates, simulates each such group once with symbols for
+the angles that vary, and binds the values of every experiment of the group.
+
+Example:
+    theta = sympy.Symbol('theta')
+    qc.u3(0.123456, 0, 0, qr[0])
+    qobj = assign_symbols(compile(qc, backend), {0.123456: theta})
+    statevector = backend.run(qobj).result().get_statevector(qc)
+    amplitudes = lambdify_parameters(statevector, [theta])(np.linspace(0, np.pi, 200))
+"""
+
+import copy
+import time
+
+import numpy as np
+from sympy import Basic, Dummy, Symbol, lambdify, sympify
+
+from qiskit.qobj import ExperimentResult
+
+from .simulatortools import get_option, regulate, run_experiments
+
+UGATES = ('U', 'u1', 'u2', 'u3')
+# The result data which may depend on the parameters, but 'sparse_statevector'.
+PARAMETRIC_DATA = ('statevector', 'unitary', 'probabilities', 'marginal_probabilities',
+                   'expectation_values')
+
+
+def _symbol(name):
+    """Return the symbol for a symbol or its name."""
+    return Symbol(name) if isinstance(name, str) else name
+
+
+def assign_symbols(qobj, placeholders, tolerance=1e-9):
+    """Replace placeholder angles in the u gates of a qobj with sympy expressions.
+
+    Only the angles that the compiler passes through unchanged are found, for
+    example those of u1, u2, u3 and rz gates.
+
+    Args:
+        qobj (Qobj): the compiled qobj, modified in place
+        placeholders (dict): placeholder angle (float) -> sympy expression
+        tolerance (float): the largest difference between an angle and its placeholder
+
+    Returns:
+        Qobj: the qobj
+    """
+    for circuit in qobj.experiments:
+        for operation in circuit.instructions:
+            if operation.name not in UGATES:
+                continue
+            params = []
+            for param in operation.params:
+                if not isinstance(param, Basic):
+                    for value, expression in placeholders.items():
+                        if abs(param - value) < tolerance:
+                            param = expression
+                            break
+                params.append(param)
+            operation.params = params
+    return qobj
+
+
+def free_parameters(array):
+    """Return the free symbols of the entries of a statevector or unitary.
+
+    Args:
+        array (ndarray): the statevector or unitary
+
+    Returns:
+        set[sympy.Symbol]: the free symbols
+    """
+    symbols = set()
+    for entry in np.asarray(array, dtype=object).ravel():
+        symbols |= getattr(entry, 'free_symbols', set())
+    return symbols
+
+
+def bind_parameters(array, parameter_sets):
+    """Substitute values for the parameters of a statevector or unitary.
+
+    The values are regulated like gate angles (see `regulate`), so that the
+    multiples of pi/4 are exact. Every distinct entry is substituted once per
+    parameter set.
+
+    Args:
+        array (ndarray): the parametric statevector or unitary
+        parameter_sets (dict or list[dict]): symbol (or its name) -> value, or a
+            list of such parameter sets
+
+    Returns:
+        ndarray or list[ndarray]: the bound array, or the list of the bound
+            arrays if `parameter_sets` is a list
+    """
+    array = np.asarray(array, dtype=object)
+    single = isinstance(parameter_sets, dict)
+    entries = [sympify(entry) for entry in array.ravel()]
+    distinct = list(dict.fromkeys(entries))
+    bound_arrays = []
+    if single:
+        parameter_sets = [parameter_sets]
+    for parameters in parameter_sets:
+        substitution = {_symbol(name): regulate(value) for name, value in parameters.items()}
+        bound = {entry: entry.xreplace(substitution) for entry in distinct}
+        bound_arrays.append(
+            np.array([bound[entry] for entry in entries], dtype=object).reshape(array.shape))
+    return bound_arrays[0] if single else bound_arrays
+
+
+def lambdify_parameters(array, symbols):
+    """Compile a parametric statevector or unitary into a vectorized numpy function.
+
+    Args:
+        array (ndarray): the parametric statevector or unitary
+        symbols (list): the symbols (or their names) that are the arguments of
+            the function, in order
+
+    Returns:
+        callable: a function of one value, or array of values, per symbol, which
+            are broadcast together; it returns a complex array whose shape is
+            the broadcast shape followed by the shape of `array`
+    """
+    array = np.asarray(array, dtype=object)
+    symbols = [_symbol(name) for name in symbols]
+    function = lambdify(symbols, list(array.ravel()), modules='numpy')
+
+    def _evaluate(*values):
+        values = np.broadcast_arrays(*[np.asarray(value, dtype=float) for value in values])
+        shape = values[0].shape if values else ()
+        entries = [np.broadcast_to(np.asarray(entry, dtype=complex), shape)
+                   for entry in function(*values)]
+        return np.stack(entries, axis=-1).reshape(shape + array.shape)
+
+    return _evaluate
+
+
+def _signature(circuit, qobj_config):
+    """Return what experiments must share to be simulated from the same template,
+    or None if the experiment cannot be part of a template."""
+    engine = get_option(circuit, qobj_config, 'engine', 'auto')
+    if engine not in ('auto', 'dense', 'sparse', 'ket') or \
+            get_option(circuit, qobj_config, 'sampling', False):
+        return None
+    instructions = []
+    for operation in circuit.instructions:
+        fields = operation.as_dict()
+        fields.pop('texparams', None)
+        if operation.name in UGATES:
+            params = fields.pop('params')
+            if any(isinstance(param, Basic) for param in params):
+                return None
+            fields['params'] = len(params)
+        instructions.append(repr(sorted(fields.items())))
+    config = getattr(circuit, 'config', None)
+    config = repr(sorted(config.as_dict().items())) if config is not None else None
+    return circuit.header.number_of_qubits, config, tuple(instructions)
+
+
+def template_groups(experiments, qobj_config):
+    """Group the experiments that only differ in the angles of their u gates.
+
+    Args:
+        experiments (list[QobjExperiment]): the experiments of a qobj
+        qobj_config (QobjConfig): the config of the qobj
+
+    Returns:
+        list[tuple]: (template, members) pairs, in the order of the first member
+            of every group: `template` is the experiment to simulate, with a
+            symbol for every angle which is not the same in the whole group, and
+            `members` the list of the (index, parameters) pairs of the experiments
+            of the group, `parameters` mapping the symbols to their values; a
+            group of identical experiments has no symbols, and its template is
+            its first experiment
+    """
+    groups = {}
+    for index, circuit in enumerate(experiments):
+        signature = _signature(circuit, qobj_config)
+        groups.setdefault(index if signature is None else signature, []).append(index)
+
+    templates = []
+    for indices in groups.values():
+        template = experiments[indices[0]]
+        members = [(index, {}) for index in indices]
+        varying = []
+        if len(indices) > 1:
+            for position, operation in enumerate(template.instructions):
+                if operation.name not in UGATES:
+                    continue
+                for slot, param in enumerate(operation.params):
+                    values = [experiments[index].instructions[position].params[slot]
+                              for index in indices]
+                    if any(value != param for value in values):
+                        varying.append((position, slot, values))
+        # Identical experiments share the first one as their template, unchanged.
+        if varying:
+            template = copy.deepcopy(template)
+            template.header.name = 'template'
+            for position, slot, values in varying:
+                symbol = Dummy('p{}_{}'.format(position, slot))
+                template.instructions[position].params[slot] = symbol
+                for (_, parameters), value in zip(members, values):
+                    parameters[symbol] = value
+        templates.append((template, members))
+    return templates
+
+
+def bind_result(result, parameters, header):
+    """Bind the parameters of the result of a template for one of its experiments.
+
+    Args:
+        result (ExperimentResult): the result of the template
+        parameters (dict): symbol -> value, empty to only copy the result
+        header (QobjItem): the header of the experiment
+
+    Returns:
+        ExperimentResult: the result of the experiment
+    """
+    if not isinstance(result, ExperimentResult):
+        return result
+    start = time.time()
+    data = dict(result.data.as_dict() if hasattr(result.data, 'as_dict') else result.data)
+    for name in PARAMETRIC_DATA:
+        if name in data and parameters:
+            data[name] = bind_parameters(data[name], parameters)
+    if 'sparse_statevector' in data and parameters:
+        amplitudes = [(index, amplitude) for index, amplitude in zip(
+            [index for index, _ in data['sparse_statevector']],
+            bind_parameters([amp for _, amp in data['sparse_statevector']], parameters))]
+        data['sparse_statevector'] = [(index, amplitude) for index, amplitude in amplitudes
+                                      if amplitude != 0]
+    if 'time_taken' in data:
+        data['time_taken'] += time.time() - start
+    return ExperimentResult(data=data, success=result.success, shots=result.shots,
+                            status=result.status, header={'name': header.name})
+
+
+def _result_symbols(result):
+    """Return the Dummy symbols of the result of a template by name.
+
+    A cached result holds the symbols of the job which simulated the template,
+    see `resultcache.experiment_key`, which only differ from those of the
+    current job in their index."""
+    if not isinstance(result, ExperimentResult):
+        return {}
+    data = result.data.as_dict() if hasattr(result.data, 'as_dict') else result.data
+    symbols = set()
+    for name in PARAMETRIC_DATA:
+        if name in data:
+            symbols |= free_parameters(data[name])
+    if 'sparse_statevector' in data:
+        symbols |= free_parameters([amplitude for _, amplitude in data['sparse_statevector']])
+    return {symbol.name: symbol for symbol in symbols if isinstance(symbol, Dummy)}
+
+
+class _TemplateQueue:
+    """Stand for the result queue of the templates, to put the results of their
+    experiments instead, as soon as the template is simulated."""
+
+    def __init__(self, experiments, groups, results, result_queue):
+        self._experiments = experiments
+        self._groups = groups
+        self._results = results
+        self._result_queue = result_queue
+
+    def put(self, item):
+        """Bind and store the results of the experiments of the template."""
+        template_index, result = item
+        members = self._groups[template_index][1]
+        symbols = _result_symbols(result) if len(members) > 1 else {}
+        for index, parameters in members:
+            if parameters or index != members[0][0]:
+                # Every experiment gets its own result, with its own header.
+                parameters = {symbols.get(symbol.name, symbol): value
+                              for symbol, value in parameters.items()}
+                self._results[index] = bind_result(result, parameters,
+                                                   self._experiments[index].header)
+            else:
+                self._results[index] = result
+            if self._result_queue is not None:
+                self._result_queue.put((index, self._results[index]))
+
+
+def run_templates(run_circuit, experiments, qobj_config, result_queue=None):
+    """Run the experiments of a qobj like `run_experiments`, simulating the
+    experiments that only differ in their angles once, see `template_groups`.
+
+    Args:
+        run_circuit (callable): picklable callable running a single experiment
+        experiments (list[QobjExperiment]): the experiments to run
+        qobj_config (QobjConfig): the config of the qobj
+        result_queue (queue.Queue): if given, every (index, ExperimentResult)
+            pair is also put on it as soon as the experiment completes
+
+    Returns:
+        list[ExperimentResult]: the results of the experiments
+    """
+    groups = template_groups(experiments, qobj_config)
+    results = [None] * len(experiments)
+    run_experiments(run_circuit, [template for template, _ in groups], qobj_config,
+                    _TemplateQueue(experiments, groups, results, result_queue))
+    return results
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Simulate the common instruction prefixes of the experiments of a qobj once.
+
+Variational and tomography qobjs hold many experiments which share a long state
+preparation and differ in their last few gates. Sorted by their instructions,
+the experiments form a depth-first walk of the trie of their instruction
+sequences, in which every experiment shares the longest prefix with its
+neighbours. `run_shared_prefixes` walks it: it snapshots the state where the
+next experiments branch off, and continues every experiment from the deepest
+snapshot on its prefix. At most `max_snapshots` snapshots are alive at once;
+beyond that, the branches replay their instructions from a shallower snapshot.
+"""
+
+
+def instruction_key(operation):
+    """Return a key of an instruction, equal for the instructions which act the same.
+
+    Args:
+        operation (QobjInstruction): the instruction
+
+    Returns:
+        str: the key
+    """
+    fields = operation.as_dict()
+    fields.pop('texparams', None)
+    return repr(sorted(fields.items()))
+
+
+def _common_prefix(first, second):
+    """Return the length of the common prefix of two sequences."""
+    length = 0
+    for item, other in zip(first, second):
+        if item != other:
+            break
+        length += 1
+    return length
+
+
+def run_shared_prefixes(sequences, start, advance, copy, finish, max_snapshots=8):
+    """Simulate sequences of instructions, simulating each shared prefix once.
+
+    The state is opaque to this function, and only handled by the callables.
+
+    Args:
+        sequences (list[list]): the keys of the instructions of every sequence,
+            see `instruction_key`
+        start (callable): start() returns the state before any instruction
+        advance (callable): advance(state, index, begin, end) applies the
+            instructions begin to end (excluded) of the sequence `index` to
+            `state`, and returns the new state, which may be `state` itself
+        copy (callable): copy(state) returns a copy of a state, which `advance`
+            does not change
+        finish (callable): finish(index, state) is called with the final state
+            of every sequence, in the order of the walk, and must not change it
+        max_snapshots (int): the maximum number of snapshots kept at once; 0
+            simulates every sequence from the start
+
+    Returns:
+        int: the number of instructions applied
+    """
+    order = sorted(range(len(sequences)), key=lambda index: sequences[index])
+    # shared[rank]: the length of the prefix shared by the experiments of ranks
+    # rank - 1 and rank in the walk, and 0 beyond its ends
+    shared = [0] + [_common_prefix(sequences[previous], sequences[index])
+                    for previous, index in zip(order, order[1:])] + [0]
+    snapshots = []  # (position, state) on the prefix of the current sequence, deepest last
+    applied = 0
+    for rank, index in enumerate(order):
+        while snapshots and snapshots[-1][0] > shared[rank]:
+            snapshots.pop()
+        if not snapshots:
+            position, state = 0, start()
+        elif shared[rank + 1] >= snapshots[-1][0]:
+            position, state = snapshots[-1][0], copy(snapshots[-1][1])
+        else:
+            # the last sequence branching off at this snapshot
+            position, state = snapshots.pop()
+
+        # where the next sequences branch off the current one, deepest first
+        branches = []
+        common = len(sequences[index])
+        for following in range(rank + 1, len(order)):
+            common = min(common, shared[following])
+            if common <= position:
+                break
+            if not branches or common < branches[-1]:
+                branches.append(common)
+
+        for branch in reversed(branches):
+            if len(snapshots) >= max_snapshots:
+                break
+            state = advance(state, index, position, branch)
+            applied += branch - position
+            position = branch
+            snapshots.append((position, copy(state)))
+        state = advance(state, index, position, len(sequences[index]))
+        applied += len(sequences[index]) - position
+        finish(index, state)
+    return applied
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Pre-flight estimation of the memory and time an experiment needs.
+
+The estimates are orders of magnitude, derived from the number of qubits, the
+number of gates and their mix:
+* a u gate whose `theta` is not a multiple of pi mixes pairs of basis states, so
+  it may double the number of nonzero amplitudes (the 'branching' gates);
+* a u gate that is not Clifford+T (see `cyclotomic`) brings new exponentials into
+  the amplitudes, so it may double their number of terms (the 'generic' gates).
+
+The simulators compare them to the `max_memory` (in bytes) and `max_time` (in
+seconds) limits, if set, before a job is submitted, and reject an oversized
+experiment, or, on request, move it to an engine that fits.
+"""
+
+import os
+from collections import namedtuple
+
+from .cyclotomic import ugate_monomials
+from .simulatortools import get_option, pi_fraction, ugate_parameters
+
+ResourceEstimate = namedtuple('ResourceEstimate', ['memory', 'seconds', 'time_class'])
+
+# Rough costs, in the range of what the benchmarks of test/test_benchmarks.py show.
+POINTER_BYTES = 8
+TERM_BYTES = 200  # one additive term of an expanded sympy amplitude
+DICT_ENTRY_BYTES = 100
+CYCLOTOMIC_BYTES = 32  # the four int64 coefficients of a ring element
+CLIFFORD_T_TERMS = 8  # terms of an amplitude in Z[1/sqrt(2), exp(i*pi/4)]
+SYMPY_TERM_SECONDS = 2e-5  # time to expand one term of an amplitude
+INTEGER_SECONDS = 1e-8
+KET_FACTOR = 10  # the ket engine compared to the dense one
+
+TIME_CLASSES = ((60, 'seconds'), (3600, 'minutes'), (86400, 'hours'))
+
+
+def gate_mix(circuit):
+    """Count the gates of an experiment by the way they make amplitudes grow.
+
+    Args:
+        circuit (QobjExperiment): Qobj experiment
+
+    Returns:
+        dict: 'gates', the number of gates other than id and barrier, and
+            'branching' and 'generic', the numbers of such u gates
+    """
+    mix = {'gates': 0, 'branching': 0, 'generic': 0}
+    for operation in circuit.instructions:
+        if operation.name in ('id', 'barrier'):
+            continue
+        mix['gates'] += 1
+        if operation.name in ('U', 'u1', 'u2', 'u3'):
+            try:
+                parameters = ugate_parameters(getattr(operation, 'params', None))
+            except (TypeError, ValueError):
+                continue
+            if pi_fraction(parameters[0], 1) is None:
+                mix['branching'] += 1
+            if ugate_monomials(parameters) is None:
+                mix['generic'] += 1
+    return mix
+
+
+def estimate_resources(circuit, engine, unitary=False, sparse_output=False):
+    """Estimate the peak memory and the time an experiment needs.
+
+    Args:
+        circuit (QobjExperiment): Qobj experiment
+        engine (str): the engine running it, other than 'auto'
+        unitary (bool): whether the unitary is computed, rather than the statevector
+        sparse_output (bool): whether the statevector is returned in sparse form
+
+    Returns:
+        ResourceEstimate: the memory in bytes, the time in seconds, and the
+            time class, 'seconds', 'minutes', 'hours' or 'days'
+    """
+    number_of_qubits = circuit.header.number_of_qubits
+    mix = gate_mix(circuit)
+    dim = 2 ** number_of_qubits
+    columns = dim if unitary else 1
+    terms = CLIFFORD_T_TERMS
+    if mix['generic']:
+        terms = max(terms, min(2 ** mix['generic'], 4 * dim))
+    amplitude_bytes = POINTER_BYTES + TERM_BYTES * terms
+
+    if engine == 'sparse':
+        support = 2 ** min(number_of_qubits, mix['branching'])
+        memory = columns * support * (DICT_ENTRY_BYTES + amplitude_bytes)
+        if not sparse_output:
+            memory += columns * dim * POINTER_BYTES
+        seconds = columns * mix['gates'] * support * terms * SYMPY_TERM_SECONDS
+    elif engine == 'stabilizer':
+        # the nonzero amplitudes share at most 8 sympy objects
+        support = 2 ** min(number_of_qubits, mix['branching'])
+        memory = support * DICT_ENTRY_BYTES
+        if not sparse_output:
+            memory += dim * POINTER_BYTES
+        seconds = (support + mix['gates']) * number_of_qubits * INTEGER_SECONDS
+    elif engine == 'cyclotomic':
+        # the integer array, a temporary copy, then one sympy object per entry
+        # (equal entries are converted once)
+        memory = columns * dim * (2 * CYCLOTOMIC_BYTES + POINTER_BYTES)
+        seconds = columns * dim * SYMPY_TERM_SECONDS + \
+            columns * dim * mix['gates'] * 4 * INTEGER_SECONDS
+    else:
+        memory = columns * dim * amplitude_bytes
+        seconds = columns * dim * mix['gates'] * terms * SYMPY_TERM_SECONDS
+        if engine == 'ket':
+            memory *= KET_FACTOR
+            seconds *= KET_FACTOR
+
+    time_class = 'days'
+    for bound, name in TIME_CLASSES:
+        if seconds < bound:
+            time_class = name
+            break
+    return ResourceEstimate(memory, seconds, time_class)
+
+
+def physical_memory():
+    """Return the physical memory of the machine in bytes, or None if unknown."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def fit_engine(circuit, qobj_config, configuration, engine, alternatives, unitary=False):
+    """Find an engine whose estimate fits the resource limits.
+
+    The limits are the `max_memory` and `max_time` options (see `get_option`),
+    falling back to the backend configuration; a limit set nowhere, as by
+    default, does not apply (`physical_memory` helps choosing `max_memory`).
+    The alternatives are only tried if the `oversize` option is 'downgrade'
+    rather than 'reject' (default).
+
+    Args:
+        circuit (QobjExperiment): Qobj experiment
+        qobj_config (QobjConfig): the config of the qobj
+        configuration (dict): the backend configuration
+        engine (str): the engine the experiment would run on, other than 'auto'
+        alternatives (list[tuple]): (engine, options) pairs to try in turn, if
+            `engine` does not fit, with the options the alternative needs
+        unitary (bool): whether the unitary is computed, rather than the statevector
+
+    Returns:
+        tuple: (engine, options, estimate) for the engine chosen, or
+            (None, None, estimate) with the estimate of `engine` if none fits
+    """
+    max_memory = get_option(circuit, qobj_config, 'max_memory',
+                            configuration.get('max_memory'))
+    max_time = get_option(circuit, qobj_config, 'max_time', configuration.get('max_time'))
+
+    def _fits(estimate):
+        return (max_memory is None or estimate.memory <= max_memory) and \
+            (max_time is None or estimate.seconds <= max_time)
+
+    sparse_output = get_option(circuit, qobj_config, 'sparse_output', False)
+    estimate = estimate_resources(circuit, engine, unitary, sparse_output)
+    if _fits(estimate):
+        return engine, {}, estimate
+    if get_option(circuit, qobj_config, 'oversize', 'reject') == 'downgrade':
+        for alternative, options in alternatives:
+            alternative_estimate = estimate_resources(
+                circuit, alternative, unitary, options.get('sparse_output', sparse_output))
+            if _fits(alternative_estimate):
+                return alternative, options, alternative_estimate
+    return None, None, estimate
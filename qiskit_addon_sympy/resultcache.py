@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Cache of experiment results, shared across jobs.
+
+The results are keyed by a hash of what determines them, see `experiment_key`,
+and kept in an in-memory tier, bounded in number of results and in bytes, in
+front of an optional on-disk tier whose files are evicted, least recently used
+first, beyond a total size. The on-disk tier stores pickles: point it to a
+directory only this user writes.
+
+Every set of settings has its own cache, see `result_cache`, so backends with
+different configurations do not reconfigure each other's.
+
+The in-memory tier belongs to the process which runs the job: with the default
+process executor of `SympyJob`, a later job only reuses it if it lands on the
+same worker. Cross-job reuse is reliable with the thread executor (see
+`SympyProvider`), or with the on-disk tier, which every worker shares.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+import tempfile
+
+import numpy as np
+import sympy
+
+from . import __version__
+from .resources import CLIFFORD_T_TERMS, POINTER_BYTES, TERM_BYTES
+from .simulatortools import LRUCache
+
+# Options which change how a job runs, not the results of its experiments.
+JOB_OPTIONS = ('max_credits', 'parallel_experiments', 'max_workers', 'templates',
+               'prefix_sharing', 'max_snapshots', 'result_cache', 'max_memory', 'max_time',
+               'oversize')
+
+# Rough size in memory of an amplitude, or another entry, of a result.
+ENTRY_BYTES = POINTER_BYTES + CLIFFORD_T_TERMS * TERM_BYTES
+
+_MISSING = object()
+
+
+def estimated_size(value):
+    """Return a rough size in bytes of a result in memory, `ENTRY_BYTES` per
+    amplitude or other entry of its data. Measuring it, e.g. by pickling, would
+    cost about as much as a cache hit saves."""
+    if not isinstance(value, dict):
+        return ENTRY_BYTES
+    entries = 0
+    for item in value.values():
+        if isinstance(item, np.ndarray):
+            entries += item.size
+        elif isinstance(item, (dict, list, tuple)):
+            entries += len(item)
+        else:
+            entries += 1
+    return entries * ENTRY_BYTES
+
+
+def cache_settings(configuration):
+    """Return the settings of the cache of a backend, the arguments of
+    `ResultCache`, from the `result_cache_*` keys of its configuration, the
+    in-memory tier staying within its `max_memory`."""
+    max_memory = configuration.get('result_cache_max_memory', 2 ** 28)
+    if configuration.get('max_memory') is not None:
+        max_memory = configuration['max_memory'] if max_memory is None else \
+            min(max_memory, configuration['max_memory'])
+    return (configuration.get('result_cache_size', 128),
+            configuration.get('result_cache_dir'),
+            configuration.get('result_cache_max_bytes', 2 ** 30), max_memory)
+
+
+def experiment_key(circuit, qobj_config, backend_name):
+    """Return the key of the result of an experiment.
+
+    It is a hash of the instructions, the number of qubits, the options (but
+    `JOB_OPTIONS`), the backend name and the versions of this package and of sympy.
+    The Dummy symbols, e.g. those of the templates of `parameters.run_templates`,
+    are numbered by their first appearance, so that equal experiments with fresh
+    Dummy symbols have the same key.
+
+    Args:
+        circuit (QobjExperiment): Qobj experiment
+        qobj_config (QobjConfig): the config of the qobj
+        backend_name (str): the name of the backend running it
+
+    Returns:
+        str: the key
+    """
+    options = qobj_config.as_dict() if qobj_config is not None else {}
+    if getattr(circuit, 'config', None) is not None:
+        options.update(circuit.config.as_dict())
+    for name in JOB_OPTIONS:
+        options.pop(name, None)
+    instructions = []
+    for operation in circuit.instructions:
+        fields = operation.as_dict()
+        fields.pop('texparams', None)
+        instructions.append(fields)
+    dummies = {}
+
+    def _srepr(expr):
+        return re.sub(r'dummy_index=(\d+)', lambda match: 'dummy={}'.format(
+            dummies.setdefault(match.group(1), len(dummies))), sympy.srepr(expr))
+
+    content = json.dumps([backend_name, __version__, sympy.__version__,
+                          circuit.header.number_of_qubits, instructions, options],
+                         sort_keys=True, default=_srepr)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class ResultCache:
+    """The results of experiments, in memory and optionally on disk."""
+
+    def __init__(self, maxsize=128, directory=None, max_bytes=2 ** 30, max_memory=2 ** 28):
+        """Create an empty cache.
+
+        Args:
+            maxsize (int): the maximum number of results in memory
+            directory (str): the directory of the on-disk tier, or None for none
+            max_bytes (int): the maximum total size of the files of the on-disk tier
+            max_memory (int): the maximum total size of the results in memory,
+                estimated by `estimated_size`, or None for no bound
+        """
+        self._memory = LRUCache(maxsize, max_memory, estimated_size)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def configure(self, maxsize, directory=None, max_bytes=2 ** 30, max_memory=2 ** 28):
+        """Change the sizes and the directory of the cache, see `__init__`."""
+        self._memory.resize(maxsize, max_memory)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get_or_compute(self, key, function):
+        """Return the result stored for `key`, in memory or on disk, computing
+        and storing it in both tiers if needed.
+
+        Args:
+            key (str): the key, see `experiment_key`
+            function (callable): called without arguments to compute a missing result
+
+        Returns:
+            object: the result for `key`
+        """
+        def _load_or_compute():
+            value = self._load(key)
+            if value is _MISSING:
+                value = function()
+                self._store(key, value)
+            return value
+
+        return self._memory.get_or_compute(key, _load_or_compute)
+
+    def __contains__(self, key):
+        """Return whether a result is stored for `key`, in memory or on disk."""
+        return key in self._memory or (self.directory is not None and
+                                       os.path.exists(self._path(key)))
+
+    def clear(self):
+        """Remove every result from memory, and reset the counters."""
+        self._memory.clear()
+
+    def info(self):
+        """Return the counters and sizes of the in-memory tier, see `LRUCache.info`."""
+        return self._memory.info()
+
+    def memory(self):
+        """Return the total size of the results in memory, see `estimated_size`."""
+        return self._memory.weight()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def _load(self, key):
+        if self.directory is None:
+            return _MISSING
+        try:
+            with open(self._path(key), 'rb') as file:
+                value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return _MISSING
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return value
+
+    def _store(self, key, value):
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self._path(key))
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pickle'):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue  # removed by another process
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+# Results of the experiments run in this process by the backends with the
+# default `result_cache_*` configuration.
+RESULT_CACHE = ResultCache()
+
+# The caches of this process, by settings, see `result_cache`.
+_CACHES = {cache_settings({}): RESULT_CACHE}
+
+
+def result_cache(configuration):
+    """Return the cache of the results of a backend in this process.
+
+    Backends whose configurations have the same settings, see `cache_settings`,
+    share a cache, `RESULT_CACHE` for the default ones; a backend never resizes
+    or moves the cache of another.
+
+    Args:
+        configuration (dict): the backend configuration
+
+    Returns:
+        ResultCache: the cache, created empty at first use
+    """
+    settings = cache_settings(configuration)
+    if settings not in _CACHES:
+        _CACHES[settings] = ResultCache(*settings)
+    return _CACHES[settings]
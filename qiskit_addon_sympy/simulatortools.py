@@ -9,7 +9,134 @@
 
 """Functions used by the sympy simulators."""
 
-from sympy import E, I, Matrix, N, cos, pi, sin, sympify
+import logging
+import math
+import multiprocessing
+import time
+import tracemalloc
+from collections import OrderedDict, namedtuple
+from concurrent import futures
+
+import numpy as np
+from sympy import (Basic, E, I, ImmutableMatrix, N, cos, count_ops, expand, expand_complex,
+                   nsimplify, pi, radsimp, simplify, sin, sympify)
+
+from qiskit.qobj import QobjInstruction
+
+logger = logging.getLogger(__name__)
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    """A bounded mapping that evicts its least recently used entries."""
+
+    def __init__(self, maxsize=1024, max_weight=None, weigh=None):
+        """Create an empty cache.
+
+        Args:
+            maxsize (int): the maximum number of entries
+            max_weight (int): the maximum total weight of the entries, or None
+                for no bound
+            weigh (callable): returns the weight of a value, e.g. its size in
+                bytes; required for `max_weight` to apply, and only called
+                while there is a `max_weight`
+        """
+        self._entries = OrderedDict()
+        self._weights = {}
+        self._maxsize = maxsize
+        self._max_weight = max_weight
+        self._weigh = weigh
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, function):
+        """Return the value stored for `key`, computing and storing it if needed.
+
+        Args:
+            key (hashable): the key
+            function (callable): called without arguments to compute a missing value
+
+        Returns:
+            object: the value for `key`
+        """
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = function()
+            self._entries[key] = value
+            if self._weigh is not None and self._max_weight is not None:
+                self._weights[key] = self._weigh(value)
+            self._evict()
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)  # pylint: disable=no-member
+        return value
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def resize(self, maxsize, max_weight=None):
+        """Change the maximum number of entries, and total weight, evicting the
+        oldest ones if needed."""
+        self._maxsize = maxsize
+        self._max_weight = max_weight
+        if self._weigh is not None and max_weight is not None:
+            for key, value in self._entries.items():
+                if key not in self._weights:
+                    self._weights[key] = self._weigh(value)
+        else:
+            self._weights.clear()
+        self._evict()
+
+    def weight(self):
+        """Return the total weight of the entries, 0 without `weigh` or
+        `max_weight`."""
+        return sum(self._weights.values())
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        self._entries.clear()
+        self._weights.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Return the hit and miss counters, and the maximum and current sizes.
+
+        Returns:
+            CacheInfo: a named tuple, similar to the one of `functools.lru_cache`
+        """
+        return CacheInfo(self.hits, self.misses, self._maxsize, len(self._entries))
+
+    def _evict(self):
+        weight = self.weight()
+        while len(self._entries) > self._maxsize or \
+                (self._max_weight is not None and weight > self._max_weight):
+            key, _ = self._entries.popitem(last=False)
+            weight -= self._weights.pop(key, 0)
+
+
+# Regulated angles, u gate matrices and ket gates, shared by the simulators of a
+# process. Sweep circuits reuse the same few angles many times. Its size is set
+# per process, see the `ugate_cache_size` option of `SympyProvider`.
+UGATE_CACHE = LRUCache()
+
+
+def angle_key(theta):
+    """Return the key under which an angle is cached.
+
+    Args:
+        theta (float or sympy.Basic): the angle
+
+    Returns:
+        hashable: symbolic angles are their own key, numbers their exact float
+            value, so that distinct angles never share an entry
+    """
+    if isinstance(theta, Basic):
+        return theta
+    return float(theta)
 
 
 def index1(b, i, k):
@@ -51,13 +178,447 @@ def index2(b1, i1, b2, i2, k):
     return retval
 
 
+def get_option(circuit, qobj_config, name, default=None):
+    """Look up a simulator option, first in the experiment config, then in
+    the qobj config.
+
+    Args:
+        circuit (QobjExperiment): Qobj experiment
+        qobj_config (QobjConfig): the config of the qobj the experiment belongs to,
+            or None
+        name (str): the name of the option
+        default (object): value returned if the option is set nowhere
+
+    Returns:
+        object: the value of the option
+    """
+    return getattr(getattr(circuit, 'config', None), name,
+                   getattr(qobj_config, name, default))
+
+
+def can_start_processes():
+    """Return whether this process may start a pool of processes.
+
+    The workers of a process pool are daemonic before Python 3.9, and daemonic
+    processes cannot have children: a job running in such a worker runs its
+    experiments (or columns) serially instead.
+    """
+    if multiprocessing.current_process().daemon:  # pylint: disable=not-callable
+        logger.info('Running in a daemonic process, running serially.')
+        return False
+    return True
+
+
+def run_experiments(run_circuit, experiments, qobj_config, result_queue=None):
+    """Run the experiments of a qobj and return their results, in order.
+
+    If the qobj config sets `parallel_experiments`, the experiments are spread
+    over a pool of processes, of at most `max_workers` processes (by default,
+    the number of processors), unless `can_start_processes` does not hold.
+
+    Args:
+        run_circuit (callable): picklable callable running a single experiment
+        experiments (list[QobjExperiment]): the experiments to run
+        qobj_config (QobjConfig): the config of the qobj
+        result_queue (queue.Queue): if given, every (index, ExperimentResult)
+            pair is also put on it as soon as the experiment completes
+
+    Returns:
+        list[ExperimentResult]: the results of the experiments
+    """
+    if not getattr(qobj_config, 'parallel_experiments', False) or len(experiments) < 2 or \
+            not can_start_processes():
+        results = []
+        for index, circuit in enumerate(experiments):
+            results.append(run_circuit(circuit))
+            if result_queue is not None:
+                result_queue.put((index, results[-1]))
+        return results
+
+    max_workers = getattr(qobj_config, 'max_workers', None)
+    results = [None] * len(experiments)
+    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        indices = {executor.submit(run_circuit, circuit): index
+                   for index, circuit in enumerate(experiments)}
+        for future in futures.as_completed(indices):
+            results[indices[future]] = future.result()
+            if result_queue is not None:
+                result_queue.put((indices[future], results[indices[future]]))
+    return results
+
+
+class GateInstrumentation:
+    """Record, for every instruction of a simulation, its wall time, the total
+    `count_ops` of the state after it and, on request, the peak memory traced by
+    tracemalloc while it ran.
+
+    Tracing hooks every allocation, which slows the allocation-heavy sympy code
+    severalfold: the wall times recorded while memory is traced do not reflect
+    uninstrumented runs. Time and memory are best measured in separate runs.
+
+    The peak is reset before every instruction on Python 3.9 and later; on older
+    versions, it is the peak since the start of the simulation.
+    """
+
+    DTYPE = np.dtype([('name', 'U16'), ('time', 'f8'), ('count_ops', 'i8'),
+                      ('peak_memory', 'i8')])
+
+    def __init__(self, trace_memory=False):
+        """Start recording.
+
+        Args:
+            trace_memory (bool): whether the peak memory is traced, otherwise
+                it is recorded as 0
+        """
+        self._records = []
+        self._cache_info = UGATE_CACHE.info()
+        self._trace_memory = trace_memory
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._restart()
+
+    def _restart(self):
+        if self._trace_memory and hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()  # pylint: disable=no-member
+        self._last = time.perf_counter()
+
+    def record(self, name, amplitudes=()):
+        """Record an instruction which has just been applied.
+
+        The time spent here measuring the state is not counted in the next instruction.
+
+        Args:
+            name (str): the name of the instruction
+            amplitudes (iterable): the sympy expressions of the state, empty for
+                the engines storing integers
+        """
+        elapsed = time.perf_counter() - self._last
+        peak = tracemalloc.get_traced_memory()[1] if self._trace_memory else 0
+        sizes = {}
+        total = 0
+        for amplitude in amplitudes:
+            # interned amplitudes are measured once
+            if id(amplitude) not in sizes:
+                sizes[id(amplitude)] = count_ops(amplitude)
+            total += sizes[id(amplitude)]
+        self._records.append((name, elapsed, total, peak))
+        self._restart()
+
+    def clear(self):
+        """Forget the instructions recorded so far, e.g. when an engine gives up."""
+        self._records = []
+        self._restart()
+
+    def finish(self):
+        """Stop tracing memory, if tracing was started here, and return the records.
+
+        Returns:
+            ndarray: structured array of `DTYPE`, one row per instruction
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+        return np.array(self._records, dtype=self.DTYPE)
+
+    def cache_counters(self):
+        """Return the use of `UGATE_CACHE` by the simulation, in the process
+        which ran it.
+
+        Returns:
+            dict: 'hits' and 'misses' since the instrumentation was created, and
+                'maxsize' and 'currsize', the sizes of the cache
+        """
+        info = UGATE_CACHE.info()
+        return {'hits': info.hits - self._cache_info.hits,
+                'misses': info.misses - self._cache_info.misses,
+                'maxsize': info.maxsize, 'currsize': info.currsize}
+
+
+class ExpressionInterner:
+    """Share structurally identical amplitudes, and the results computed from them.
+
+    Symmetric circuits produce the same amplitudes (e.g. sqrt(2)/2) in many
+    entries of a statevector or a unitary. Interning makes such entries one
+    object, and every linear combination of interned amplitudes is computed
+    (and expanded) once per gate, then looked up. An interner lives for one
+    simulation; `release` after every gate bounds it to the live amplitudes.
+
+    Interning trades memory for time: its tables hold a reference to every
+    live amplitude and to the results of the current gate, so the peak memory
+    is usually higher than without it. The simulators only intern on request.
+    """
+
+    def __init__(self):
+        self._expressions = {}
+        self._results = {}
+
+    def intern(self, expression):
+        """Return the shared object equal to `expression`."""
+        return self._expressions.setdefault(expression, expression)
+
+    def combine(self, terms):
+        """Return the interned expansion of a linear combination.
+
+        Args:
+            terms (tuple): (coefficient, amplitude) pairs
+
+        Returns:
+            sympy.Basic: expand(sum of coefficient*amplitude)
+        """
+        try:
+            return self._results[terms]
+        except KeyError:
+            value = self.intern(_combine(terms, None))
+            self._results[terms] = value
+            return value
+
+    def apply(self, function, expression):
+        """Return the interned `function(expression)`, e.g. for a simplifier."""
+        key = (function, expression)
+        try:
+            return self._results[key]
+        except KeyError:
+            value = self.intern(function(expression))
+            self._results[key] = value
+            return value
+
+    def release(self, vectors):
+        """Forget the results computed so far, and the expressions which are
+        no longer amplitudes of `vectors`.
+
+        Args:
+            vectors (list): lists of amplitudes, or dicts of nonzero amplitudes
+        """
+        self._results.clear()
+        live = {}
+        for vector in vectors:
+            amplitudes = vector.values() if isinstance(vector, dict) else vector
+            for amplitude in amplitudes:
+                live.setdefault(amplitude, amplitude)
+        self._expressions = live
+
+    def __len__(self):
+        return len(self._expressions)
+
+
+def _combine(terms, interner):
+    """Expand a linear combination, through `interner` if it is not None."""
+    if interner is None:
+        return expand(sum(entry*amp for entry, amp in terms))
+    return interner.combine(terms)
+
+
+def apply_single_qubit_gate(vector, gate, qubit, interner=None):
+    """Apply a single-qubit gate in place on a flat list of amplitudes.
+
+    Only the amplitude pairs that differ in the bit of `qubit` are touched,
+    so no enlarged operator is ever built.
+
+    Args:
+        vector (list): the 2**n amplitudes, qubit 0 being the least significant bit
+        gate (Matrix): the 2x2 matrix of the gate
+        qubit (int): the qubit to apply the gate on
+        interner (ExpressionInterner): if given, the new amplitudes are interned
+    """
+    g00, g01, g10, g11 = gate[0, 0], gate[0, 1], gate[1, 0], gate[1, 1]
+    for k in range(len(vector) >> 1):
+        i0 = index1(0, qubit, k)
+        i1 = index1(1, qubit, k)
+        amp0 = vector[i0]
+        amp1 = vector[i1]
+        vector[i0] = _combine(((g00, amp0), (g01, amp1)), interner)
+        vector[i1] = _combine(((g10, amp0), (g11, amp1)), interner)
+
+
+def apply_two_qubit_gate(vector, gate, qubit0, qubit1, interner=None):
+    """Apply a two-qubit gate in place on a flat list of amplitudes.
+
+    Only the amplitude quads that differ in the bits of `qubit0` and `qubit1`
+    are touched, so no enlarged operator is ever built.
+
+    Args:
+        vector (list): the 2**n amplitudes, qubit 0 being the least significant bit
+        gate (Matrix): the 4x4 matrix of the gate, whose row and column
+            indices are `b0 + 2*b1`, `b0` (resp. `b1`) being the bit of `qubit0`
+            (resp. `qubit1`)
+        qubit0 (int): the first qubit, e.g. the control of a cx
+        qubit1 (int): the second qubit, e.g. the target of a cx
+        interner (ExpressionInterner): if given, the new amplitudes are interned
+    """
+    rows = [[(col, gate[row, col]) for col in range(4) if gate[row, col] != 0]
+            for row in range(4)]
+    for k in range(len(vector) >> 2):
+        indices = [index2(b0, qubit0, b1, qubit1, k) for b1 in range(2) for b0 in range(2)]
+        amps = [vector[i] for i in indices]
+        for i, row in zip(indices, rows):
+            if len(row) == 1 and row[0][1] == 1:
+                # permutation entry, e.g. in a cx: no arithmetic needed
+                vector[i] = amps[row[0][0]]
+            else:
+                vector[i] = _combine(tuple((entry, amps[col]) for col, entry in row),
+                                     interner)
+
+
+def apply_single_qubit_gate_sparse(amplitudes, gate, qubit, interner=None):
+    """Apply a single-qubit gate in place on a dict of the nonzero amplitudes.
+
+    Only the amplitude pairs with a nonzero member are visited, and the
+    amplitudes that become zero are removed.
+
+    Args:
+        amplitudes (dict): basis state index -> nonzero amplitude, qubit 0 being
+            the least significant bit of the index
+        gate (Matrix): the 2x2 matrix of the gate
+        qubit (int): the qubit to apply the gate on
+        interner (ExpressionInterner): if given, the new amplitudes are interned
+    """
+    g00, g01, g10, g11 = gate[0, 0], gate[0, 1], gate[1, 0], gate[1, 1]
+    mask = 1 << qubit
+    for i0 in {index & ~mask for index in amplitudes}:
+        i1 = i0 | mask
+        amp0 = amplitudes.get(i0, 0)
+        amp1 = amplitudes.get(i1, 0)
+        _set_sparse(amplitudes, i0, _combine(((g00, amp0), (g01, amp1)), interner))
+        _set_sparse(amplitudes, i1, _combine(((g10, amp0), (g11, amp1)), interner))
+
+
+def apply_two_qubit_gate_sparse(amplitudes, gate, qubit0, qubit1, interner=None):
+    """Apply a two-qubit gate in place on a dict of the nonzero amplitudes.
+
+    Args:
+        amplitudes (dict): basis state index -> nonzero amplitude, qubit 0 being
+            the least significant bit of the index
+        gate (Matrix): the 4x4 matrix of the gate, indexed as in
+            `apply_two_qubit_gate`
+        qubit0 (int): the first qubit, e.g. the control of a cx
+        qubit1 (int): the second qubit, e.g. the target of a cx
+        interner (ExpressionInterner): if given, the new amplitudes are interned
+    """
+    rows = [[(col, gate[row, col]) for col in range(4) if gate[row, col] != 0]
+            for row in range(4)]
+    offsets = [(b0 << qubit0) | (b1 << qubit1) for b1 in range(2) for b0 in range(2)]
+    mask = offsets[3]
+    for base in {index & ~mask for index in amplitudes}:
+        indices = [base | offset for offset in offsets]
+        amps = [amplitudes.get(i, 0) for i in indices]
+        for i, row in zip(indices, rows):
+            if len(row) == 1 and row[0][1] == 1:
+                # permutation entry, e.g. in a cx: no arithmetic needed
+                _set_sparse(amplitudes, i, amps[row[0][0]])
+            else:
+                _set_sparse(amplitudes, i, _combine(
+                    tuple((entry, amps[col]) for col, entry in row), interner))
+
+
+def _set_sparse(amplitudes, index, amplitude):
+    """Store an amplitude in a dict of the nonzero amplitudes."""
+    if amplitude != 0 and not getattr(amplitude, 'is_zero', False):
+        amplitudes[index] = amplitude
+    else:
+        amplitudes.pop(index, None)
+
+
+class SimplificationPolicy:
+    """Decide when, and with which simplifier, the amplitudes are simplified.
+
+    The policies are:
+        * 'none': never simplify (the amplitudes are only expanded).
+        * 'gate': simplify every amplitude after every gate.
+        * 'every': simplify every amplitude after every `period` gates.
+        * 'threshold': after every gate, simplify the amplitudes whose
+            `count_ops` exceeds `threshold`.
+    """
+
+    POLICIES = ('none', 'gate', 'every', 'threshold')
+    SIMPLIFIERS = {'nsimplify': nsimplify, 'radsimp': radsimp,
+                   'expand_complex': expand_complex, 'simplify': simplify}
+
+    def __init__(self, policy='none', simplifier='simplify', period=1, threshold=50):
+        """Create a policy.
+
+        Args:
+            policy (str): one of `POLICIES`
+            simplifier (str): one of the keys of `SIMPLIFIERS`
+            period (int): the number of gates between simplifications, for 'every'
+            threshold (int): the `count_ops` above which an amplitude is
+                simplified, for 'threshold'
+
+        Raises:
+            ValueError: if the policy or the simplifier is unknown, the period
+                is not a positive integer or the threshold is negative
+        """
+        if policy not in self.POLICIES:
+            raise ValueError('unknown simplification policy "{}", expected one of {}'.format(
+                policy, ', '.join(self.POLICIES)))
+        if simplifier not in self.SIMPLIFIERS:
+            raise ValueError('unknown simplifier "{}", expected one of {}'.format(
+                simplifier, ', '.join(sorted(self.SIMPLIFIERS))))
+        if not isinstance(period, int) or isinstance(period, bool) or period < 1:
+            raise ValueError('invalid simplification period {!r}, expected a positive '
+                             'integer'.format(period))
+        if isinstance(threshold, bool) or not isinstance(threshold, (int, float)) or \
+                threshold < 0:
+            raise ValueError('invalid simplification threshold {!r}, expected a '
+                             'non-negative number'.format(threshold))
+        self.policy = policy
+        self.simplifier = self.SIMPLIFIERS[simplifier]
+        self.period = period
+        self.threshold = threshold
+        self._gates = 0
+
+    @classmethod
+    def from_options(cls, circuit, qobj_config):
+        """Create the policy set by the 'simplification', 'simplifier',
+        'simplify_period' and 'simplify_threshold' options, see `get_option`.
+
+        Returns:
+            SimplificationPolicy: the policy
+        Raises:
+            ValueError: if the policy or the simplifier is unknown, or the
+                period or the threshold is invalid
+        """
+        return cls(get_option(circuit, qobj_config, 'simplification', 'none'),
+                   get_option(circuit, qobj_config, 'simplifier', 'simplify'),
+                   get_option(circuit, qobj_config, 'simplify_period', 1),
+                   get_option(circuit, qobj_config, 'simplify_threshold', 50))
+
+    def after_gate(self, vectors, interner=None):
+        """Count one gate, and simplify in place the amplitudes the policy selects.
+
+        Args:
+            vectors (list): lists of amplitudes, or dicts of nonzero amplitudes
+                as in `apply_single_qubit_gate_sparse`
+            interner (ExpressionInterner): if given, equal amplitudes are
+                simplified once
+        """
+        self._gates += 1
+        if self.policy == 'none' or (self.policy == 'every' and self._gates % self.period):
+            return
+        for vector in vectors:
+            keys = list(vector) if isinstance(vector, dict) else range(len(vector))
+            for key in keys:
+                amplitude = vector[key]
+                if self.policy == 'threshold' and count_ops(amplitude) <= self.threshold:
+                    continue
+                if interner is None:
+                    amplitude = self.simplifier(amplitude)
+                else:
+                    amplitude = interner.apply(self.simplifier, amplitude)
+                if isinstance(vector, dict):
+                    _set_sparse(vector, key, amplitude)
+                else:
+                    vector[key] = amplitude
+
+
 def regulate(theta):
     """
     Return the regulated symbolic representation of `theta`::
         * if it has a representation close enough to `pi` transformations,
+            that is, to a non-zero multiple of `pi/4` between `-2*pi` and `2*pi`,
             return that representation (for example, `3.14` -> `sympy.pi`).
         * otherwise, return a sympified representation of theta (for example,
-            `1.23` ->  `sympy.Float(1.23)`).
+            `1.23` ->  `sympy.Float(1.23)`); in particular, an expression with
+            free symbols (a gate parameter, see `parameters`) is returned as is.
 
     See also `UGateGeneric`.
 
@@ -68,24 +629,81 @@ def regulate(theta):
     Returns:
         sympy.Basic: the sympy-regulated representation of `theta`
     """
+    return UGATE_CACHE.get_or_compute(('regulate', angle_key(theta)),
+                                      lambda: _regulate(theta))
+
+
+def _regulate(theta):
+    """Compute `regulate(theta)`, without cache."""
+    if getattr(theta, 'free_symbols', None):
+        return theta
     error_margin = 0.01
-    targets = [pi, pi/2, pi * 2, pi / 4]
+    value = float(N(theta))
+    multiple = int(round(value * 4 / math.pi))
 
-    for t in targets:
-        if abs(N(theta - t)) < error_margin:
-            return t
+    if multiple != 0 and abs(multiple) <= 8 and \
+            abs(value - multiple * math.pi / 4) < error_margin:
+        return multiple * pi / 4
 
     return sympify(theta)
 
 
+def pi_fraction(theta, denominator=4):
+    """Return the integer k such that `theta` is regulated to `k*pi/denominator`.
+
+    Args:
+        theta (float or sympy.Basic): the angle
+        denominator (int): the fraction of `pi` to look for
+
+    Returns:
+        int or None: k, or None if the regulated `theta` is not an exact
+            multiple of `pi/denominator`
+    """
+    regulated = regulate(theta)
+    if regulated.is_zero:
+        return 0
+    ratio = regulated * denominator / pi
+    if ratio.is_Integer:
+        return int(ratio)
+    return None
+
+
+def ugate_parameters(parameters):
+    """Convert the parameter list of a u1, u2 or u3 gate to the [theta, phi, lambda]
+    form of u3, without modifying the original list.
+
+    Args:
+        parameters (list): list of parameters, of which the length may be 1, 2, or 3
+    Returns:
+        list: the [theta, phi, lambda] parameters
+    Raises:
+        ValueError: if the list has another length
+    """
+    if len(parameters) == 1:  # [theta=0, phi=0, lambda]
+        return [0.0, 0.0] + list(parameters)
+    elif len(parameters) == 2:  # [theta=pi/2, phi, lambda]
+        return [pi/2] + list(parameters)
+    elif len(parameters) == 3:  # [theta, phi, lambda]
+        return list(parameters)
+    raise ValueError('U gate must carry 1, 2 or 3 parameters!')
+
+
 def compute_ugate_matrix(parameters):
     """Compute the matrix associated with a parameterized U gate.
 
+    The matrices are cached in `UGATE_CACHE`.
+
     Args:
         parameters (list[float]): parameters carried by the U gate
     Returns:
-        sympy.Matrix: the matrix associated with a parameterized U gate
+        sympy.ImmutableMatrix: the matrix associated with a parameterized U gate
     """
+    key = ('matrix',) + tuple(angle_key(param) for param in parameters)
+    return UGATE_CACHE.get_or_compute(key, lambda: _compute_ugate_matrix(parameters))
+
+
+def _compute_ugate_matrix(parameters):
+    """Compute `compute_ugate_matrix(parameters)`, without cache."""
     theta = regulate(parameters[0])
     phi = regulate(parameters[1])
     lamb = regulate(parameters[2])
@@ -95,4 +713,54 @@ def compute_ugate_matrix(parameters):
     left_down = (E**(I*phi)) * sin(theta/2)
     right_down = (E**(I*(phi + lamb))) * cos(theta/2)
 
-    return Matrix([[left_up, right_up], [left_down, right_down]])
+    return ImmutableMatrix([[left_up, right_up], [left_down, right_down]])
+
+
+def fuse_single_qubit_gates(instructions):
+    """Fuse the runs of consecutive u gates on the same qubit.
+
+    Every run of at least two u1, u2 or u3 gates on a qubit, not interrupted by
+    another operation on that qubit, is replaced by a single 'fused' instruction
+    whose `matrix` attribute is the simplified product of their matrices. It is
+    placed where the run starts: the gates on other qubits in between commute with
+    it. Identity gates are dropped.
+
+    Args:
+        instructions (list[QobjInstruction]): the instructions of an experiment
+
+    Returns:
+        list[QobjInstruction]: the instructions, with the runs fused
+    """
+    fused = []
+    runs = {}  # qubit -> (position in fused, instructions of the run)
+
+    def _flush(qubit):
+        position, run = runs.pop(qubit)
+        if len(run) == 1:
+            fused[position] = run[0]
+            return
+        matrix = compute_ugate_matrix(ugate_parameters(run[0].params))
+        for operation in run[1:]:
+            matrix = compute_ugate_matrix(ugate_parameters(operation.params)) * matrix
+        matrix = matrix.applyfunc(lambda entry: simplify(expand(entry)))
+        fused[position] = QobjInstruction(name='fused', qubits=[qubit], matrix=matrix)
+
+    for operation in instructions:
+        qubits = getattr(operation, 'qubits', None)
+        if operation.name in ('U', 'u1', 'u2', 'u3') and \
+                not getattr(operation, 'conditional', None):
+            qubit = qubits[0]
+            if qubit not in runs:
+                runs[qubit] = (len(fused), [])
+                fused.append(None)
+            runs[qubit][1].append(operation)
+        elif operation.name == 'id':
+            continue
+        else:
+            for qubit in list(runs) if qubits is None else qubits:
+                if qubit in runs:
+                    _flush(qubit)
+            fused.append(operation)
+    for qubit in list(runs):
+        _flush(qubit)
+    return fused
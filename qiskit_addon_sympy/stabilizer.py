@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name
+
+"""Stabilizer simulation of Clifford circuits with exact amplitudes.
+
+The state of n qubits is kept as n stabilizer generators, each a Pauli operator
+i**e * X**x * Z**z whose bit masks x and z and phase e are plain Python integers,
+so that a gate costs O(n) integer operations.
+
+A stabilizer state is determined by its generators only up to a global phase.
+To produce the exact statevector that the sympy engines would produce, one basis
+state s of the support is followed along the circuit together with its exact
+amplitude w**k / sqrt(2)**m, w = exp(i*pi/4). All the amplitudes of the final
+state are then deduced from the stabilizer group relatively to this one.
+"""
+
+import numpy as np
+
+from .cyclotomic import CyclotomicArray
+from .simulatortools import pi_fraction, ugate_parameters
+
+
+def ugate_clifford_sequence(parameters):
+    """Decompose a u gate into 'h', 's' and 'x' gates, if it is a Clifford gate.
+
+    U(theta, phi, lambda) == S**(2*phi/pi) * (X*H)**(2*theta/pi) * S**(2*lambda/pi)
+    exactly, including the global phase, when the three angles are multiples of pi/2.
+
+    Args:
+        parameters (list): the parameters carried by the u1, u2 or u3 gate
+
+    Returns:
+        list[str] or None: the gates, in the order they are applied, or None if
+            the gate is not a Clifford gate
+    """
+    theta, phi, lamb = [pi_fraction(param, 2) for param in ugate_parameters(parameters)]
+    if theta is None or phi is None or lamb is None:
+        return None
+    # S has order 4 and X*H, a rotation of pi/2 around Y, has order 8.
+    return ['s'] * (lamb % 4) + ['h', 'x'] * (theta % 8) + ['s'] * (phi % 4)
+
+
+def is_clifford_circuit(circuit):
+    """Tell whether all the gates of an experiment are Clifford gates.
+
+    Args:
+        circuit (QobjExperiment): Qobj experiment
+
+    Returns:
+        bool: True if the experiment only contains cx, id, barrier, and u gates
+            for which `ugate_clifford_sequence` succeeds
+    """
+    for operation in circuit.instructions:
+        if getattr(operation, 'conditional', None):
+            return False
+        if operation.name in ('U', 'u1', 'u2', 'u3'):
+            try:
+                if ugate_clifford_sequence(getattr(operation, 'params', None)) is None:
+                    return False
+            except (TypeError, ValueError):
+                return False
+        elif operation.name not in ('CX', 'cx', 'id', 'barrier'):
+            return False
+    return True
+
+
+def _multiply(pauli1, pauli2):
+    """Multiply two Pauli operators given as (x, z, e) for i**e * X**x * Z**z."""
+    x1, z1, e1 = pauli1
+    x2, z2, e2 = pauli2
+    # Z**z1 * X**x2 == (-1)**(z1.x2) * X**x2 * Z**z1
+    return x1 ^ x2, z1 ^ z2, (e1 + e2 + 2 * bin(z1 & x2).count('1')) % 4
+
+
+class StabilizerState:
+    """A stabilizer state, with the exact amplitude of one basis state."""
+
+    def __init__(self, number_of_qubits):
+        """Create the state |0...0>.
+
+        Args:
+            number_of_qubits (int): the number of qubits
+        """
+        self.number_of_qubits = number_of_qubits
+        # Z_j stabilizes |0...0> for every qubit j.
+        self.generators = [(0, 1 << qubit, 0) for qubit in range(number_of_qubits)]
+        # the amplitude of |basis_state> is w**phase / sqrt(2)**sqrt2_power
+        self.basis_state = 0
+        self.phase = 0
+        self.sqrt2_power = 0
+
+    def apply_ugate(self, parameters, qubit):
+        """Apply a Clifford u gate.
+
+        Args:
+            parameters (list): the parameters carried by the u1, u2 or u3 gate
+            qubit (int): the qubit to apply the gate on
+        """
+        for name in ugate_clifford_sequence(parameters):
+            getattr(self, name)(qubit)
+
+    def s(self, qubit):
+        """Apply the phase gate S = diag(1, i)."""
+        # S X S^dagger == i*X*Z
+        self.generators = [(x, z ^ (x & (1 << qubit)), (e + ((x >> qubit) & 1)) % 4)
+                           for x, z, e in self.generators]
+        self.phase = (self.phase + 2 * ((self.basis_state >> qubit) & 1)) % 8
+
+    def x(self, qubit):
+        """Apply the Pauli X gate."""
+        # X Z X == -Z
+        self.generators = [(x, z, (e + 2 * ((z >> qubit) & 1)) % 4)
+                           for x, z, e in self.generators]
+        self.basis_state ^= 1 << qubit
+
+    def cx(self, control, target):
+        """Apply the cx gate."""
+        # X_c -> X_c X_t and Z_t -> Z_c Z_t, without phase in the X**x Z**z form
+        self.generators = [(x ^ (((x >> control) & 1) << target),
+                            z ^ (((z >> target) & 1) << control), e)
+                           for x, z, e in self.generators]
+        if (self.basis_state >> control) & 1:
+            self.basis_state ^= 1 << target
+
+    def h(self, qubit):
+        """Apply the Hadamard gate."""
+        other = self.basis_state ^ (1 << qubit)
+        ratio = self._amplitude_ratio(other)
+
+        generators = []
+        for x, z, e in self.generators:
+            x_bit = (x >> qubit) & 1
+            z_bit = (z >> qubit) & 1
+            # H X**a Z**b H == (-1)**(a*b) X**b Z**a
+            x = x & ~(1 << qubit) | (z_bit << qubit)
+            z = z & ~(1 << qubit) | (x_bit << qubit)
+            generators.append((x, z, (e + 2 * x_bit * z_bit) % 4))
+        self.generators = generators
+
+        # (H psi)(t) == (psi(t with bit 0) + (-1)**t_q * psi(t with bit 1)) / sqrt(2),
+        # written relatively to psi(s) for t = s and t = other.
+        if (self.basis_state >> qubit) & 1:
+            candidates = [(self.basis_state, _hadamard_factor(ratio, -1), 4),
+                          (other, _hadamard_factor(ratio, 1), 0)]
+        else:
+            candidates = [(self.basis_state, _hadamard_factor(ratio, 1), 0),
+                          (other, _hadamard_factor(ratio, -1), 0)]
+        for basis_state, factor, extra_phase in candidates:
+            if factor is not None:
+                self.basis_state = basis_state
+                self.phase = (self.phase + factor[0] + extra_phase) % 8
+                self.sqrt2_power += factor[1]
+                break
+
+    def _pivots(self):
+        """Return generators of the stabilizer group in echelon form for the X part.
+
+        Returns:
+            list[tuple]: (pivot bit, Pauli operator), every operator having no X on
+                the pivot bits of the previous ones
+        """
+        pivots = []
+        for pauli in self.generators:
+            for bit, pivot in pivots:
+                if (pauli[0] >> bit) & 1:
+                    pauli = _multiply(pauli, pivot)
+            if pauli[0]:
+                pivots.append(((pauli[0] & -pauli[0]).bit_length() - 1, pauli))
+        return pivots
+
+    def _amplitude_ratio(self, basis_state):
+        """Return psi(basis_state) / psi(self.basis_state), as a power of i.
+
+        Args:
+            basis_state (int): any basis state
+
+        Returns:
+            int or None: p such that the ratio is i**p, or None if the ratio is 0
+        """
+        target = basis_state ^ self.basis_state
+        element = (0, 0, 0)
+        for bit, pivot in self._pivots():
+            if (target >> bit) & 1:
+                target ^= pivot[0]
+                element = _multiply(element, pivot)
+        if target:
+            return None
+        # P |s> == i**e * (-1)**(z.s) |s + x> and P psi == psi
+        return (element[2] + 2 * bin(element[1] & self.basis_state).count('1')) % 4
+
+    def _support(self):
+        """Yield the basis states of the support with the phases of their amplitudes.
+
+        Yields:
+            tuple: (basis state, k), the amplitude being w**k / sqrt(2)**sqrt2_power
+        """
+        pivots = [pivot for _, pivot in self._pivots()]
+        element = (0, 0, 0)
+        # Gray code over the subsets of the pivots: every element of the group with
+        # a non-trivial X part is met once.
+        for step in range(2 ** len(pivots)):
+            if step:
+                element = _multiply(element, pivots[(step & -step).bit_length() - 1])
+            x, z, e = element
+            yield self.basis_state ^ x, \
+                (self.phase + 2 * (e + 2 * bin(z & self.basis_state).count('1'))) % 8
+
+    def to_cyclotomic(self):
+        """Return the exact statevector.
+
+        Returns:
+            CyclotomicArray: the 2**n amplitudes
+        """
+        coefficients = np.zeros((2 ** self.number_of_qubits, 4), dtype=np.int64)
+        for basis_state, power in self._support():
+            coefficients[basis_state, power % 4] = -1 if power >= 4 else 1
+        return CyclotomicArray(coefficients, self.sqrt2_power)
+
+    def nonzero_amplitudes(self):
+        """Return the exact nonzero amplitudes, without building the 2**n of them.
+
+        Returns:
+            dict: the sympy amplitudes by basis state index
+        """
+        # the amplitudes only take the 8 values w**k / sqrt(2)**sqrt2_power
+        coefficients = np.zeros((8, 4), dtype=np.int64)
+        for power in range(8):
+            coefficients[power, power % 4] = -1 if power >= 4 else 1
+        values = CyclotomicArray(coefficients, self.sqrt2_power).to_sympy()
+        return {basis_state: values[power] for basis_state, power in self._support()}
+
+
+def _hadamard_factor(ratio, sign):
+    """Return (1 + sign*i**ratio) / sqrt(2) as w**k / sqrt(2)**m.
+
+    Args:
+        ratio (int or None): the power of i, or None for 0
+        sign (int): 1 or -1
+
+    Returns:
+        tuple or None: (k, m), or None if the factor is 0
+    """
+    if ratio is None:
+        return 0, 1
+    power = (ratio + (0 if sign == 1 else 2)) % 4
+    return {0: (0, -1), 1: (1, 0), 2: None, 3: (7, 0)}[power]
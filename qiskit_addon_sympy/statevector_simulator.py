@@ -37,89 +37,169 @@ can be further simplified.
 4. Memory error may occur if there are many qubits in the system.
 This is due to the limit of classical computers and show the advantage of the quantum hardware.
 
+Engines (selected with the `engine` key of the qobj or experiment config):
+* 'auto' (default): 'stabilizer' for Clifford circuits, 'cyclotomic' for
+  Clifford+T circuits, 'dense' otherwise.
+* 'stabilizer': tableau simulation with exact amplitudes, only for Clifford
+  circuits, see the `stabilizer` module. Only the nonzero amplitudes are
+  built, so with `sparse_output` its cost does not grow as 2^n.
+* 'cyclotomic': exact integer arithmetic, only for Clifford+T circuits, see
+  the `cyclotomic` module.
+* 'dense': keeps a flat list of the 2^n exact amplitudes and applies
+  every gate as a local update over the amplitude pairs (or quads) it acts on.
+* 'sparse': like 'dense', but keeps only the nonzero amplitudes in a dict
+  indexed by basis state, for circuits (e.g. reversible ones) whose states
+  have few nonzero amplitudes.
+* 'ket': the reference engine, applies sympy.physics.quantum gates to a Qubit
+  ket expression with qapply.
+
+With the `sparse_output` config key set, the result data holds
+'sparse_statevector', the sorted list of (index, amplitude) pairs of the nonzero
+amplitudes, instead of 'statevector'.
+
+With the `probabilities` config key set, the result data also holds
+'probabilities', the exact probabilities of the 2**n basis states, and with the
+`marginal_qubits` key set to a list of qubits, 'marginal_probabilities', the
+exact distribution of the outcomes of these qubits, whose bit j is the value of
+the j-th qubit of the list, see the `measurement` module. The `omit_statevector`
+key drops the statevector from the result, e.g. to keep only a small marginal of
+a large state.
+
+The 'dense' and 'sparse' engines only expand the amplitudes, unless the
+`simplification` config key selects a policy of `SimplificationPolicy` to simplify
+them as the simulation goes, with the simplifier set by the `simplifier` key.
+With the `intern` config key set, they share equal amplitudes and compute each
+linear combination of them once per gate, see `ExpressionInterner`; this saves
+time on symmetric circuits, but its tables may raise the peak memory.
+
+With the `instrument` config key set, the result data holds 'instrumentation',
+one row per instruction with its wall time, the total count_ops of the state after
+it (0 for the integer engines) and, if the `instrument_memory` key is also set,
+the peak traced memory (0 otherwise, as tracing slows the simulation down), see
+`GateInstrumentation`, and 'ugate_cache', the hits and misses of the cache of u
+gates during the simulation, see `GateInstrumentation.cache_counters`.
+
+With the `fusion` config key set, the 'dense', 'sparse' and 'ket' engines first fuse the
+runs of u gates on a qubit into single gates, see `fuse_single_qubit_gates`.
+
+The parameters of the u gates may be sympy expressions with free symbols: the
+statevector is then parametric, see the `parameters` module to bind its
+parameters or to turn it into a numpy function. With the `templates` key of the
+qobj config set, the experiments that only differ in the angles of their u gates
+are simulated once, with symbols for the angles that vary, whose values are
+then bound for every experiment, see `run_templates`.
+
+With the `prefix_sharing` key of the qobj config set, the experiments on the
+'dense' and 'sparse' engines which start with the same instructions simulate
+them once, and continue from a snapshot of the state, see the `prefixes` module:
+at most `max_snapshots` (8 by default) states are kept at once. The results are
+those of separate simulations. It is ignored if `templates` is set.
+
+Before a job is submitted, the memory and time of every experiment are estimated
+(see the `resources` module). An experiment beyond the `max_memory` (bytes) and
+`max_time` (seconds) limits, set in the backend configuration or in the qobj or
+experiment config (there is no limit by default), is rejected. If the `oversize`
+config key is 'downgrade' rather than 'reject' (default), it is moved to the
+'sparse' engine with a sparse result instead, if that fits: the result then holds
+a 'sparse_statevector' and no 'statevector'.
+
+Results are cached across jobs, keyed by a hash of the experiment, its options
+and the versions of this package and sympy, see the `resultcache` module: the
+`result_cache_size` and `result_cache_max_memory` keys of the backend
+configuration bound the number and the total size (within `max_memory`) of the
+results kept in memory, and the `result_cache_dir` key sets a directory where
+they are also stored, up to `result_cache_max_bytes` bytes; backends configured
+differently keep separate caches. The in-memory tier
+belongs to the worker process that runs the job: cross-job reuse needs the
+thread executor of `SympyProvider` or `result_cache_dir`. The `result_cache`
+key of the qobj or experiment config set to False bypasses the cache, as the
+`instrument` key does.
+
+With the `pauli_observables` config key set to a list of Pauli strings, e.g.
+'XIZ' for X on qubit 2 and Z on qubit 0, or of [coefficient, Pauli string]
+pairs, the result data also holds 'expectation_values', the exact expectation
+value of every observable times its coefficient. They are computed from the
+amplitudes with index arithmetic, without building any matrix, see
+`expectation_values`. The statevector is then dropped from the result, unless
+the `omit_statevector` key is explicitly False.
+
+With the `sampling` config key set, the result data also holds 'counts', the
+histogram of `shots` draws (1024 by default) from the exact distribution of the
+outcomes, or of the outcomes of the marginal qubits if `marginal_qubits` is set,
+keyed by bitstrings whose rightmost bit is qubit 0 (or the first marginal
+qubit), see `sample_counts`. The draws are reproducible with the `seed` key;
+without it, the result is not cached.
+
 Warning: it is slow.
 Warning: this simulator computes the final amplitude vector precisely within a single shot.
-Therefore we do not need multiple shots.
+Therefore we do not need multiple shots, unless `sampling` is set.
 """
 
+import copy
 import logging
+import sys
 import uuid
 import time
 import numpy as np
-from sympy import Matrix, pi, I, exp
-from sympy import re, im
-from sympy.physics.quantum.gate import H, X, Y, Z, S, T, CNOT, IdentityGate, OneQubitGate, CGate
-from sympy.physics.quantum.qapply import qapply
-from sympy.physics.quantum.qubit import Qubit
-from sympy.physics.quantum.represent import represent
+from sympy import Integer, Matrix
 
 from qiskit.backends import BaseBackend
-from qiskit.qobj import Result as QobjResult, ExperimentResult
+from qiskit.qobj import Result as QobjResult, ExperimentResult, QobjItem
 from qiskit.result import Result
 
 from . import __version__
-from .simulatortools import compute_ugate_matrix
+from .cyclotomic import CX_MONOMIALS, CyclotomicArray, is_cyclotomic_circuit, ugate_monomials
+from .measurement import (expectation_values, marginal_probabilities, outcome_probabilities,
+                          sample_counts)
+from .parameters import run_templates
+from .prefixes import instruction_key, run_shared_prefixes
+from .resources import fit_engine
+from .resultcache import experiment_key, result_cache
+from .stabilizer import StabilizerState, is_clifford_circuit
+from .simulatortools import (UGATE_CACHE, angle_key, apply_single_qubit_gate,
+                             apply_single_qubit_gate_sparse, apply_two_qubit_gate,
+                             apply_two_qubit_gate_sparse, compute_ugate_matrix,
+                             ExpressionInterner, fuse_single_qubit_gates, GateInstrumentation,
+                             get_option, run_experiments, SimplificationPolicy, ugate_parameters)
 from .sympysimulatorerror import SympySimulatorError
 from .sympyjob import SympyJob
 
 logger = logging.getLogger(__name__)
 
 
-class SDGGate(OneQubitGate):
-    """implements the SDG gate"""
-    gate_name = 'SDG'
-
-    def get_target_matrix(self, format='sympy'):
-        """Return the Matrix that corresponds to the gate.
-
-        Returns:
-            Matrix: the matrix that corresponds to the gate.
-                    Matrix is a type from sympy.
-                    Each entry in it can be in the symbolic form.
-        """
-        # pylint: disable=redefined-builtin,unused-argument
-        return Matrix([[1, 0], [0, -I]])
-
-
-class TDGGate(OneQubitGate):
-    """implements the TDG gate"""
-    gate_name = 'TDG'
-
-    def get_target_matrix(self, format='sympy'):
-        """Return the Matrix that corresponds to the gate.
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        """Return the ket gates, which are imported on first use, see `ketgates`."""
+        if name in ('SDGGate', 'TDGGate', 'UGateGeneric'):
+            from . import ketgates
+            return getattr(ketgates, name)
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+else:
+    from .ketgates import SDGGate, TDGGate, UGateGeneric  # pylint: disable=unused-import
 
-        Returns:
-            Matrix: the matrix that corresponds to the gate
-        """
-        # pylint: disable=redefined-builtin,unused-argument
-        return Matrix([[1, 0], [0, exp(-I*pi/4)]])
 
+class _ResultSlots:
+    """Store the results of a group of experiments at their indices in the qobj."""
 
-class UGateGeneric(OneQubitGate):
-    """implements the general U gate"""
-    _u_mat = None
-    gate_name = 'U'
-
-    def set_target_matrix(self, u_matrix):
-        """this API sets the raw matrix that corresponds to the U gate
-            the client should use this API whenever she creates a UGateGeneric object!
-            Args:
-                u_matrix (Matrix): set the matrix that corresponds to the gate
-        """
-        self._u_mat = u_matrix
+    def __init__(self, indices, results, result_queue):
+        self._indices = indices
+        self._results = results
+        self._result_queue = result_queue
 
-    def get_target_matrix(self, format='sympy'):
-        """return the Matrix that corresponds to the gate
-        Returns:
-            Matrix: the matrix that corresponds to the gate
-        """
-        # pylint: disable=redefined-builtin,unused-argument
-        return self._u_mat
+    def put(self, member, result):
+        """Store the result of the member `member` of the group."""
+        self._results[self._indices[member]] = result
+        if self._result_queue is not None:
+            self._result_queue.put((self._indices[member], result))
 
 
 class SympyStatevectorSimulator(BaseBackend):
     """Sympy implementation of a statevector simulator."""
 
+    ENGINES = ('auto', 'dense', 'sparse', 'ket', 'cyclotomic', 'stabilizer')
+    DEFAULT_ENGINE = 'auto'
+    CX_MATRIX = Matrix([[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0], [0, 1, 0, 0]])
+
     DEFAULT_CONFIGURATION = {
         'name': 'statevector_simulator',
         'url': 'https://github.com/Qiskit/qiskit-addon-sympy',
@@ -127,7 +207,13 @@ class SympyStatevectorSimulator(BaseBackend):
         'local': True,
         'description': 'A sympy-based statevector simulator',
         'coupling_map': 'all-to-all',
-        'basis_gates': 'u1,u2,u3,cx,id'
+        'basis_gates': 'u1,u2,u3,cx,id',
+        'max_memory': None,
+        'max_time': None,
+        'result_cache_size': 128,
+        'result_cache_dir': None,
+        'result_cache_max_bytes': 2 ** 30,
+        'result_cache_max_memory': 2 ** 28
     }
 
     def __init__(self, configuration=None, provider=None):
@@ -142,37 +228,44 @@ class SympyStatevectorSimulator(BaseBackend):
 
         self._number_of_qubits = None
         self._statevector = None
+        self._qobj_config = None
+        self._instrumentation = None
 
-    @staticmethod
-    def _conjugate_square(com):
-        """simpler helper for returning com*conjugate(com), where com is a complex number
-            Args:
-                com (object): a complex number
-            Returns:
-                object: com*conjugate(com)
-        """
-        return im(com)**2 + re(com)**2
+    @property
+    def _result_cache(self):
+        """The cache of the results of this backend in this process, see
+        `resultcache.result_cache`."""
+        return result_cache(self._configuration)
 
-    def run(self, qobj):
+    def run(self, qobj, stream=False, callback=None):
+        # pylint: disable=arguments-differ
         """Run qobj asynchronously.
 
         Args:
             qobj (QObj): QObj structure
+            stream (bool): stream the experiment results, see
+                `SympyJob.experiment_results`
+            callback (callable): if given, called with every experiment result
+                as soon as it is produced
 
         Returns:
             SympyJob: derived from BaseJob
         """
+        qobj = self._validate(qobj)
         job_id = str(uuid.uuid4())
-        sym_job = SympyJob(self, job_id, self._run_job, qobj)
+        sym_job = SympyJob(self, job_id, self._run_validated, qobj, stream=stream,
+                           callback=callback)
         sym_job.submit()
         return sym_job
 
-    def _run_job(self, job_id, qobj):
+    def _run_job(self, job_id, qobj, result_queue=None):
         """Run circuits in qobj and return the result
 
             Args:
                 qobj (Qobj): Qobj structure
                 job_id (str): A job id
+                result_queue (queue.Queue): if given, (index, ExperimentResult) pairs
+                    are put on it as the experiments complete
 
             Returns:
                 qiskit.Result: Result is a class including the information to be returned to users.
@@ -186,11 +279,20 @@ class SympyStatevectorSimulator(BaseBackend):
                         'status': 'DONE'
                         }]
         """
-        self._validate(qobj)
-        result_list = []
+        return self._run_validated(job_id, self._validate(qobj), result_queue)
+
+    def _run_validated(self, job_id, qobj, result_queue=None):
+        """Run circuits in a qobj returned by `_validate`, see `_run_job`."""
+        self._qobj_config = qobj.config
         start = time.time()
-        for circuit in qobj.experiments:
-            result_list.append(self.run_circuit(circuit))
+        if getattr(qobj.config, 'templates', False):
+            result_list = run_templates(self.run_circuit, qobj.experiments, qobj.config,
+                                        result_queue)
+        elif getattr(qobj.config, 'prefix_sharing', False):
+            result_list = self._run_prefixes(qobj.experiments, qobj.config, result_queue)
+        else:
+            result_list = run_experiments(self.run_circuit, qobj.experiments, qobj.config,
+                                          result_queue)
         end = time.time()
 
         # Build a schema-conformant container of the results.
@@ -224,11 +326,375 @@ class SympyStatevectorSimulator(BaseBackend):
         Raises:
             SympySimulatorError: if an error occurred.
         """
+        start = time.time()
+        key = self._cache_key(circuit)
+        if key is not None:
+            cached = self._result_cache.get_or_compute(key, lambda: self._simulate(circuit))
+            data = {name: copy.copy(value) for name, value in cached.items()}
+        else:
+            data = self._simulate(circuit)
+        return self._experiment_result(circuit, data, time.time() - start)
+
+    def _run_prefixes(self, experiments, qobj_config, result_queue=None):
+        """Run the experiments of a qobj like `run_experiments`, simulating once
+        the instruction prefixes shared by the experiments on the 'dense' and
+        'sparse' engines, see `run_shared_prefixes`.
+
+        Args:
+            experiments (list[QobjExperiment]): the experiments to run
+            qobj_config (QobjConfig): the config of the qobj, whose `max_snapshots`
+                key bounds the number of states kept at once (8 by default)
+            result_queue (queue.Queue): if given, every (index, ExperimentResult)
+                pair is also put on it as soon as the experiment completes
+        Returns:
+            list[ExperimentResult]: the results of the experiments
+        """
+        results = [None] * len(experiments)
+        groups = {}
+        for index, circuit in enumerate(experiments):
+            signature = self._prefix_signature(circuit)
+            if signature is None:
+                results[index] = self.run_circuit(circuit)
+                if result_queue is not None:
+                    result_queue.put((index, results[index]))
+            else:
+                groups.setdefault(signature, []).append(index)
+        for indices in groups.values():
+            self._run_prefix_group([experiments[index] for index in indices],
+                                   getattr(qobj_config, 'max_snapshots', 8),
+                                   _ResultSlots(indices, results, result_queue))
+        return results
+
+    def _prefix_signature(self, circuit):
+        """Return what experiments must share to share their prefixes, or None
+        if the experiment runs alone: it is instrumented, cached, or runs on
+        another engine than 'dense' and 'sparse'."""
+        if get_option(circuit, self._qobj_config, 'instrument', False):
+            return None
+        key = self._cache_key(circuit)
+        if key is not None and key in self._result_cache:
+            return None
+        engine = self._select_engine(circuit, self._qobj_config)
+        if engine not in ('dense', 'sparse'):
+            return None
+        config = getattr(circuit, 'config', None)
+        config = repr(sorted(config.as_dict().items())) if config is not None else None
+        return circuit.header.number_of_qubits, engine, config
+
+    def _run_prefix_group(self, circuits, max_snapshots, slots):
+        """Run experiments with the same signature, see `_prefix_signature`,
+        putting their results in `slots`."""
+        self._number_of_qubits = circuits[0].header.number_of_qubits
+        self._instrumentation = None
+        engine = self._select_engine(circuits[0], self._qobj_config)
+        policy, interner = self._sympy_options(circuits[0])
+        instructions = [self._sympy_instructions(circuit) for circuit in circuits]
+        starts = {}
+
+        # The state is the statevector and the policy, which counts the gates.
+        def _start():
+            return self._initial_statevector(engine), copy.copy(policy)
+
+        def _advance(state, member, begin, end):
+            starts.setdefault(member, time.time())
+            self._statevector, member_policy = state
+            self._apply_sympy(instructions[member][begin:end], engine, member_policy, interner)
+            return self._statevector, member_policy
+
+        def _copy(state):
+            return copy.copy(state[0]), copy.copy(state[1])
+
+        def _finish(member, state):
+            circuit = circuits[member]
+            if engine == 'sparse':
+                data = self._output_data(circuit, amplitudes=state[0])
+            else:
+                data = self._output_data(circuit, list_form=state[0])
+            key = self._cache_key(circuit)
+            if key is not None:
+                cached = self._result_cache.get_or_compute(key, lambda: data)
+                data = {name: copy.copy(value) for name, value in cached.items()}
+            slots.put(member, self._experiment_result(circuit, data,
+                                                      time.time() - starts[member]))
+
+        applied = run_shared_prefixes(
+            [[instruction_key(operation) for operation in operations]
+             for operations in instructions],
+            _start, _advance, _copy, _finish, max_snapshots)
+        logger.info('Simulated %d of the %d instructions of %d experiments sharing prefixes.',
+                    applied, sum(len(operations) for operations in instructions),
+                    len(circuits))
+
+    def _cache_key(self, circuit):
+        """Return the key of the result of a circuit in the result cache, or None
+        if the result is not cached."""
+        if not get_option(circuit, self._qobj_config, 'result_cache', True) or \
+                get_option(circuit, self._qobj_config, 'instrument', False):
+            return None
+        if get_option(circuit, self._qobj_config, 'sampling', False) and \
+                get_option(circuit, self._qobj_config, 'seed', None) is None:
+            return None  # the counts are drawn again by every job
+        return experiment_key(circuit, self._qobj_config, self.name())
+
+    @staticmethod
+    def _experiment_result(circuit, data, time_taken):
+        """Return the ExperimentResult of a circuit, from the data of its simulation."""
+        data['time_taken'] = time_taken
+
+        # Build a schema-conformant container of the Experiment results.
+        result = {
+            'data': data,
+            'success': True,
+            'shots': sum(data['counts'].values()) if 'counts' in data else 1,
+            'status': 'DONE',
+            'header': {'name': circuit.header.name}
+        }
+
+        return ExperimentResult(**result)
+
+    def _simulate(self, circuit):
+        """Simulate a circuit.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+        Returns:
+            dict: the data of the result, but 'time_taken'
+        Raises:
+            SympySimulatorError: if an error occurred.
+        """
         self._number_of_qubits = circuit.header.number_of_qubits
-        self._statevector = 0
+        engine = self._select_engine(circuit, self._qobj_config)
+
+        self._instrumentation = None
+        if get_option(circuit, self._qobj_config, 'instrument', False):
+            self._instrumentation = GateInstrumentation(
+                get_option(circuit, self._qobj_config, 'instrument_memory', False))
+        list_form = amplitudes = None
+        try:
+            if engine == 'stabilizer':
+                amplitudes = self._run_stabilizer(circuit)
+            elif engine == 'cyclotomic':
+                try:
+                    list_form = self._run_cyclotomic(circuit)
+                except OverflowError:
+                    logger.info('Circuit %s is too deep for the cyclotomic engine, '
+                                'falling back to the dense engine.', circuit.header.name)
+                    engine = 'dense'
+                    if self._instrumentation is not None:
+                        self._instrumentation.clear()
+            if engine == 'sparse':
+                amplitudes = self._run_sympy(circuit, engine)
+            elif list_form is None and amplitudes is None:
+                list_form = self._run_sympy(circuit, engine)
+        finally:
+            if self._instrumentation is not None:
+                records = self._instrumentation.finish()
+
+        data = {}
+        if self._instrumentation is not None:
+            data['instrumentation'] = records
+            data['ugate_cache'] = self._instrumentation.cache_counters()
+        data.update(self._output_data(circuit, list_form, amplitudes))
+        return data
+
+    def _output_data(self, circuit, list_form=None, amplitudes=None):
+        """Return the data of the result of a circuit from its final state.
 
-        self._statevector = Qubit(*tuple([0]*self._number_of_qubits))
-        for operation in circuit.instructions:
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+            list_form (list): the 2**n amplitudes of the state, or None
+            amplitudes (dict): if `list_form` is None, the nonzero amplitudes by
+                basis state index
+        Returns:
+            dict: the data, with 'statevector' or 'sparse_statevector', unless
+                `omit_statevector` is set, or `pauli_observables` is and
+                `omit_statevector` is not False, and the distributions,
+                expectation values and counts requested
+        Raises:
+            SympySimulatorError: if the marginal qubits or the observables are
+                invalid, or a state with free parameters is sampled
+        """
+        data = {}
+        number_of_qubits = circuit.header.number_of_qubits
+        full = get_option(circuit, self._qobj_config, 'probabilities', False)
+        marginal_qubits = get_option(circuit, self._qobj_config, 'marginal_qubits', None)
+        sampling = get_option(circuit, self._qobj_config, 'sampling', False)
+        observables = get_option(circuit, self._qobj_config, 'pauli_observables', None)
+        omit_statevector = get_option(circuit, self._qobj_config, 'omit_statevector', None)
+        if omit_statevector is None:
+            omit_statevector = observables is not None
+        sparse_output = get_option(circuit, self._qobj_config, 'sparse_output', False)
+        distributions = full or marginal_qubits is not None or sampling
+        if amplitudes is None and (distributions or observables is not None or
+                                   (sparse_output and not omit_statevector)):
+            amplitudes = {index: amplitude for index, amplitude in enumerate(list_form)
+                          if amplitude != 0}
+
+        if distributions:
+            probabilities = outcome_probabilities(amplitudes)
+        if full:
+            data['probabilities'] = np.empty(2 ** number_of_qubits, dtype=object)
+            data['probabilities'][:] = [Integer(0)] * (2 ** number_of_qubits)
+            for index, probability in probabilities.items():
+                data['probabilities'][index] = probability
+        if marginal_qubits is not None:
+            try:
+                data['marginal_probabilities'] = marginal_probabilities(
+                    probabilities, marginal_qubits, number_of_qubits)
+            except ValueError as err:
+                raise SympySimulatorError(str(err))
+        if observables is not None:
+            try:
+                data['expectation_values'] = expectation_values(amplitudes, observables,
+                                                                number_of_qubits)
+            except ValueError as err:
+                raise SympySimulatorError(str(err))
+        if sampling:
+            number_of_bits = number_of_qubits
+            if marginal_qubits is not None:
+                probabilities = dict(enumerate(data['marginal_probabilities']))
+                number_of_bits = len(marginal_qubits)
+            try:
+                data['counts'] = sample_counts(
+                    probabilities, number_of_bits,
+                    get_option(circuit, self._qobj_config, 'shots', 1024),
+                    get_option(circuit, self._qobj_config, 'seed', None))
+            except TypeError:
+                raise SympySimulatorError('In circuit {}: cannot sample a state with free '
+                                          'parameters.'.format(circuit.header.name))
+
+        if not omit_statevector:
+            if sparse_output:
+                data['sparse_statevector'] = [(index, amplitudes[index])
+                                              for index in sorted(amplitudes)]
+            else:
+                if list_form is None:
+                    list_form = [Integer(0)] * (2 ** number_of_qubits)
+                    for index, amplitude in amplitudes.items():
+                        list_form[index] = amplitude
+                data['statevector'] = np.asarray(list_form)
+        return data
+
+    def _select_engine(self, circuit, qobj_config):
+        """Return the engine an experiment runs on, resolving 'auto'.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+            qobj_config (QobjConfig): the config of the qobj
+        Returns:
+            str: the engine, other than 'auto'
+        Raises:
+            SympySimulatorError: if the engine is unknown, or cannot run the circuit
+        """
+        engine = get_option(circuit, qobj_config, 'engine', self.DEFAULT_ENGINE)
+        if engine not in self.ENGINES:
+            raise SympySimulatorError('unknown statevector engine "{}", expected one of '
+                                      '{}'.format(engine, ', '.join(self.ENGINES)))
+        if engine == 'auto':
+            if is_clifford_circuit(circuit):
+                engine = 'stabilizer'
+            elif is_cyclotomic_circuit(circuit):
+                engine = 'cyclotomic'
+            else:
+                engine = 'dense'
+        elif engine == 'cyclotomic' and not is_cyclotomic_circuit(circuit):
+            raise SympySimulatorError('In circuit {}: the cyclotomic engine only supports '
+                                      'Clifford+T circuits.'.format(circuit.header.name))
+        elif engine == 'stabilizer' and not is_clifford_circuit(circuit):
+            raise SympySimulatorError('In circuit {}: the stabilizer engine only supports '
+                                      'Clifford circuits.'.format(circuit.header.name))
+        return engine
+
+    def _run_sympy(self, circuit, engine):
+        """Run a circuit with one of the engines working on sympy expressions.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+            engine (str): 'dense', 'sparse' or 'ket'
+        Returns:
+            list or dict: the 2**n amplitudes of the final state, or for the
+                'sparse' engine, a dict of its nonzero amplitudes by basis state index
+        Raises:
+            SympySimulatorError: if an unsupported operation is seen
+        """
+        self._statevector = self._initial_statevector(engine)
+        policy, interner = self._sympy_options(circuit)
+        self._apply_sympy(self._sympy_instructions(circuit), engine, policy, interner)
+
+        if engine == 'ket':
+            from .ketgates import represent
+            matrix_form = represent(self._statevector)
+            shape_n = matrix_form.shape[0]
+            list_form = [matrix_form[i, 0] for i in range(shape_n)]
+        else:
+            list_form = self._statevector
+
+        return list_form
+
+    def _initial_statevector(self, engine):
+        """Return the state |0...0> in the form used by a sympy engine."""
+        if engine == 'ket':
+            from .ketgates import Qubit
+            return Qubit(*tuple([0]*self._number_of_qubits))
+        if engine == 'sparse':
+            return {0: Integer(1)}
+        statevector = [Integer(0)] * (2 ** self._number_of_qubits)
+        statevector[0] = Integer(1)
+        return statevector
+
+    def _sympy_options(self, circuit):
+        """Return the simplification policy and the interner, or None, of a circuit.
+
+        Returns:
+            tuple(SimplificationPolicy, ExpressionInterner): the policy and the
+                interner, None unless the `intern` option is set
+        Raises:
+            SympySimulatorError: if the policy or the simplifier is unknown
+        """
+        interner = None
+        if get_option(circuit, self._qobj_config, 'intern', False):
+            interner = ExpressionInterner()
+        try:
+            return SimplificationPolicy.from_options(circuit, self._qobj_config), interner
+        except ValueError as err:
+            raise SympySimulatorError(str(err))
+
+    def _sympy_instructions(self, circuit):
+        """Return the instructions of a circuit, fused if the `fusion` option is set.
+
+        Returns:
+            list[QobjInstruction]: the instructions to apply
+        Raises:
+            SympySimulatorError: if the parameters of a u gate are invalid
+        """
+        if not get_option(circuit, self._qobj_config, 'fusion', False):
+            return circuit.instructions
+        try:
+            return fuse_single_qubit_gates(circuit.instructions)
+        except ValueError as err:
+            raise SympySimulatorError(str(err))
+
+    def _apply_sympy(self, instructions, engine, policy, interner):
+        """Apply instructions to `self._statevector` with a sympy engine.
+
+        Args:
+            instructions (list[QobjInstruction]): the instructions
+            engine (str): 'dense', 'sparse' or 'ket'
+            policy (SimplificationPolicy): the simplification policy
+            interner (ExpressionInterner): the interner, or None
+        Raises:
+            SympySimulatorError: if an unsupported operation is seen
+        """
+        if engine == 'ket':
+            from .ketgates import UGateGeneric, qapply  # pylint: disable=redefined-outer-name
+            apply_single = apply_two = None
+        elif engine == 'sparse':
+            apply_single = apply_single_qubit_gate_sparse
+            apply_two = apply_two_qubit_gate_sparse
+        else:
+            apply_single = apply_single_qubit_gate
+            apply_two = apply_two_qubit_gate
+        for operation in instructions:
             if getattr(operation, 'conditional', None):
                 raise SympySimulatorError('conditional operations not supported '
                                           'in statevector simulator')
@@ -240,9 +706,25 @@ class SympyStatevectorSimulator(BaseBackend):
                 qubit = operation.qubits[0]
                 opname = operation.name.upper()
                 opparas = getattr(operation, 'params', None)
-                _sym_op = SympyStatevectorSimulator.get_sym_op(opname, tuple([qubit]), opparas)
-                _applied_statevector = _sym_op * self._statevector
-                self._statevector = qapply(_applied_statevector)
+                if engine == 'ket':
+                    _sym_op = SympyStatevectorSimulator.get_sym_op(opname, tuple([qubit]),
+                                                                   opparas)
+                    _applied_statevector = _sym_op * self._statevector
+                    self._statevector = qapply(_applied_statevector)
+                else:
+                    try:
+                        gate = compute_ugate_matrix(ugate_parameters(opparas))
+                    except ValueError as err:
+                        raise SympySimulatorError(str(err))
+                    apply_single(self._statevector, gate, qubit, interner)
+            elif operation.name == 'fused':
+                qubit = operation.qubits[0]
+                if engine == 'ket':
+                    ugate = UGateGeneric(qubit)
+                    ugate.set_target_matrix(u_matrix=operation.matrix)
+                    self._statevector = qapply(ugate * self._statevector)
+                else:
+                    apply_single(self._statevector, operation.matrix, qubit, interner)
             elif operation.name == 'id':
                 logger.info('Identity gate is ignored by sympy-based statevector simulator.')
             elif operation.name == 'barrier':
@@ -250,30 +732,70 @@ class SympyStatevectorSimulator(BaseBackend):
             elif operation.name in ('CX', 'cx'):
                 qubit0 = operation.qubits[0]
                 qubit1 = operation.qubits[1]
-                opname = operation.name.upper()
-                opparas = getattr(operation, 'params', None)
-                q0q1tuple = tuple([qubit0, qubit1])
-                _sym_op = SympyStatevectorSimulator.get_sym_op(opname, q0q1tuple, opparas)
-                self._statevector = qapply(_sym_op * self._statevector)
+                if engine == 'ket':
+                    opname = operation.name.upper()
+                    opparas = getattr(operation, 'params', None)
+                    q0q1tuple = tuple([qubit0, qubit1])
+                    _sym_op = SympyStatevectorSimulator.get_sym_op(opname, q0q1tuple, opparas)
+                    self._statevector = qapply(_sym_op * self._statevector)
+                else:
+                    apply_two(self._statevector, self.CX_MATRIX, qubit0, qubit1, interner)
             else:
                 backend = self.name
                 err_msg = '{0} encountered unrecognized operation "{1}"'
                 raise SympySimulatorError(err_msg.format(backend, operation.name))
+            if engine != 'ket' and operation.name not in ('id', 'barrier'):
+                policy.after_gate([self._statevector], interner)
+                if interner is not None:
+                    interner.release([self._statevector])
+            if self._instrumentation is not None:
+                if engine == 'ket':
+                    self._instrumentation.record(operation.name, [self._statevector])
+                elif engine == 'sparse':
+                    self._instrumentation.record(operation.name, self._statevector.values())
+                else:
+                    self._instrumentation.record(operation.name, self._statevector)
+
+    def _run_stabilizer(self, circuit):
+        """Run a Clifford circuit on a stabilizer tableau, see `stabilizer`.
 
-        matrix_form = represent(self._statevector)
-        shape_n = matrix_form.shape[0]
-        list_form = [matrix_form[i, 0] for i in range(shape_n)]
+        Args:
+            circuit (QobjExperiment): Qobj experiment, for which
+                `is_clifford_circuit` holds
+        Returns:
+            dict: the nonzero amplitudes of the final state by basis state index
+        """
+        state = StabilizerState(self._number_of_qubits)
+        for operation in circuit.instructions:
+            if operation.name in ('U', 'u1', 'u2', 'u3'):
+                state.apply_ugate(operation.params, operation.qubits[0])
+            elif operation.name in ('CX', 'cx'):
+                state.cx(*operation.qubits)
+            if self._instrumentation is not None:
+                self._instrumentation.record(operation.name)
+        return state.nonzero_amplitudes()
 
-        # Build a schema-conformant container of the Experiment results.
-        result = {
-            'data': {'statevector': np.asarray(list_form)},
-            'success': True,
-            'shots': 1,
-            'status': 'DONE',
-            'header': {'name': circuit.header.name}
-        }
+    def _run_cyclotomic(self, circuit):
+        """Run a Clifford+T circuit with integer arithmetic, see `cyclotomic`.
 
-        return ExperimentResult(**result)
+        Args:
+            circuit (QobjExperiment): Qobj experiment, for which
+                `is_cyclotomic_circuit` holds
+        Returns:
+            ndarray: the 2**n amplitudes of the final state
+        Raises:
+            OverflowError: if the circuit is too deep for int64 coefficients
+        """
+        state = CyclotomicArray.zero_state(self._number_of_qubits)
+        for operation in circuit.instructions:
+            if operation.name in ('U', 'u1', 'u2', 'u3'):
+                monomials, sqrt2_power = ugate_monomials(operation.params)
+                state.apply_gate(monomials, sqrt2_power, operation.qubits)
+            elif operation.name in ('CX', 'cx'):
+                state.apply_gate(CX_MONOMIALS, 0, operation.qubits)
+            if self._instrumentation is not None:
+                self._instrumentation.record(operation.name)
+        return state.to_sympy()
 
     @staticmethod
     def get_sym_op(name, qid_tuple, params=None):
@@ -287,6 +809,9 @@ class SympyStatevectorSimulator(BaseBackend):
         Raises:
             SympySimulatorError: if an unsupported operation is seen
         """
+        # pylint: disable=redefined-outer-name
+        from .ketgates import (H, X, Y, Z, S, T, CNOT, IdentityGate, CGate, SDGGate,
+                               TDGGate)
         the_gate = None
         if name == 'ID':
             the_gate = IdentityGate(*qid_tuple)  # de-tuple means unpacking
@@ -320,32 +845,27 @@ class SympyStatevectorSimulator(BaseBackend):
 
         # U gate, CU gate handled below
         if name.startswith('U') or name.startswith('CU'):
-            parameters = params
-
-            if len(parameters) == 1:  # [theta=0, phi=0, lambda]
-                parameters.insert(0, 0.0)
-                parameters.insert(0, 0.0)
-            elif len(parameters) == 2:  # [theta=pi/2, phi, lambda]
-                parameters.insert(0, pi/2)
-            elif len(parameters) == 3:  # [theta, phi, lambda]
-                pass
-            else:
-                raise SympySimulatorError('U gate must carry 1, 2 or 3 parameters!')
-
-            if name.startswith('U'):
-                ugate = UGateGeneric(*qid_tuple)
-                u_mat = compute_ugate_matrix(parameters)
-                ugate.set_target_matrix(u_matrix=u_mat)
-                return ugate
-
-            elif name.startswith('CU'):  # additional treatment for CU1, CU2, CU3
-                ugate = UGateGeneric(*qid_tuple)
-                u_mat = compute_ugate_matrix(parameters)
-                ugate.set_target_matrix(u_matrix=u_mat)
-                return CGate(qid_tuple[0], ugate)
+            try:
+                parameters = ugate_parameters(params)
+            except ValueError as error:
+                raise SympySimulatorError(str(error))
+            key = ('gate', name[0], tuple(qid_tuple)) + \
+                tuple(angle_key(param) for param in parameters)
+            return UGATE_CACHE.get_or_compute(
+                key, lambda: SympyStatevectorSimulator._build_ugate(name, qid_tuple, parameters))
         # if the control flow comes here,  alarm!
         raise SympySimulatorError('Not supported')
 
+    @staticmethod
+    def _build_ugate(name, qid_tuple, parameters):
+        """Build the ket gate of a U or CU gate, whose parameters are in the u3 form."""
+        from .ketgates import CGate, UGateGeneric  # pylint: disable=redefined-outer-name
+        ugate = UGateGeneric(*qid_tuple)
+        ugate.set_target_matrix(u_matrix=compute_ugate_matrix(parameters))
+        if name.startswith('CU'):  # additional treatment for CU1, CU2, CU3
+            return CGate(qid_tuple[0], ugate)
+        return ugate
+
     # TODO: Remove duplication of _validate between files in statevector_simulator_*.py:
     def _validate(self, qobj):
         """Semantic validations of the qobj which cannot be done via schemas.
@@ -354,12 +874,64 @@ class SympyStatevectorSimulator(BaseBackend):
         Args:
             qobj (Qobj): Qobj structure.
 
+        Returns:
+            Qobj: the qobj to run, `qobj` itself unless an experiment is moved to
+                another engine, see `_check_resources`, in which case a copy holding
+                the moved experiments; `qobj` is never modified
+
         Raises:
-            SympySimulatorError: if unsupported operations passed, these are measure and reset
+            SympySimulatorError: if unsupported operations passed, these are measure and reset,
+                or if an experiment exceeds the resource limits, see `_check_resources`
         """
+        experiments = []
         for circuit in qobj.experiments:
             for operator in circuit.instructions:
                 if operator.name in ('measure', 'reset'):
                     raise SympySimulatorError(
                         "In circuit {}: statevector simulator does not support measure or "
                         "reset.".format(circuit.header.name))
+            experiments.append(self._check_resources(circuit, qobj.config))
+        if all(checked is circuit for checked, circuit in zip(experiments, qobj.experiments)):
+            return qobj
+        qobj = copy.copy(qobj)
+        qobj.experiments = experiments
+        return qobj
+
+    def _check_resources(self, circuit, qobj_config):
+        """Estimate the resources of an experiment, and if it exceeds the limits,
+        move it to the sparse engine, with a sparse result, when the `oversize`
+        option asks for it, see `resources.fit_engine`.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+            qobj_config (QobjConfig): the config of the qobj
+
+        Returns:
+            QobjExperiment: `circuit`, or a copy of it with the engine it is moved to
+                in its config
+
+        Raises:
+            SympySimulatorError: if the experiment exceeds the limits on every engine
+        """
+        try:
+            engine = self._select_engine(circuit, qobj_config)
+        except SympySimulatorError:
+            return circuit  # reported when the experiment runs
+        alternatives = [] if engine == 'sparse' else [('sparse', {'sparse_output': True})]
+        chosen, options, estimate = fit_engine(circuit, qobj_config, self._configuration,
+                                               engine, alternatives)
+        if chosen is None:
+            raise SympySimulatorError(
+                'In circuit {}: the {} engine would need about {} bytes and {:.3g} seconds, '
+                'beyond the limits of the backend.'.format(
+                    circuit.header.name, engine, estimate.memory, estimate.seconds))
+        if chosen == engine:
+            return circuit
+        logger.warning('Circuit %s exceeds the resource limits of the %s engine, '
+                       'running it on the %s engine.', circuit.header.name, engine, chosen)
+        circuit = copy.copy(circuit)
+        circuit.config = copy.copy(getattr(circuit, 'config', None)) or QobjItem()
+        circuit.config.engine = chosen
+        for name, value in options.items():
+            setattr(circuit.config, name, value)
+        return circuit
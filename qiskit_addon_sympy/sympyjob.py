@@ -9,12 +9,16 @@
 
 import functools
 import logging
-import sys
+import multiprocessing
+import threading
 from concurrent import futures
 
 from qiskit.backends import BaseJob, JobError, JobStatus
 from qiskit.qobj import validate_qobj_against_schema
 
+from .executor import default_executor
+from .transport import decode_data, decode_result, run_encoded
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,16 +48,46 @@ class SympyJob(BaseJob):
         _executor (futures.Executor): executor to handle asynchronous jobs
     """
 
-    if sys.platform in ['darwin', 'win32']:
-        _executor = futures.ThreadPoolExecutor()
-    else:
-        _executor = futures.ProcessPoolExecutor()
+    def __init__(self, backend, job_id, fn, qobj, stream=False, callback=None, executor=None):
+        """Create the job.
 
-    def __init__(self, backend, job_id, fn, qobj):
+        Args:
+            backend (BaseBackend): the backend running the job
+            job_id (str): the id of the job
+            fn (callable): called as fn(job_id, qobj) to run the job, or, for a
+                streaming job, as fn(job_id, qobj, queue), putting
+                (index, ExperimentResult) pairs on `queue` as they are produced
+            qobj (Qobj): the qobj to run
+            stream (bool): whether the experiment results are streamed, see
+                `experiment_results`
+            callback (callable): if given, the job is streamed and
+                callback(experiment_result) is called, in a thread of this
+                process, for every experiment result as it is produced
+            executor (futures.Executor): the executor running the job, by
+                default the one of the provider of the backend, or
+                `default_executor()` if it has none
+        """
         super().__init__(backend, job_id)
+        if executor is None:
+            provider = getattr(backend, 'provider', None)
+            if hasattr(provider, 'get_executor'):
+                executor = provider.get_executor()
+            else:
+                executor = default_executor()
+        self._executor = executor
+        # Results from worker processes are encoded for transport, see `transport`.
+        self._encoded = isinstance(executor, futures.ProcessPoolExecutor)
         self._fn = fn
         self._qobj = qobj
         self._future = None
+        self._stream = stream or callback is not None
+        self._callback = callback
+        self._manager = None
+        self._queue = None
+        self._streamed = []
+        self._stream_done = threading.Condition()
+        self._stream_finished = False
+        self._result = None
 
     def submit(self):
         """Submit the job to the backend for execution.
@@ -68,7 +102,85 @@ class SympyJob(BaseJob):
             raise JobError("We have already submitted the job!")
 
         validate_qobj_against_schema(self._qobj)
-        self._future = self._executor.submit(self._fn, self._job_id, self._qobj)
+        if not self._stream:
+            self._future = self._submit(self._job_id, self._qobj)
+            return
+
+        # A manager queue can be passed to process pool workers, and to the
+        # pools they start themselves.
+        self._manager = multiprocessing.Manager()
+        self._queue = self._manager.Queue()
+        self._future = self._submit(self._job_id, self._qobj, self._queue)
+        # The results of the experiments are put before the future completes,
+        # so the end marker comes last.
+        self._future.add_done_callback(lambda _: self._queue.put(None))
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def _submit(self, *args):
+        """Submit self._fn(*args) to the executor, encoding its results if needed."""
+        if self._encoded:
+            return self._executor.submit(run_encoded, self._fn, *args)
+        return self._executor.submit(self._fn, *args)
+
+    def _collect(self):
+        """Receive the streamed experiment results, until the end marker."""
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                _, experiment_result = item
+                if self._encoded and hasattr(experiment_result, 'data'):
+                    decode_data(experiment_result.data)
+                with self._stream_done:
+                    self._streamed.append(experiment_result)
+                    self._stream_done.notify_all()
+                if self._callback is not None:
+                    try:
+                        self._callback(experiment_result)
+                    except Exception:  # pylint: disable=broad-except
+                        logger.exception('Callback of job %s failed.', self._job_id)
+        finally:
+            with self._stream_done:
+                self._stream_finished = True
+                self._stream_done.notify_all()
+            self._manager.shutdown()
+
+    @requires_submit
+    def experiment_results(self, timeout=None):
+        """Iterate over the results of the experiments as they are produced.
+
+        The job must have been created with `stream` or a callback. The results
+        come in the order the experiments complete, which, when they run in
+        parallel, is not the order of the qobj; their headers tell them apart.
+
+        Args:
+            timeout (float): number of seconds to wait for every next result
+
+        Yields:
+            ExperimentResult: the result of an experiment
+
+        Raises:
+            JobError: if the job is not streamed
+            concurrent.futures.TimeoutError: if timeout occurred.
+            Exception: the error the job failed with, once the results produced
+                before it are yielded
+        """
+        if not self._stream:
+            raise JobError('Job not streamed: run it with stream=True or a callback.')
+        index = 0
+        while True:
+            with self._stream_done:
+                if not self._stream_done.wait_for(
+                        lambda: index < len(self._streamed) or self._stream_finished, timeout):
+                    raise futures.TimeoutError()
+                if index == len(self._streamed):
+                    break
+                experiment_result = self._streamed[index]
+            index += 1
+            yield experiment_result
+        # Raise the error of the job, if any.
+        self._future.result()
 
     @requires_submit
     def result(self, timeout=None):
@@ -88,7 +200,13 @@ class SympyJob(BaseJob):
             concurrent.futures.TimeoutError: if timeout occurred.
             concurrent.futures.CancelledError: if job cancelled before completed.
         """
-        return self._future.result(timeout=timeout)
+        result = self._future.result(timeout=timeout)
+        if not self._encoded:
+            return result
+        if self._result is None:
+            # decoded on the first call only, see `transport`
+            self._result = decode_result(result)
+        return self._result
 
     @requires_submit
     def cancel(self):
@@ -7,22 +7,58 @@
 
 """Provider for local Sympy backends."""
 
+import importlib
+import threading
+
 from qiskit.backends import BaseProvider
 from qiskit.backends.providerutils import filter_backends
 
-from .statevector_simulator import SympyStatevectorSimulator
-from .unitary_simulator import SympyUnitarySimulator
+from .executor import EXECUTOR_KINDS, create_executor
+from .sympysimulatorerror import SympySimulatorError
+
+# The backends of the provider: name -> (module, class). Their modules are
+# imported, and the backends created, on first use.
+BACKENDS = {'statevector_simulator': ('.statevector_simulator', 'SympyStatevectorSimulator'),
+            'unitary_simulator': ('.unitary_simulator', 'SympyUnitarySimulator')}
 
 
 class SympyProvider(BaseProvider):
-    """Provider for local Sympy backends."""
+    """Provider for local Sympy backends.
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(args, kwargs)
+    The jobs of its backends run on an executor it owns, created on the first
+    job, see `executor.create_executor` for the options, and released by `shutdown`.
+    Its backends are created when first listed, see `BACKENDS`.
+    """
+
+    def __init__(self, *args, executor=None, max_workers=None, max_tasks_per_child=None,
+                 ugate_cache_size=None, **kwargs):
+        """Create the provider.
 
-        # Populate the list of local Sympy backends.
-        self._backends = [SympyStatevectorSimulator(provider=self),
-                          SympyUnitarySimulator(provider=self)]
+        Args:
+            *args: passed to BaseProvider
+            executor (str): 'process' or 'thread', by default 'process' but on
+                macOS and Windows
+            max_workers (int): the number of workers of the executor
+            max_tasks_per_child (int): the number of jobs after which a worker
+                process is replaced, to release its memory (Python 3.11 or later)
+            ugate_cache_size (int): the maximum number of entries of the cache of
+                u gates, `simulatortools.UGATE_CACHE`, of every worker process (or
+                with threads, of this process), by default 1024
+            **kwargs: passed to BaseProvider
+
+        Raises:
+            SympySimulatorError: if the executor is unknown
+        """
+        super().__init__(args, kwargs)
+        if executor not in (None,) + EXECUTOR_KINDS:
+            raise SympySimulatorError('unknown executor "{}", expected one of {}'.format(
+                executor, ', '.join(EXECUTOR_KINDS)))
+        self._executor_options = {'kind': executor, 'max_workers': max_workers,
+                                  'max_tasks_per_child': max_tasks_per_child,
+                                  'ugate_cache_size': ugate_cache_size}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._backends = {}
 
     def get_backend(self, name=None, **kwargs):
         return super().get_backend(name=name, **kwargs)
@@ -31,8 +67,54 @@ class SympyProvider(BaseProvider):
         # pylint: disable=arguments-differ
         if name:
             kwargs.update({'name': name})
+        names = list(BACKENDS)
+        if set(kwargs) == {'name'} and filters is None:
+            names = [backend_name for backend_name in names if backend_name == kwargs['name']]
+
+        return filter_backends([self._backend(backend_name) for backend_name in names],
+                               filters=filters, **kwargs)
+
+    def _backend(self, name):
+        """Return the backend named `name`, creating it if needed."""
+        if name not in self._backends:
+            module, class_name = BACKENDS[name]
+            backend_class = getattr(importlib.import_module(module, __package__), class_name)
+            self._backends.setdefault(name, backend_class(provider=self))
+        return self._backends[name]
+
+    def get_executor(self):
+        """Return the executor running the jobs of the backends, creating it if needed.
+
+        Returns:
+            futures.Executor: the executor
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = create_executor(**self._executor_options)
+            return self._executor
+
+    def shutdown(self, wait=True):
+        """Shut the executor down. The next job creates a new one.
+
+        Args:
+            wait (bool): whether to wait for the running jobs to complete
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def __getstate__(self):
+        # The backends, and so their provider, are pickled with the jobs sent
+        # to worker processes; the executor stays in this process.
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        del state['_executor_lock']
+        return state
 
-        return filter_backends(self._backends, filters=filters, **kwargs)
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._executor_lock = threading.Lock()
 
     def __str__(self):
         return 'SympyProvider'
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+"""Compact transport of exact results from the worker processes of a job.
+
+Unpickling an array of sympy expressions rebuilds every expression with its
+constructor, which evaluates and canonicalizes it again: for a large unitary,
+that may take as long as the simulation. Instead, the arrays of the results are
+sent as an `EncodedArray`, the table of the distinct subexpressions of all their
+entries, each one given by its class and the positions of its arguments in the
+table, and the array of the positions of the entries. The table is rebuilt
+without evaluation, as the subexpressions are already canonical.
+"""
+
+import copy
+
+import numpy as np
+from sympy import Atom, Basic
+
+
+class EncodedArray:
+    """An array of sympy expressions, or a list of (index, expression) pairs,
+    as a table of subexpressions and the positions of its entries in it."""
+
+    __slots__ = ('table', 'positions', 'shape', 'indices')
+
+    def __init__(self, table, positions, shape, indices=None):
+        """Create an encoded array, see `encode`.
+
+        Args:
+            table (list): the subexpressions, each one an atom or a (class,
+                positions of the arguments) pair, after its arguments
+            positions (ndarray): the positions of the entries in the table
+            shape (tuple): the shape of the array
+            indices (ndarray): the indices of the (index, expression) pairs, or
+                None for an array
+        """
+        self.table = table
+        self.positions = positions
+        self.shape = shape
+        self.indices = indices
+
+    @classmethod
+    def encode(cls, entries, indices=None):
+        """Encode an array of sympy expressions (or of Python numbers).
+
+        Args:
+            entries (ndarray or list): the entries
+            indices (list[int]): if given, the entries are the expressions of
+                (index, expression) pairs, with these indices
+
+        Returns:
+            EncodedArray: the encoded array
+        """
+        entries = np.asarray(entries, dtype=object)
+        positions = {}
+        table = []
+
+        def _key(node):
+            # equal numbers of different types, e.g. 1 and Float(1.0), stay apart
+            return type(node), node
+
+        def _visit(expression):
+            # iterative post-order traversal, as expressions may be deep
+            stack = [(expression, False)]
+            while stack:
+                node, visited = stack.pop()
+                if _key(node) in positions:
+                    continue
+                if not isinstance(node, Basic) or isinstance(node, Atom) or not node.args:
+                    positions[_key(node)] = len(table)
+                    table.append(node)
+                elif visited:
+                    positions[_key(node)] = len(table)
+                    table.append((node.func, tuple(positions[_key(arg)] for arg in node.args)))
+                else:
+                    stack.append((node, True))
+                    stack.extend((arg, False) for arg in node.args
+                                 if _key(arg) not in positions)
+            return positions[_key(expression)]
+
+        encoded = np.fromiter((_visit(entry) for entry in entries.ravel()), dtype=np.int64,
+                              count=entries.size)
+        if indices is not None:
+            indices = np.asarray(indices, dtype=np.int64)
+        return cls(table, encoded, entries.shape, indices)
+
+    def decode(self):
+        """Rebuild the array.
+
+        Returns:
+            ndarray or list: the array of sympy expressions, or the list of
+                (index, expression) pairs
+        """
+        values = []
+        for item in self.table:
+            if isinstance(item, tuple):
+                func, arguments = item
+                arguments = [values[position] for position in arguments]
+                try:
+                    values.append(func(*arguments, evaluate=False))
+                except TypeError:
+                    values.append(func(*arguments))
+            else:
+                values.append(item)
+        entries = np.empty(self.positions.size, dtype=object)
+        for entry, position in enumerate(self.positions):
+            entries[entry] = values[position]
+        if self.indices is not None:
+            return list(zip(self.indices.tolist(), entries))
+        return entries.reshape(self.shape)
+
+
+def encode_data(data):
+    """Encode, in place, the arrays of expressions of the data of an experiment result.
+
+    Args:
+        data (dict): the data of the result
+    """
+    for name, value in list(data.items()):
+        if isinstance(value, EncodedArray):
+            continue
+        if isinstance(value, np.ndarray) and value.dtype == object:
+            data[name] = EncodedArray.encode(value)
+        elif name == 'sparse_statevector':
+            data[name] = EncodedArray.encode([amplitude for _, amplitude in value],
+                                             [index for index, _ in value])
+
+
+def decode_data(data):
+    """Decode, in place, the arrays encoded by `encode_data`.
+
+    Args:
+        data (dict): the data of the result
+    """
+    for name, value in list(data.items()):
+        if isinstance(value, EncodedArray):
+            data[name] = value.decode()
+
+
+def encode_result(result):
+    """Encode the data of every experiment of a result, see `encode_data`.
+
+    Args:
+        result (qiskit.Result): the result of a job, modified in place
+
+    Returns:
+        qiskit.Result: the result
+    """
+    for experiment_result in result.results.values():
+        encode_data(experiment_result.data)
+    return result
+
+
+def decode_result(result):
+    """Decode the data of every experiment of a result, see `decode_data`.
+
+    Args:
+        result (qiskit.Result): the result of a job, modified in place
+
+    Returns:
+        qiskit.Result: the result
+    """
+    for experiment_result in result.results.values():
+        decode_data(experiment_result.data)
+    return result
+
+
+class EncodingQueue:
+    """Stand for the queue of a streamed job in a worker process, to put encoded
+    copies of the experiment results on it, see `encode_data`."""
+
+    def __init__(self, queue):
+        self._queue = queue
+
+    def put(self, item):
+        """Put an (index, ExperimentResult) pair, encoded."""
+        index, experiment_result = item
+        if hasattr(experiment_result, 'data'):
+            experiment_result = copy.copy(experiment_result)
+            experiment_result.data = dict(experiment_result.data)
+            encode_data(experiment_result.data)
+        self._queue.put((index, experiment_result))
+
+
+def run_encoded(function, *args):
+    """Run a job in a worker process, encoding its results, see `encode_result`.
+
+    Args:
+        function (callable): runs the job, called as function(job_id, qobj) or,
+            for a streamed job, as function(job_id, qobj, queue)
+        *args: job_id, qobj and, for a streamed job, the queue, which is wrapped
+            in an `EncodingQueue`
+
+    Returns:
+        qiskit.Result: the encoded result
+    """
+    if len(args) > 2:
+        args = args[:2] + (EncodingQueue(args[2]),)
+    return encode_result(function(*args))
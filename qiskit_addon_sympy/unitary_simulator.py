@@ -20,22 +20,73 @@ Example output:
  [0 0 sqrt(2)/2 sqrt(2)/2]
  [sqrt(2)/2 -sqrt(2)/2 0 0]]
 
+The unitary is accumulated column by column: each gate only updates the
+pairs (or quads) of rows it acts on, so a gate costs O(4^n) operations and
+no 2^n x 2^n operator is built for it.
+
+The `engine` key of the qobj or experiment config selects how entries are stored:
+'dense' for sympy expressions, 'cyclotomic' for exact integer arithmetic on
+Clifford+T circuits (see the `cyclotomic` module), and 'auto' (default) for
+'cyclotomic' whenever the circuit allows it. With the `fusion` config key set,
+the 'dense' engine first fuses the runs of u gates on a qubit, see
+`fuse_single_qubit_gates`. The `simplification` and `simplifier` keys select
+when and how its entries are simplified, see `SimplificationPolicy`. With the
+`intern` key set, equal entries are shared, and so are the results computed from
+them within a gate, see `ExpressionInterner`. With the `instrument` key set,
+the result data holds 'instrumentation', the wall time, the total count_ops of the
+entries and, with the `instrument_memory` key set, the peak traced memory of every
+instruction, see `GateInstrumentation`,
+and 'ugate_cache', the hits and misses of the cache of u gates.
+
+The columns are the statevectors evolved from the basis states, and are
+independent: with the `parallel_columns` key set, the 'dense' engine evolves
+blocks of columns in a pool of at most `max_workers` processes (serially if the
+job runs in a daemonic worker process, see `can_start_processes`).
+
+The parameters of the u gates may be sympy expressions with free symbols: the
+unitary is then parametric, see the `parameters` module to bind its
+parameters or to turn it into a numpy function. With the `templates` key of the
+qobj config set, the experiments that only differ in the angles of their u gates
+are simulated once, with symbols for the angles that vary, whose values are
+then bound for every experiment, see `run_templates`.
+
+Before a job is submitted, the memory and time of every experiment are estimated
+(see the `resources` module). An experiment beyond the `max_memory` (bytes) and
+`max_time` (seconds) limits, set in the backend configuration or in the qobj or
+experiment config (there is no limit by default), is rejected, or moved to the
+'cyclotomic' engine if that fits and the `oversize` config key is 'downgrade'
+rather than 'reject' (default).
+
+Results are cached across jobs, see the `resultcache` module and the
+statevector simulator for the `result_cache*` keys of the backend configuration
+and of the qobj config.
+
 Warning: it is slow.
 """
+import copy
 import logging
+import os
 import uuid
 import time
+from concurrent import futures
+
 import numpy as np
-from sympy import Matrix, pi
+from sympy import Integer, Matrix
 from sympy.matrices import eye, zeros
-from sympy.physics.quantum import TensorProduct
 
 from qiskit.backends import BaseBackend
-from qiskit.qobj import Result as QobjResult, ExperimentResult
+from qiskit.qobj import Result as QobjResult, ExperimentResult, QobjItem
 from qiskit.result import Result
 
 from . import __version__
-from .simulatortools import compute_ugate_matrix, index2
+from .cyclotomic import CX_MONOMIALS, CyclotomicArray, is_cyclotomic_circuit, ugate_monomials
+from .parameters import run_templates
+from .resources import fit_engine
+from .resultcache import experiment_key, result_cache
+from .simulatortools import (apply_single_qubit_gate, apply_two_qubit_gate, can_start_processes,
+                             compute_ugate_matrix, ExpressionInterner, fuse_single_qubit_gates,
+                             GateInstrumentation, get_option, index2, run_experiments,
+                             SimplificationPolicy, ugate_parameters)
 from .sympyjob import SympyJob
 from .sympysimulatorerror import SympySimulatorError
 
@@ -46,6 +97,9 @@ logger = logging.getLogger(__name__)
 class SympyUnitarySimulator(BaseBackend):
     """Sympy implementation of a unitary simulator."""
 
+    ENGINES = ('auto', 'dense', 'cyclotomic')
+    DEFAULT_ENGINE = 'auto'
+
     DEFAULT_CONFIGURATION = {
         'name': 'unitary_simulator',
         'url': 'https://github.com/Qiskit/qiskit-addon-sympy',
@@ -53,7 +107,13 @@ class SympyUnitarySimulator(BaseBackend):
         'local': True,
         'description': 'A sympy simulator for unitary matrix',
         'coupling_map': 'all-to-all',
-        'basis_gates': 'u1,u2,u3,cx,id'
+        'basis_gates': 'u1,u2,u3,cx,id',
+        'max_memory': None,
+        'max_time': None,
+        'result_cache_size': 128,
+        'result_cache_dir': None,
+        'result_cache_max_bytes': 2 ** 30,
+        'result_cache_max_memory': 2 ** 28
     }
 
     def __init__(self, configuration=None, provider=None):
@@ -63,6 +123,15 @@ class SympyUnitarySimulator(BaseBackend):
 
         self._unitary_state = None
         self._number_of_qubits = None
+        self._qobj_config = None
+        self._interner = None
+        self._instrumentation = None
+
+    @property
+    def _result_cache(self):
+        """The cache of the results of this backend in this process, see
+        `resultcache.result_cache`."""
+        return result_cache(self._configuration)
 
     @staticmethod
     def compute_ugate_matrix_wrap(parameters):
@@ -74,14 +143,9 @@ class SympyUnitarySimulator(BaseBackend):
             Returns:
                 Matrix: the matrix that represents the ugate
         """
-        if len(parameters) == 1:  # [theta=0, phi=0, lambda]
-            parameters.insert(0, 0.0)
-            parameters.insert(0, 0.0)
-        elif len(parameters) == 2:  # [theta=pi/2, phi, lambda]
-            parameters.insert(0, pi / 2)
-        elif len(parameters) == 3:  # [theta, phi, lambda]
-            pass
-        else:
+        try:
+            parameters = ugate_parameters(parameters)
+        except ValueError:
             return NotImplemented
 
         u_mat = compute_ugate_matrix(parameters)
@@ -101,6 +165,7 @@ class SympyUnitarySimulator(BaseBackend):
         Returns:
             Matrix: the enlarged matrix that operates on all qubits in the system.
         """
+        from sympy.physics.quantum import TensorProduct
         temp_1 = eye(2**(number_of_qubits-qubit-1))
         temp_2 = eye(2**(qubit))
         enlarge_opt = TensorProduct(temp_1, TensorProduct(opt, temp_2))
@@ -116,8 +181,8 @@ class SympyUnitarySimulator(BaseBackend):
                         Matrix is a type from sympy.
             qubit (int): the id of the qubit being operated on
         """
-        unitaty_add = self.enlarge_single_opt_sympy(gate, qubit, self._number_of_qubits)
-        self._unitary_state = unitaty_add*self._unitary_state  # * means "dot product"
+        for column in self._unitary_state:
+            apply_single_qubit_gate(column, gate, qubit, self._interner)
 
     def enlarge_two_opt_sympy(self, opt, qubit0, qubit1, num):
         """Enlarge two-qubit operator to n qubits.
@@ -156,8 +221,9 @@ class SympyUnitarySimulator(BaseBackend):
 
     def _add_unitary_two(self, gate, qubit0, qubit1):
         """Apply the two-qubit gate
-         It first extends the two-qubit gate to all-qubit gate and then applying it to all qubits.
-         The result stored in self.__unitary_state is a unitary matrix, which looks like this:
+         It updates, in every column, the quads of rows the gate acts on.
+         The result stored in self._unitary_state is the list of the columns of a unitary
+         matrix, which looks like this:
                     Matrix([
                         [sqrt(2)/2,  sqrt(2)/2,         0,          0],
                         [        0,          0, sqrt(2)/2, -sqrt(2)/2],
@@ -168,29 +234,38 @@ class SympyUnitarySimulator(BaseBackend):
             qubit0 (int): id of the control qubit
             qubit1 (int): id of the target qubit
         """
-        unitary_add = self.enlarge_two_opt_sympy(gate, qubit0, qubit1, self._number_of_qubits)
-        self._unitary_state = unitary_add*self._unitary_state
+        for column in self._unitary_state:
+            apply_two_qubit_gate(column, gate, qubit0, qubit1, self._interner)
 
-    def run(self, qobj):
+    def run(self, qobj, stream=False, callback=None):
+        # pylint: disable=arguments-differ
         """Run qobj asynchronously.
 
         Args:
             qobj (QObj): QObj structure
+            stream (bool): stream the experiment results, see
+                `SympyJob.experiment_results`
+            callback (callable): if given, called with every experiment result
+                as soon as it is produced
 
         Returns:
             SympyJob: derived from BaseJob
         """
+        qobj = self._validate(qobj)
         job_id = str(uuid.uuid4())
-        sym_job = SympyJob(self, job_id, self._run_job, qobj)
+        sym_job = SympyJob(self, job_id, self._run_validated, qobj, stream=stream,
+                           callback=callback)
         sym_job.submit()
         return sym_job
 
-    def _run_job(self, job_id, qobj):
+    def _run_job(self, job_id, qobj, result_queue=None):
         """Run qobj
 
         Args:
             qobj (Qobj): Qobj structure
             job_id (str): a id for the job
+            result_queue (queue.Queue): if given, (index, ExperimentResult) pairs are
+                put on it as the experiments complete
 
         Returns:
             qiskit.Result: Result is a class including the information to be returned to users.
@@ -205,10 +280,14 @@ class SympyUnitarySimulator(BaseBackend):
                     ...}
                 ]
         """
-        result_list = []
+        return self._run_validated(job_id, self._validate(qobj), result_queue)
+
+    def _run_validated(self, job_id, qobj, result_queue=None):
+        """Run a qobj returned by `_validate`, see `_run_job`."""
+        self._qobj_config = qobj.config
         start = time.time()
-        for circuit in qobj.experiments:
-            result_list.append(self.run_circuit(circuit))
+        run = run_templates if getattr(qobj.config, 'templates', False) else run_experiments
+        result_list = run(self.run_circuit, qobj.experiments, qobj.config, result_queue)
         end = time.time()
 
         # Build a schema-conformant container of the results.
@@ -244,12 +323,214 @@ class SympyUnitarySimulator(BaseBackend):
         Raises:
             SympySimulatorError: if unsupported operations passed
         """
-        self._number_of_qubits = circuit.header.number_of_qubits
+        start = time.time()
+        if get_option(circuit, self._qobj_config, 'result_cache', True) and \
+                not get_option(circuit, self._qobj_config, 'instrument', False):
+            cached = self._result_cache.get_or_compute(
+                experiment_key(circuit, self._qobj_config, self.name()),
+                lambda: self._simulate(circuit))
+            data = None if cached is None else \
+                {name: copy.copy(value) for name, value in cached.items()}
+        else:
+            data = self._simulate(circuit)
+        if data is None:
+            return {'data': {}, 'status': 'ERROR'}
+        data['time_taken'] = time.time() - start
+
+        # Build a schema-conformant container of the Experiment results.
         result = {
-            'data': {}
+            'data': data,
+            'success': True,
+            'shots': 1,
+            'status': 'DONE',
+            'header': {'name': circuit.header.name}
         }
-        self._unitary_state = eye(2 ** self._number_of_qubits)
-        for operation in circuit.instructions:
+
+        return ExperimentResult(**result)
+
+    def _simulate(self, circuit):
+        """Compute the unitary of a circuit.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+
+        Returns:
+            dict: the data of the result, but 'time_taken', or None if an
+                unrecognized operation is seen
+
+        Raises:
+            SympySimulatorError: if unsupported operations passed
+        """
+        self._number_of_qubits = circuit.header.number_of_qubits
+        engine = self._select_engine(circuit, self._qobj_config)
+
+        self._instrumentation = None
+        if get_option(circuit, self._qobj_config, 'instrument', False):
+            self._instrumentation = GateInstrumentation(
+                get_option(circuit, self._qobj_config, 'instrument_memory', False))
+        unitary = None
+        try:
+            if engine == 'cyclotomic':
+                try:
+                    unitary = self._run_cyclotomic(circuit)
+                except OverflowError:
+                    logger.info('Circuit %s is too deep for the cyclotomic engine, '
+                                'falling back to the dense engine.', circuit.header.name)
+                    if self._instrumentation is not None:
+                        self._instrumentation.clear()
+            if unitary is None:
+                unitary = self._run_sympy(circuit)
+        finally:
+            if self._instrumentation is not None:
+                records = self._instrumentation.finish()
+        if unitary is None:
+            return None
+
+        data = {'unitary': unitary}
+        if self._instrumentation is not None:
+            data['instrumentation'] = records
+            data['ugate_cache'] = self._instrumentation.cache_counters()
+        return data
+
+    def _select_engine(self, circuit, qobj_config):
+        """Return the engine an experiment runs on, resolving 'auto'.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+            qobj_config (QobjConfig): the config of the qobj
+        Returns:
+            str: the engine, other than 'auto'
+        Raises:
+            SympySimulatorError: if the engine is unknown, or cannot run the circuit
+        """
+        engine = get_option(circuit, qobj_config, 'engine', self.DEFAULT_ENGINE)
+        if engine not in self.ENGINES:
+            raise SympySimulatorError('unknown unitary engine "{}", expected one of '
+                                      '{}'.format(engine, ', '.join(self.ENGINES)))
+        if engine == 'auto':
+            engine = 'cyclotomic' if is_cyclotomic_circuit(circuit) else 'dense'
+        elif engine == 'cyclotomic' and not is_cyclotomic_circuit(circuit):
+            raise SympySimulatorError('In circuit {}: the cyclotomic engine only supports '
+                                      'Clifford+T circuits.'.format(circuit.header.name))
+        return engine
+
+    def _validate(self, qobj):
+        """Check that every experiment fits the resource limits, moving it to the
+        cyclotomic engine if that fits instead and the `oversize` option asks for
+        it, see `resources.fit_engine`.
+
+        Args:
+            qobj (Qobj): Qobj structure
+
+        Returns:
+            Qobj: the qobj to run, `qobj` itself unless an experiment is moved to the
+                cyclotomic engine, in which case a copy holding a copy of that
+                experiment; `qobj` is never modified
+
+        Raises:
+            SympySimulatorError: if an experiment exceeds the limits on every engine
+        """
+        experiments = []
+        for circuit in qobj.experiments:
+            experiments.append(circuit)
+            try:
+                engine = self._select_engine(circuit, qobj.config)
+            except SympySimulatorError:
+                continue  # reported when the experiment runs
+            alternatives = []
+            if engine == 'dense' and is_cyclotomic_circuit(circuit):
+                alternatives.append(('cyclotomic', {}))
+            chosen, _, estimate = fit_engine(circuit, qobj.config, self._configuration,
+                                             engine, alternatives, unitary=True)
+            if chosen is None:
+                raise SympySimulatorError(
+                    'In circuit {}: the {} engine would need about {} bytes and {:.3g} '
+                    'seconds, beyond the limits of the backend.'.format(
+                        circuit.header.name, engine, estimate.memory, estimate.seconds))
+            if chosen != engine:
+                logger.warning('Circuit %s exceeds the resource limits of the %s engine, '
+                               'running it on the %s engine.', circuit.header.name, engine,
+                               chosen)
+                circuit = copy.copy(circuit)
+                circuit.config = copy.copy(getattr(circuit, 'config', None)) or QobjItem()
+                circuit.config.engine = chosen
+                experiments[-1] = circuit
+        if all(checked is circuit for checked, circuit in zip(experiments, qobj.experiments)):
+            return qobj
+        qobj = copy.copy(qobj)
+        qobj.experiments = experiments
+        return qobj
+
+    def _run_sympy(self, circuit):
+        """Compute the unitary of a circuit on sympy expressions.
+
+        With the `parallel_columns` option set, the columns are split into
+        blocks evolved in a pool of at most `max_workers` processes (by default,
+        the number of processors), see `_evolve_columns`. Instrumented
+        experiments are always run in this process.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment
+
+        Returns:
+            ndarray: the unitary, or None if an unrecognized operation is seen
+
+        Raises:
+            SympySimulatorError: if unsupported operations passed
+        """
+        dim = 2 ** self._number_of_qubits
+        instructions = circuit.instructions
+        intern = get_option(circuit, self._qobj_config, 'intern', False)
+        try:
+            policy = SimplificationPolicy.from_options(circuit, self._qobj_config)
+            if get_option(circuit, self._qobj_config, 'fusion', False):
+                instructions = fuse_single_qubit_gates(instructions)
+        except ValueError as err:
+            raise SympySimulatorError(str(err))
+
+        blocks = 1
+        if get_option(circuit, self._qobj_config, 'parallel_columns', False) and \
+                self._instrumentation is None and can_start_processes():
+            max_workers = get_option(circuit, self._qobj_config, 'max_workers', None)
+            blocks = min(dim, max_workers or os.cpu_count() or 1)
+        if blocks == 1:
+            columns = self._evolve_columns(instructions, policy, intern, 0, dim)
+        else:
+            bounds = [dim * block // blocks for block in range(blocks + 1)]
+            # the workers get a copy of this backend, without the last state
+            self._unitary_state = self._interner = None
+            with futures.ProcessPoolExecutor(max_workers=blocks) as executor:
+                parts = list(executor.map(
+                    self._evolve_columns, [instructions] * blocks, [policy] * blocks,
+                    [intern] * blocks, bounds[:-1], bounds[1:]))
+            columns = None if None in parts else \
+                [column for part in parts for column in part]
+        if columns is None:
+            return None
+        return np.array(columns).T
+
+    def _evolve_columns(self, instructions, policy, intern, first, last):
+        """Evolve the columns `first` to `last` (excluded) of the identity under
+        the instructions, that is, the statevectors from these basis states.
+
+        Args:
+            instructions (list[QobjInstruction]): the instructions of the experiment
+            policy (SimplificationPolicy): when and how entries are simplified
+            intern (bool): whether equal entries are shared, see `ExpressionInterner`
+            first (int): the index of the first column
+            last (int): the index after the last column
+
+        Returns:
+            list[list]: the columns, or None if an unrecognized operation is seen
+
+        Raises:
+            SympySimulatorError: if unsupported operations passed
+        """
+        dim = 2 ** self._number_of_qubits
+        self._unitary_state = [[Integer(1) if row == col else Integer(0) for row in range(dim)]
+                               for col in range(first, last)]
+        self._interner = ExpressionInterner() if intern else None
+        for operation in instructions:
             if getattr(operation, 'conditional', None):
                 raise SympySimulatorError(
                     'conditional operations not supported in unitary simulator')
@@ -262,6 +543,8 @@ class SympyUnitarySimulator(BaseBackend):
                 qubit = operation.qubits[0]
                 gate = SympyUnitarySimulator.compute_ugate_matrix_wrap(params)
                 self._add_unitary_single(gate, qubit)
+            elif operation.name == 'fused':
+                self._add_unitary_single(operation.matrix, operation.qubits[0])
             elif operation.name == 'id':
                 logger.info('Identity gate is ignored by sympy-based unitary simulator.')
             elif operation.name == 'barrier':
@@ -272,16 +555,38 @@ class SympyUnitarySimulator(BaseBackend):
                 gate = Matrix([[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0], [0, 1, 0, 0]])
                 self._add_unitary_two(gate, qubit0, qubit1)
             else:
-                result['status'] = 'ERROR'
-                return result
+                return None
+            if operation.name not in ('id', 'barrier'):
+                policy.after_gate(self._unitary_state, self._interner)
+                if self._interner is not None:
+                    self._interner.release(self._unitary_state)
+            if self._instrumentation is not None:
+                self._instrumentation.record(
+                    operation.name, (entry for column in self._unitary_state for entry in column))
 
-        # Build a schema-conformant container of the Experiment results.
-        result = {
-            'data': {'unitary': np.array(self._unitary_state)},
-            'success': True,
-            'shots': 1,
-            'status': 'DONE',
-            'header': {'name': circuit.header.name}
-        }
+        return self._unitary_state
 
-        return ExperimentResult(**result)
+    def _run_cyclotomic(self, circuit):
+        """Compute the unitary of a Clifford+T circuit with integer arithmetic,
+        see `cyclotomic`.
+
+        Args:
+            circuit (QobjExperiment): Qobj experiment, for which
+                `is_cyclotomic_circuit` holds
+
+        Returns:
+            ndarray: the unitary
+
+        Raises:
+            OverflowError: if the circuit is too deep for int64 coefficients
+        """
+        unitary = CyclotomicArray.identity(self._number_of_qubits)
+        for operation in circuit.instructions:
+            if operation.name in ('U', 'u1', 'u2', 'u3'):
+                monomials, sqrt2_power = ugate_monomials(operation.params)
+                unitary.apply_gate(monomials, sqrt2_power, operation.qubits)
+            elif operation.name in ('CX', 'cx'):
+                unitary.apply_gate(CX_MONOMIALS, 0, operation.qubits)
+            if self._instrumentation is not None:
+                self._instrumentation.record(operation.name)
+        return unitary.to_sympy()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,redefined-builtin,protected-access
+
+"""Benchmarks of the simulators and of the simulatortools hot paths.
+
+They only run with `make profile`, which collects the methods starting with
+`profile`. Every benchmark is timed once with cold caches (sympy's and
+`UGATE_CACHE`), then `REPEAT` times with warm caches, keeping the best time. The
+result cache is bypassed, so that every run simulates the circuit.
+The results are merged into `<package version>-sympy<sympy version>.json` in the
+directory given by the SYMPY_BENCHMARK_DIR environment variable (by default,
+`benchmark_results` at the root of the repository), so that releases and sympy
+versions can be compared file to file.
+"""
+
+from test.common import QiskitSympyTestCase
+
+import functools
+import json
+import os
+import platform
+import random
+import time
+import unittest
+
+import numpy as np
+import sympy
+from sympy.core.cache import clear_cache
+
+from qiskit import compile, QuantumRegister, QuantumCircuit
+from qiskit_addon_sympy import __version__, SympyProvider
+from qiskit_addon_sympy.simulatortools import (UGATE_CACHE, compute_ugate_matrix, index1,
+                                               index2, regulate)
+
+REPEAT = 3
+MAX_UNITARY_QUBITS = 6
+
+
+def ghz_circuit(number_of_qubits):
+    qr = QuantumRegister(number_of_qubits)
+    qc = QuantumCircuit(qr)
+    qc.h(qr[0])
+    for qubit in range(number_of_qubits - 1):
+        qc.cx(qr[qubit], qr[qubit + 1])
+    return qc
+
+
+def qft_circuit(number_of_qubits):
+    qr = QuantumRegister(number_of_qubits)
+    qc = QuantumCircuit(qr)
+    for target in range(number_of_qubits):
+        qc.h(qr[target])
+        for control in range(target + 1, number_of_qubits):
+            qc.cu1(np.pi / 2 ** (control - target), qr[control], qr[target])
+    return qc
+
+
+def random_clifford_t_circuit(number_of_qubits, depth, seed=0):
+    rng = random.Random(seed)
+    qr = QuantumRegister(number_of_qubits)
+    qc = QuantumCircuit(qr)
+    for _ in range(depth):
+        for qubit in range(number_of_qubits):
+            getattr(qc, rng.choice(['h', 's', 'sdg', 't', 'tdg']))(qr[qubit])
+        control, target = rng.sample(range(number_of_qubits), 2)
+        qc.cx(qr[control], qr[target])
+    return qc
+
+
+def random_u3_cx_circuit(number_of_qubits, depth, seed=0):
+    rng = random.Random(seed)
+    qr = QuantumRegister(number_of_qubits)
+    qc = QuantumCircuit(qr)
+    for _ in range(depth):
+        for qubit in range(number_of_qubits):
+            qc.u3(rng.uniform(0, np.pi), rng.uniform(0, 2 * np.pi), rng.uniform(0, 2 * np.pi),
+                  qr[qubit])
+        control, target = rng.sample(range(number_of_qubits), 2)
+        qc.cx(qr[control], qr[target])
+    return qc
+
+
+class SympyBenchmarks(QiskitSympyTestCase):
+    """Benchmarks, run by `make profile`."""
+
+    results = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if not cls.results:
+            return
+        directory = os.getenv('SYMPY_BENCHMARK_DIR', os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_results'))
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(
+            directory, '{}-sympy{}.json'.format(__version__, sympy.__version__))
+        stored = {'benchmarks': {}}
+        if os.path.exists(filename):
+            with open(filename) as file:
+                stored = json.load(file)
+        stored['qiskit_addon_sympy'] = __version__
+        stored['sympy'] = sympy.__version__
+        stored['python'] = platform.python_version()
+        stored['machine'] = platform.platform()
+        stored['benchmarks'].update(cls.results)
+        with open(filename, 'w') as file:
+            json.dump(stored, file, indent=2, sort_keys=True)
+        cls.results = {}
+
+    def _measure(self, name, function):
+        """Time `function` with cold caches, then with warm caches, and store both."""
+        clear_cache()
+        UGATE_CACHE.clear()
+        start = time.perf_counter()
+        function()
+        cold = time.perf_counter() - start
+        warm = []
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            function()
+            warm.append(time.perf_counter() - start)
+        self.results[name] = {'cold': cold, 'warm': min(warm)}
+        self.log.info('%s: cold %.4fs, warm %.4fs', name, cold, min(warm))
+
+    def _measure_circuit(self, name, circuit, config=None, unitary=True):
+        """Time a circuit on both backends, in this process. The unitary is only
+        computed if `unitary` is set, and up to `MAX_UNITARY_QUBITS` qubits."""
+        number_of_qubits = sum(len(qr) for qr in circuit.get_qregs().values())
+        for backend_name in ('statevector_simulator', 'unitary_simulator'):
+            if backend_name == 'unitary_simulator' and \
+                    (not unitary or number_of_qubits > MAX_UNITARY_QUBITS):
+                continue
+            backend = SympyProvider().get_backend(backend_name)
+            qobj = compile(circuit, backend, config=dict(config or {}, result_cache=False))
+            engine = (config or {}).get('engine', 'auto')
+            self._measure('{}/{}/{}'.format(backend_name, name, engine),
+                          functools.partial(backend._run_job, 'benchmark', qobj))
+
+    def profile_ghz(self):
+        for number_of_qubits in (4, 8, 12):
+            self._measure_circuit('ghz/n{}'.format(number_of_qubits),
+                                  ghz_circuit(number_of_qubits))
+        for number_of_qubits in (4, 6, 8):
+            self._measure_circuit('ghz/n{}'.format(number_of_qubits),
+                                  ghz_circuit(number_of_qubits), {'engine': 'dense'})
+
+    def profile_qft(self):
+        for number_of_qubits in (2, 3, 4):
+            self._measure_circuit('qft/n{}'.format(number_of_qubits),
+                                  qft_circuit(number_of_qubits))
+
+    def profile_random_clifford_t(self):
+        for number_of_qubits in (3, 5):
+            for depth in (10, 20):
+                circuit = random_clifford_t_circuit(number_of_qubits, depth)
+                name = 'clifford_t/n{}/d{}'.format(number_of_qubits, depth)
+                self._measure_circuit(name, circuit)
+                if number_of_qubits == 3:
+                    self._measure_circuit(name, circuit, {'engine': 'dense'})
+
+    def profile_random_u3_cx(self):
+        # Generic angles make the expressions grow fast: the unitary of 3 qubits
+        # at depth 4 alone takes minutes.
+        for number_of_qubits, depth in ((2, 2), (2, 4), (3, 2), (3, 4)):
+            self._measure_circuit('u3_cx/n{}/d{}'.format(number_of_qubits, depth),
+                                  random_u3_cx_circuit(number_of_qubits, depth),
+                                  unitary=number_of_qubits * depth <= 8)
+
+    def profile_index(self):
+        def _index1():
+            for k in range(1 << 14):
+                index1(1, 5, k)
+
+        def _index2():
+            for k in range(1 << 14):
+                index2(1, 3, 0, 9, k)
+
+        self._measure('simulatortools/index1', _index1)
+        self._measure('simulatortools/index2', _index2)
+
+    def profile_regulate(self):
+        angles = [np.pi * k / 8 for k in range(-16, 17)] + [0.1 * k for k in range(1, 33)]
+
+        def _regulate():
+            for angle in angles:
+                regulate(angle)
+
+        self._measure('simulatortools/regulate', _regulate)
+
+    def profile_compute_ugate_matrix(self):
+        parameters = [[np.pi * k / 4, 0.1 * k, 0.3] for k in range(16)]
+
+        def _compute():
+            for params in parameters:
+                compute_ugate_matrix(params)
+
+        self._measure('simulatortools/compute_ugate_matrix', _compute)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring
+
+from test.common import QiskitSympyTestCase
+
+import itertools
+import unittest
+
+import numpy as np
+from sympy import I, N, sqrt
+
+from qiskit.qobj import QobjExperiment, QobjInstruction
+from qiskit_addon_sympy.cyclotomic import (CyclotomicArray, is_cyclotomic_circuit,
+                                           ugate_monomials)
+from qiskit_addon_sympy.simulatortools import compute_ugate_matrix
+
+
+class CyclotomicTest(QiskitSympyTestCase):
+    """Test the integer representation of Clifford+T amplitudes."""
+
+    def test_ugate_monomials(self):
+        """Test the monomial form of every Clifford+T u gate against its matrix."""
+        for theta, phi, lamb in itertools.product(range(-8, 9, 2), range(0, 8), range(-3, 5)):
+            params = [theta * np.pi / 4, phi * np.pi / 4, lamb * np.pi / 4]
+            monomials, sqrt2_power = ugate_monomials(params)
+            gate = CyclotomicArray(np.array([[[1, 0, 0, 0], [0, 0, 0, 0]],
+                                             [[0, 0, 0, 0], [1, 0, 0, 0]]], dtype=np.int64))
+            gate.apply_gate(monomials, sqrt2_power, [0])
+            actual = gate.to_sympy()
+            expected = compute_ugate_matrix(params)
+            for row, col in itertools.product(range(2), repeat=2):
+                self.assertAlmostEqual(complex(N(actual[row][col])),
+                                       complex(N(expected[row, col])))
+
+    def test_not_clifford_t(self):
+        self.assertIsNone(ugate_monomials([np.pi / 4, 0, 0]))
+        self.assertIsNone(ugate_monomials([0.3]))
+        self.assertIsNotNone(ugate_monomials([-np.pi / 2]))
+
+    def test_is_cyclotomic_circuit(self):
+        clifford_t = QobjExperiment(instructions=[
+            QobjInstruction(name='u2', qubits=[0], params=[0.0, np.pi]),
+            QobjInstruction(name='u1', qubits=[1], params=[-np.pi / 4]),
+            QobjInstruction(name='cx', qubits=[0, 1])])
+        rotation = QobjExperiment(instructions=[
+            QobjInstruction(name='u3', qubits=[0], params=[0.1, 0.0, 0.0])])
+        self.assertTrue(is_cyclotomic_circuit(clifford_t))
+        self.assertFalse(is_cyclotomic_circuit(rotation))
+
+    def test_reduction(self):
+        """Two Hadamard gates give back |0> with no leftover power of sqrt(2)."""
+        state = CyclotomicArray.zero_state(1)
+        monomials, sqrt2_power = ugate_monomials([0.0, np.pi])
+        state.apply_gate(monomials, sqrt2_power, [0])
+        self.assertEqual(list(state.to_sympy()), [sqrt(2)/2, sqrt(2)/2])
+        state.apply_gate(monomials, sqrt2_power, [0])
+        self.assertEqual(state.sqrt2_power, 0)
+        self.assertEqual(list(state.to_sympy()), [1, 0])
+
+    def test_phase(self):
+        """exp(i*pi/4) is converted to its radical form."""
+        state = CyclotomicArray.zero_state(1)
+        state.apply_gate(*ugate_monomials([np.pi, 0.0, np.pi]), qubits=[0])
+        state.apply_gate(*ugate_monomials([np.pi / 4]), qubits=[0])
+        self.assertEqual(list(state.to_sympy()), [0, sqrt(2)/2 + sqrt(2)*I/2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,redefined-builtin
+
+from test.common import QiskitSympyTestCase
+
+import itertools
+import unittest
+from unittest import mock
+
+import numpy as np
+from sympy import I, Matrix, Rational, Symbol, exp, kronecker_product, pi, simplify, sqrt
+
+from qiskit import compile, execute, QuantumRegister, QuantumCircuit
+from qiskit_addon_sympy import SympyProvider
+from qiskit_addon_sympy.measurement import (expectation_values, marginal_probabilities,
+                                            outcome_probabilities, sample_counts)
+from qiskit_addon_sympy.parameters import assign_symbols
+from qiskit_addon_sympy.sympysimulatorerror import SympySimulatorError
+
+
+class MeasurementTest(QiskitSympyTestCase):
+    """Test the exact outcome distributions."""
+
+    def test_marginal_probabilities(self):
+        """Test marginals summed over the bits of the basis state indices."""
+        probabilities = {0: Rational(1, 8), 3: Rational(1, 4), 5: Rational(1, 8),
+                         6: Rational(1, 2)}
+        self.assertEqual(list(marginal_probabilities(probabilities, [0], 3)),
+                         [Rational(5, 8), Rational(3, 8)])
+        self.assertEqual(list(marginal_probabilities(probabilities, [2, 0], 3)),
+                         [Rational(1, 8), Rational(1, 2), Rational(1, 4), Rational(1, 8)])
+        self.assertEqual(list(marginal_probabilities(probabilities, [], 3)), [1])
+        for qubits in ([0, 0], [3]):
+            self.assertRaises(ValueError, marginal_probabilities, probabilities, qubits, 3)
+        self.assertEqual(outcome_probabilities({1: Rational(1, 2) * (1 + 1j)}),
+                         {1: Rational(1, 2)})
+
+    def test_statevector_probabilities(self):
+        """Test the probabilities and marginals returned by the statevector backend."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.u3(0.3, 0.2, 0.1, qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.h(qr[2])
+        qc.t(qr[2])
+        qc.h(qr[2])
+        backend = SympyProvider().get_backend('statevector_simulator')
+        for engine in ('dense', 'sparse', 'cyclotomic'):
+            if engine == 'cyclotomic':
+                qc.data.pop(0)
+            data = execute(qc, backend, config={
+                'engine': engine, 'probabilities': True, 'marginal_qubits': [2, 0],
+                'omit_statevector': True}).result().get_data(qc)
+            self.assertNotIn('statevector', data)
+            statevector = execute(qc, backend,
+                                  config={'engine': engine}).result().get_statevector(qc)
+            for amplitude, probability in zip(statevector, data['probabilities']):
+                self.assertAlmostEqual(complex(probability), abs(complex(amplitude)) ** 2)
+            self.assertEqual(len(data['marginal_probabilities']), 4)
+            for outcome, probability in enumerate(data['marginal_probabilities']):
+                self.assertAlmostEqual(complex(probability), sum(
+                    complex(data['probabilities'][index]) for index in range(8)
+                    if (index >> 2) & 1 == outcome & 1 and index & 1 == outcome >> 1))
+
+    def test_large_marginal(self):
+        """Test a 2-qubit marginal of a state on more qubits than a dense vector allows."""
+        qr = QuantumRegister(24)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        for qubit in range(23):
+            qc.cx(qr[qubit], qr[qubit + 1])
+        backend = SympyProvider().get_backend('statevector_simulator')
+        config = {'engine': 'sparse', 'marginal_qubits': [0, 23], 'omit_statevector': True}
+        data = execute(qc, backend, config=config).result().get_data(qc)
+        self.assertEqual(list(data['marginal_probabilities']),
+                         [Rational(1, 2), 0, 0, Rational(1, 2)])
+        job = execute(qc, backend, config={'engine': 'sparse', 'marginal_qubits': [24],
+                                           'omit_statevector': True})
+        self.assertRaises(SympySimulatorError, job.result)
+
+    def test_sample_counts(self):
+        """Test that the shots are reproducible, and drawn at once."""
+        probabilities = {0: Rational(1, 4), 3: Rational(1, 2) + sqrt(2) / 8,
+                         5: Rational(1, 4) - sqrt(2) / 8}
+        counts = sample_counts(probabilities, 3, 1000, seed=42)
+        self.assertEqual(counts, sample_counts(probabilities, 3, 1000, seed=42))
+        self.assertEqual(sum(counts.values()), 1000)
+        self.assertTrue(set(counts) <= {'000', '011', '101'})
+        self.assertAlmostEqual(counts['011'] / 1000, 0.677, delta=0.05)
+
+        generators = []
+        random_state = np.random.RandomState
+
+        def _random_state(seed):
+            generators.append(mock.Mock(wraps=random_state(seed)))
+            return generators[-1]
+
+        with mock.patch('numpy.random.RandomState', side_effect=_random_state):
+            counts = sample_counts(probabilities, 3, 10 ** 6, seed=1)
+        self.assertEqual(len(generators), 1)
+        generators[0].multinomial.assert_called_once()
+        self.assertEqual(generators[0].multinomial.call_args[0][0], 10 ** 6)
+        self.assertEqual(sum(counts.values()), 10 ** 6)
+        self.assertRaises(TypeError, sample_counts, {0: Symbol('p')}, 1, 10)
+
+    def test_statevector_sampling(self):
+        """Test the counts returned by the statevector backend."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.cx(qr[0], qr[2])
+        backend = SympyProvider().get_backend('statevector_simulator')
+        config = {'sampling': True}
+        counts = execute(qc, backend, config=config, shots=2000, seed=7).result().get_counts(qc)
+        self.assertEqual(counts, execute(qc, backend, config=config, shots=2000,
+                                         seed=7).result().get_counts(qc))
+        self.assertEqual(set(counts), {'000', '101'})
+        self.assertEqual(sum(counts.values()), 2000)
+
+        config['marginal_qubits'] = [2]
+        result = execute(qc, backend, config=config, shots=100).result()
+        self.assertEqual(set(result.get_counts(qc)), {'0', '1'})
+        self.assertEqual(result.results[qc.name].data['counts'], result.get_counts(qc))
+
+        qc.u3(0.123456, 0, 0, qr[1])
+        qobj = assign_symbols(compile(qc, backend, config={'sampling': True}),
+                              {0.123456: Symbol('theta')})
+        self.assertRaises(SympySimulatorError, backend.run(qobj).result)
+
+    def test_pauli_expectation(self):
+        """Test the expectation values of every Pauli string against their matrices."""
+        paulis = {'I': Matrix([[1, 0], [0, 1]]), 'X': Matrix([[0, 1], [1, 0]]),
+                  'Y': Matrix([[0, -I], [I, 0]]), 'Z': Matrix([[1, 0], [0, -1]])}
+        amplitudes = [sqrt(2) / 4, 0, I / 4, exp(I * pi / 4) / 2, 0, -Rational(1, 4),
+                      Rational(1, 2), sqrt(2) * I / 4]
+        state = Matrix(amplitudes)
+        nonzero = {index: amplitude for index, amplitude in enumerate(amplitudes) if amplitude}
+        for pauli in itertools.product('IXYZ', repeat=3):
+            matrix = kronecker_product(*[paulis[factor] for factor in pauli])
+            value = expectation_values(nonzero, [''.join(pauli)], 3)[0]
+            self.assertAlmostEqual(complex(value - (state.H * matrix * state)[0]), 0)
+
+        bell = {0: sqrt(2) / 2, 3: sqrt(2) / 2}
+        self.assertEqual(list(expectation_values(bell, ['XX', 'YY', ['1/2', 'ZZ'], (3, 'XZ')], 2)),
+                         [1, -1, Rational(1, 2), 0])
+        for observable in ('ZZZ', 'ZA', 5, ('ZZ',)):
+            self.assertRaises(ValueError, expectation_values, bell, [observable], 2)
+
+    def test_statevector_expectation_values(self):
+        """Test the expectation values returned by the statevector backend."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.t(qr[1])
+        qc.h(qr[2])
+        backend = SympyProvider().get_backend('statevector_simulator')
+        for engine in ('dense', 'sparse', 'cyclotomic'):
+            config = {'engine': engine,
+                      'pauli_observables': ['IZZ', 'XII', [2, 'IXX'], ['1/2', 'IYX']]}
+            data = execute(qc, backend, config=config).result().get_data(qc)
+            self.assertEqual(sorted(data), ['expectation_values', 'time_taken'])
+            values = [simplify(value) for value in data['expectation_values']]
+            self.assertEqual(values, [1, 1, sqrt(2), sqrt(2) / 4])
+        data = execute(qc, backend, config={'pauli_observables': ['ZZZ'],
+                                            'omit_statevector': False}).result().get_data(qc)
+        self.assertEqual(sorted(data), ['expectation_values', 'statevector', 'time_taken'])
+        job = execute(qc, backend, config={'pauli_observables': ['ZZ']})
+        self.assertRaises(SympySimulatorError, job.result)
+
+
+if __name__ == '__main__':
+    unittest.main()
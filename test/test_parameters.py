@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,redefined-builtin
+
+from test.common import QiskitSympyTestCase
+
+import unittest
+
+import numpy as np
+from sympy import N, Rational, Symbol
+
+from qiskit import compile, execute, QuantumRegister, QuantumCircuit
+from qiskit_addon_sympy import SympyProvider
+from qiskit_addon_sympy.parameters import (assign_symbols, bind_parameters, free_parameters,
+                                           lambdify_parameters, template_groups)
+
+
+class ParametersTest(QiskitSympyTestCase):
+    """Test the simulation of circuits with symbolic parameters."""
+
+    @staticmethod
+    def _circuit(theta, phi):
+        qr = QuantumRegister(2)
+        qc = QuantumCircuit(qr, name='parametric')
+        qc.h(qr[0])
+        qc.u3(theta, phi, 0, qr[1])
+        qc.cx(qr[0], qr[1])
+        return qc
+
+    def test_statevector(self):
+        """Test binding and lambdifying a parametric statevector."""
+        theta, phi = Symbol('theta'), Symbol('phi')
+        backend = SympyProvider().get_backend('statevector_simulator')
+        qc = self._circuit(0.123456, 0.654321)
+        qobj = assign_symbols(compile(qc, backend), {0.123456: theta, 0.654321: phi})
+        statevector = backend.run(qobj).result().get_statevector(qc)
+        self.assertEqual(free_parameters(statevector), {theta, phi})
+
+        bound = bind_parameters(statevector, [{'theta': np.pi / 2, 'phi': 0.0},
+                                              {theta: 0.3, phi: 0.2}])
+        self.assertEqual(bound[0][0], Rational(1, 2))
+        expected = execute(self._circuit(0.3, 0.2), backend).result().get_statevector()
+        for amp_bound, amp_expected in zip(bound[1], expected):
+            self.assertAlmostEqual(complex(N(amp_bound)), complex(N(amp_expected)))
+
+        function = lambdify_parameters(statevector, [theta, phi])
+        amplitudes = function(np.array([np.pi / 2, 0.3]), np.array([0.0, 0.2]))
+        self.assertEqual(amplitudes.shape, (2, 4))
+        for row, bound_statevector in zip(amplitudes, bound):
+            for amp, amp_bound in zip(row, bound_statevector):
+                self.assertAlmostEqual(amp, complex(N(amp_bound)))
+
+    def test_unitary(self):
+        """Test a parametric unitary."""
+        theta = Symbol('theta')
+        backend = SympyProvider().get_backend('unitary_simulator')
+        qc = self._circuit(0.123456, 0.0)
+        qobj = assign_symbols(compile(qc, backend), {0.123456: theta})
+        unitary = backend.run(qobj).result().get_unitary(qc)
+
+        self.assertEqual(free_parameters(unitary), {theta})
+        self.assertEqual(lambdify_parameters(unitary, ['theta'])(np.zeros(5)).shape,
+                         (5, 4, 4))
+        expected = execute(self._circuit(np.pi, 0.0), backend).result().get_unitary()
+        self.assertTrue((bind_parameters(unitary, {theta: np.pi}) == expected).all())
+
+    def test_templates(self):
+        """Test that experiments differing in their angles share a template."""
+        circuits = [self._circuit(theta, 0.2) for theta in (0.1, 0.3, np.pi / 2)]
+        for circuit, name in zip(circuits, ('a', 'b', 'c')):
+            circuit.name = name
+        qr = QuantumRegister(2)
+        other = QuantumCircuit(qr, name='other')
+        other.cx(qr[0], qr[1])
+        circuits.insert(1, other)
+        backend = SympyProvider().get_backend('statevector_simulator')
+
+        qobj = compile(circuits, backend)
+        groups = template_groups(qobj.experiments, qobj.config)
+        self.assertEqual([[index for index, _ in members] for _, members in groups],
+                         [[0, 2, 3], [1]])
+        self.assertEqual([len(parameters) for _, parameters in groups[0][1]], [1, 1, 1])
+
+        expected = execute(circuits, backend).result()
+        result = execute(circuits, backend, config={'templates': True}).result()
+        for circuit in circuits:
+            for amp, amp_expected in zip(result.get_statevector(circuit),
+                                         expected.get_statevector(circuit)):
+                self.assertAlmostEqual(complex(N(amp)), complex(N(amp_expected)))
+        self.assertEqual(result.get_statevector('c')[0], Rational(1, 2))
+
+        backend = SympyProvider().get_backend('unitary_simulator')
+        expected = execute(circuits, backend).result()
+        result = execute(circuits, backend, config={'templates': True}).result()
+        for circuit in circuits:
+            self.assertTrue((result.get_unitary(circuit) == expected.get_unitary(circuit)).all())
+
+    def test_duplicate_templates(self):
+        """Test that identical experiments keep their own names and results."""
+        circuits = [self._circuit(0.3, 0.2) for _ in range(2)]
+        for circuit, name in zip(circuits, ('a', 'b')):
+            circuit.name = name
+        backend = SympyProvider().get_backend('statevector_simulator')
+
+        qobj = compile(circuits, backend)
+        groups = template_groups(qobj.experiments, qobj.config)
+        self.assertEqual(len(groups), 1)
+        self.assertIs(groups[0][0], qobj.experiments[0])
+        self.assertEqual(groups[0][1], [(0, {}), (1, {})])
+
+        expected = execute(circuits[0], backend).result().get_statevector()
+        result = execute(circuits, backend, config={'templates': True}).result()
+        self.assertEqual(result.get_names(), ['a', 'b'])
+        for circuit in circuits:
+            self.assertTrue((result.get_statevector(circuit) == expected).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,redefined-builtin,protected-access
+
+from test.common import QiskitSympyTestCase
+
+import unittest
+
+from qiskit import compile, QuantumRegister, QuantumCircuit
+from qiskit_addon_sympy import SympyProvider
+from qiskit_addon_sympy.prefixes import run_shared_prefixes
+from qiskit_addon_sympy.resultcache import RESULT_CACHE
+
+
+class PrefixesTest(QiskitSympyTestCase):
+    """Test the simulation of shared instruction prefixes."""
+
+    def tearDown(self):
+        RESULT_CACHE.clear()
+
+    def _run(self, sequences, max_snapshots):
+        states = {}
+
+        def _advance(state, index, begin, end):
+            self.assertEqual(state, sequences[index][:begin])
+            state.extend(sequences[index][begin:end])
+            return state
+
+        def _finish(index, state):
+            states[index] = list(state)
+
+        applied = run_shared_prefixes(sequences, list, _advance, list, _finish, max_snapshots)
+        self.assertEqual(states, dict(enumerate(sequences)))
+        return applied
+
+    def test_run_shared_prefixes(self):
+        """Test that every shared prefix is applied once, within the snapshot bound."""
+        prefix = list('abcdef')
+        sequences = [prefix + ['x', 'y'], list('ab'), prefix + ['z'], prefix + ['x', 'z'],
+                     prefix + ['x', 'y'], list('ba')]
+        self.assertEqual(self._run(sequences, 8), 12)
+        self.assertEqual(self._run(sequences, 1), 27)
+        self.assertEqual(self._run(sequences, 0), sum(len(sequence) for sequence in sequences))
+        self.assertEqual(self._run([], 8), 0)
+
+    def _circuits(self):
+        qr = QuantumRegister(3)
+        circuits = []
+        for name, tail in [('x', 'h'), ('y', 'sdg'), ('z', None), ('zz', 'cx')]:
+            qc = QuantumCircuit(qr, name=name)
+            qc.u3(0.3, 0.2, 0.1, qr[0])
+            qc.cx(qr[0], qr[1])
+            qc.u3(0.5, 0.0, 0.4, qr[1])
+            qc.cx(qr[1], qr[2])
+            if tail == 'cx':
+                qc.cx(qr[2], qr[0])
+            elif tail is not None:
+                getattr(qc, tail)(qr[2])
+                qc.h(qr[1])
+            circuits.append(qc)
+        return circuits
+
+    def test_statevector(self):
+        """Test that sharing prefixes gives the results of separate simulations."""
+        circuits = self._circuits()
+        backend = SympyProvider().get_backend('statevector_simulator')
+        for config in [{'engine': 'dense'}, {'engine': 'sparse', 'sparse_output': True},
+                       {'engine': 'dense', 'simplification': 'every', 'simplify_period': 2,
+                        'simplifier': 'expand_complex', 'fusion': True}]:
+            expected = backend.run(compile(circuits, backend, config=dict(
+                config, result_cache=False))).result()
+            for max_snapshots in (0, 1, 8):
+                result = backend.run(compile(circuits, backend, config=dict(
+                    config, prefix_sharing=True, max_snapshots=max_snapshots,
+                    result_cache=False))).result()
+                for circuit in circuits:
+                    data = result.get_data(circuit)
+                    expected_data = expected.get_data(circuit)
+                    self.assertEqual(sorted(data), sorted(expected_data))
+                    for name in ('statevector', 'sparse_statevector'):
+                        if name in data:
+                            self.assertEqual(list(data[name]), list(expected_data[name]))
+
+    def test_cached_experiments(self):
+        """Test that the cached experiments are not simulated again, and that
+        the others are cached."""
+        circuits = self._circuits()
+        backend = SympyProvider().get_backend('statevector_simulator')
+        config = {'engine': 'dense', 'prefix_sharing': True}
+        backend._run_job('first', compile(circuits[:2], backend, config=config))
+        self.assertEqual(RESULT_CACHE.info().misses, 2)
+        result = backend._run_job('second', compile(circuits, backend, config=config))
+        self.assertEqual(RESULT_CACHE.info()[:2], (2, 4))
+        self.assertEqual(len(result.results), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
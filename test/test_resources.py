@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,redefined-builtin
+
+from test.common import QiskitSympyTestCase
+
+import unittest
+
+import numpy as np
+
+from qiskit import compile, QuantumRegister, QuantumCircuit
+from qiskit.qobj import QobjItem
+from qiskit_addon_sympy import SympyProvider
+from qiskit_addon_sympy.resources import estimate_resources, fit_engine, gate_mix
+
+
+class ResourcesTest(QiskitSympyTestCase):
+    """Test the pre-flight resource estimates."""
+
+    def setUp(self):
+        qr = QuantumRegister(4)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.t(qr[1])
+        qc.cx(qr[0], qr[1])
+        qc.u3(0.3, 0.2, 0.1, qr[2])
+        qc.barrier(qr)
+        backend = SympyProvider().get_backend('statevector_simulator')
+        self.circuit = compile(qc, backend).experiments[0]
+
+    def test_gate_mix(self):
+        """Test the counts of branching and generic gates."""
+        self.assertEqual(gate_mix(self.circuit), {'gates': 4, 'branching': 2, 'generic': 1})
+
+    def test_estimates(self):
+        """Test that the estimates order the engines and scale with the unitary."""
+        dense = estimate_resources(self.circuit, 'dense')
+        self.assertLess(estimate_resources(self.circuit, 'sparse').memory, dense.memory)
+        self.assertLess(dense.memory, estimate_resources(self.circuit, 'ket').memory)
+        self.assertEqual(dense.time_class, 'seconds')
+        unitary = estimate_resources(self.circuit, 'dense', unitary=True)
+        self.assertEqual(unitary.memory, 2 ** 4 * dense.memory)
+
+    def test_fit_engine(self):
+        """Test the choice between the engine and its alternatives."""
+        alternatives = [('sparse', {'sparse_output': True})]
+        config = {'max_memory': np.inf}
+        self.assertEqual(fit_engine(self.circuit, None, config, 'dense', alternatives)[:2],
+                         ('dense', {}))
+        config = {'max_memory': estimate_resources(self.circuit, 'sparse', False, True).memory}
+        self.assertEqual(fit_engine(self.circuit, None, config, 'dense', alternatives)[:2],
+                         (None, None))
+        downgrade = QobjItem(oversize='downgrade')
+        self.assertEqual(fit_engine(self.circuit, downgrade, config, 'dense', alternatives)[:2],
+                         ('sparse', {'sparse_output': True}))
+        config = {'max_memory': 1}
+        self.assertEqual(fit_engine(self.circuit, downgrade, config, 'dense', alternatives)[:2],
+                         (None, None))
+
+    def test_no_default_limit(self):
+        """Test that a large circuit is not rejected without limits."""
+        qr = QuantumRegister(8)
+        qc = QuantumCircuit(qr)
+        for gate in range(30):
+            qc.u3(0.1 * gate + 0.05, 0.2, 0.3, qr[gate % 8])
+        backend = SympyProvider().get_backend('unitary_simulator')
+        qobj = compile(qc, backend)
+        self.assertGreater(estimate_resources(qobj.experiments[0], 'dense', unitary=True).memory,
+                           2 ** 33)
+        self.assertIs(backend._validate(qobj), qobj)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,redefined-builtin,protected-access
+
+from test.common import QiskitSympyTestCase
+
+import os
+import tempfile
+import unittest
+
+from sympy import Dummy
+
+from qiskit import compile, QuantumRegister, QuantumCircuit
+from qiskit_addon_sympy import SympyStatevectorSimulator, SympyUnitarySimulator
+from qiskit_addon_sympy.resultcache import (RESULT_CACHE, ResultCache, estimated_size,
+                                            experiment_key, result_cache)
+
+
+class ResultCacheTest(QiskitSympyTestCase):
+    """Test the cache of experiment results."""
+
+    def setUp(self):
+        qr = QuantumRegister(2)
+        self.qc = QuantumCircuit(qr, name='bell')
+        self.qc.h(qr[0])
+        self.qc.cx(qr[0], qr[1])
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        RESULT_CACHE.configure(128)
+        RESULT_CACHE.clear()
+        self.directory.cleanup()
+
+    def test_experiment_key(self):
+        """Test that the key only depends on what determines the result."""
+        backend = SympyStatevectorSimulator()
+        qobj = compile(self.qc, backend)
+        key = experiment_key(qobj.experiments[0], qobj.config, backend.name())
+        self.assertEqual(key, experiment_key(qobj.experiments[0], qobj.config,
+                                             backend.name()))
+        qobj = compile(self.qc, backend, config={'max_workers': 2})
+        self.assertEqual(key, experiment_key(qobj.experiments[0], qobj.config,
+                                             backend.name()))
+        qobj = compile(self.qc, backend, config={'engine': 'dense'})
+        self.assertNotEqual(key, experiment_key(qobj.experiments[0], qobj.config,
+                                                backend.name()))
+        self.assertNotEqual(key, experiment_key(qobj.experiments[0], qobj.config,
+                                                'unitary_simulator'))
+
+        qobj.experiments[0].instructions[0].params[0] = Dummy('p') + 2 * Dummy('p')
+        key = experiment_key(qobj.experiments[0], qobj.config, backend.name())
+        qobj.experiments[0].instructions[0].params[0] = Dummy('p') + 2 * Dummy('p')
+        self.assertEqual(key, experiment_key(qobj.experiments[0], qobj.config,
+                                             backend.name()))
+        dummy = Dummy('p')
+        qobj.experiments[0].instructions[0].params[0] = dummy + 2 * dummy
+        self.assertNotEqual(key, experiment_key(qobj.experiments[0], qobj.config,
+                                                backend.name()))
+
+    def test_tiers(self):
+        """Test the in-memory tier, and the on-disk tier and its eviction."""
+        cache = ResultCache(maxsize=1, directory=self.directory.name, max_bytes=10 ** 6)
+        self.assertEqual(cache.get_or_compute('a', lambda: {'x': 1}), {'x': 1})
+        self.assertEqual(cache.get_or_compute('a', lambda: {'x': 2}), {'x': 1})
+        self.assertEqual(cache.get_or_compute('b', lambda: {'x': 3}), {'x': 3})
+        # evicted from memory, loaded from disk
+        self.assertEqual(cache.get_or_compute('a', lambda: {'x': 4}), {'x': 1})
+        self.assertEqual(tuple(cache.info())[:2], (1, 3))
+
+        size = os.path.getsize(os.path.join(self.directory.name, 'a.pickle'))
+        cache.configure(1, self.directory.name, max_bytes=2 * size)
+        os.utime(os.path.join(self.directory.name, 'a.pickle'), (0, 0))
+        cache.get_or_compute('c', lambda: {'x': 5})
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['b.pickle', 'c.pickle'])
+
+    def test_memory_bound(self):
+        """Test that the in-memory tier is bounded in bytes, within max_memory."""
+        value = {'x': list(range(100))}
+        cache = ResultCache(maxsize=10, max_memory=2 * estimated_size(value))
+        for key in 'abc':
+            cache.get_or_compute(key, lambda: dict(value))
+        self.assertEqual(cache.info().currsize, 2)
+        self.assertEqual(cache.memory(), 2 * estimated_size(value))
+        self.assertNotIn('a', cache)
+
+        cache.configure(10, max_memory=None)
+        self.assertEqual(cache.memory(), 0)
+        cache.configure(10, max_memory=estimated_size(value))
+        self.assertEqual(cache.info().currsize, 1)
+        self.assertIn('c', cache)
+
+        cache = result_cache({'result_cache_size': 10, 'max_memory': estimated_size(value)})
+        self.assertEqual(cache._memory.info().maxsize, 10)
+        self.assertEqual(cache._memory._max_weight, estimated_size(value))
+
+    def test_backend_caches(self):
+        """Test that backends configured differently keep separate caches."""
+        self.assertIs(SympyStatevectorSimulator()._result_cache, RESULT_CACHE)
+        self.assertIs(SympyUnitarySimulator()._result_cache, RESULT_CACHE)
+        configuration = dict(SympyStatevectorSimulator.DEFAULT_CONFIGURATION,
+                             result_cache_dir=self.directory.name)
+        backend = SympyStatevectorSimulator(configuration)
+        self.assertIsNot(backend._result_cache, RESULT_CACHE)
+        self.assertIs(backend._result_cache, result_cache(configuration))
+
+        backend._run_job('first', compile(self.qc, backend))
+        unitary = SympyUnitarySimulator()
+        unitary._run_job('second', compile(self.qc, unitary))
+        self.assertEqual(backend._result_cache.directory, self.directory.name)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+        self.assertEqual(tuple(RESULT_CACHE.info())[:2], (0, 1))
+
+    def test_simulator(self):
+        """Test that a backend reuses the results of previous jobs, from disk."""
+        configuration = dict(SympyStatevectorSimulator.DEFAULT_CONFIGURATION,
+                             result_cache_dir=self.directory.name)
+        backend = SympyStatevectorSimulator(configuration)
+        qobj = compile(self.qc, backend)
+        first = backend._run_job('first', qobj).get_statevector(self.qc)
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+        backend._result_cache.clear()
+        second = backend._run_job('second', qobj).get_statevector(self.qc)
+        self.assertTrue((first == second).all())
+        self.assertEqual(tuple(backend._result_cache.info())[:2], (0, 1))
+        self.assertIsNot(first, second)
+
+        qobj = compile(self.qc, backend, config={'result_cache': False})
+        backend._run_job('third', qobj)
+        self.assertEqual(tuple(backend._result_cache.info())[:2], (0, 1))
+
+    def test_templates(self):
+        """Test that a repeated job simulating templates hits the cache."""
+        qr = QuantumRegister(2)
+        circuits = []
+        for angle in (0.1, 0.2, 0.3):
+            qc = QuantumCircuit(qr)
+            qc.u3(angle, 0, 0, qr[0])
+            qc.cx(qr[0], qr[1])
+            circuits.append(qc)
+        backend = SympyStatevectorSimulator()
+        qobj = compile(circuits, backend, config={'templates': True})
+        first = backend._run_job('first', qobj)
+        self.assertEqual(tuple(RESULT_CACHE.info())[:2], (0, 1))
+        for _ in range(2):
+            second = backend._run_job('second', qobj)
+        self.assertEqual(tuple(RESULT_CACHE.info())[:2], (2, 1))
+        for qc in circuits:
+            self.assertTrue((first.get_statevector(qc) == second.get_statevector(qc)).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,protected-access
+
+from test.common import QiskitSympyTestCase
+
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from sympy import I, Integer, Matrix, N, exp, pi, sqrt
+
+from qiskit.qobj import QobjInstruction, QobjItem
+from qiskit_addon_sympy.simulatortools import (UGATE_CACHE, LRUCache, apply_single_qubit_gate,
+                                               apply_single_qubit_gate_sparse,
+                                               apply_two_qubit_gate, apply_two_qubit_gate_sparse,
+                                               compute_ugate_matrix, ExpressionInterner,
+                                               fuse_single_qubit_gates, regulate,
+                                               run_experiments, SimplificationPolicy)
+
+
+class LRUCacheTest(QiskitSympyTestCase):
+    """Test the cache of regulated angles and u gate matrices."""
+
+    def tearDown(self):
+        UGATE_CACHE.resize(1024)
+        UGATE_CACHE.clear()
+
+    def test_counters_and_eviction(self):
+        """Test the hit and miss counters and the eviction order."""
+        cache = LRUCache(maxsize=2)
+        self.assertEqual(cache.get_or_compute('a', lambda: 1), 1)
+        self.assertEqual(cache.get_or_compute('b', lambda: 2), 2)
+        self.assertEqual(cache.get_or_compute('a', lambda: 3), 1)
+        # 'b' is now the least recently used entry
+        cache.get_or_compute('c', lambda: 4)
+        self.assertEqual(cache.get_or_compute('b', lambda: 5), 5)
+        self.assertEqual(cache.get_or_compute('a', lambda: 6), 6)
+        self.assertEqual(tuple(cache.info()), (1, 5, 2, 2))
+
+        cache.resize(1)
+        self.assertEqual(cache.info().currsize, 1)
+        cache.clear()
+        self.assertEqual(tuple(cache.info()), (0, 0, 1, 0))
+
+    def test_ugate_cache(self):
+        """Test that matrices and angles are shared between equal parameters."""
+        UGATE_CACHE.clear()
+        first = compute_ugate_matrix([3.14159265, 0.5, 1.0])
+        misses = UGATE_CACHE.info().misses
+        second = compute_ugate_matrix([3.14159265, 0.5, 1.0])
+        self.assertIs(first, second)
+        self.assertEqual(UGATE_CACHE.info().misses, misses)
+        self.assertEqual(regulate(3.14159265), pi)
+        self.assertGreater(UGATE_CACHE.info().hits, 1)
+        self.assertNotEqual(compute_ugate_matrix([0.3, 0.5, 1.0]),
+                            compute_ugate_matrix([0.3 + 1e-13, 0.5, 1.0]))
+        self.assertEqual(regulate(np.pi / 4 + 1e-13), pi / 4)
+
+        UGATE_CACHE.resize(0)
+        self.assertIsNot(compute_ugate_matrix([0.3, 0.5, 1.0]),
+                         compute_ugate_matrix([0.3, 0.5, 1.0]))
+        self.assertEqual(UGATE_CACHE.info().currsize, 0)
+
+
+class SparseGateTest(QiskitSympyTestCase):
+    """Test the gates on dicts of nonzero amplitudes."""
+
+    def test_sparse_gates(self):
+        """Test the sparse gates against the dense ones, and that zeros are dropped."""
+        hadamard = compute_ugate_matrix([np.pi / 2, 0.0, np.pi])
+        cnot = Matrix([[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0], [0, 1, 0, 0]])
+        dense = [Integer(0)] * 8
+        dense[0] = Integer(1)
+        sparse = {0: Integer(1)}
+        for apply_dense, apply_sparse, args in [
+                (apply_single_qubit_gate, apply_single_qubit_gate_sparse, (hadamard, 2)),
+                (apply_two_qubit_gate, apply_two_qubit_gate_sparse, (cnot, 2, 0)),
+                (apply_single_qubit_gate, apply_single_qubit_gate_sparse, (hadamard, 1))]:
+            apply_dense(dense, *args)
+            apply_sparse(sparse, *args)
+            self.assertEqual(sparse, {index: amp for index, amp in enumerate(dense) if amp != 0})
+        self.assertEqual(len(sparse), 4)
+
+        apply_single_qubit_gate_sparse(sparse, hadamard, 1)
+        self.assertEqual(sorted(sparse), [0, 5])
+
+
+class ExpressionInternerTest(QiskitSympyTestCase):
+    """Test the sharing of equal amplitudes."""
+
+    def test_interned_gates(self):
+        """Test that equal amplitudes are one object and that results are reused."""
+        hadamard = compute_ugate_matrix([np.pi / 2, 0.0, np.pi])
+        interner = ExpressionInterner()
+        vector = [Integer(0)] * 8
+        vector[0] = Integer(1)
+        for qubit in range(3):
+            apply_single_qubit_gate(vector, hadamard, qubit, interner)
+        self.assertEqual(vector[0], sqrt(2)/4)
+        self.assertTrue(all(amp is vector[0] for amp in vector))
+        self.assertEqual(len(interner), 4)
+
+        cnot = Matrix([[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0], [0, 1, 0, 0]])
+        apply_two_qubit_gate(vector, cnot, 0, 1, interner)
+        apply_single_qubit_gate(vector, hadamard, 0, interner)
+        self.assertEqual(vector[1], 0)
+        self.assertIs(interner.apply(sqrt, vector[0]), interner.apply(sqrt, vector[2]))
+
+    def test_bounded_tables(self):
+        """Test that the tables of the interner do not grow with the circuit depth."""
+        hadamard = compute_ugate_matrix([np.pi / 2, 0.0, np.pi])
+        t_gate = compute_ugate_matrix([0.0, 0.0, np.pi / 4])
+        cnot = Matrix([[1, 0, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0], [0, 1, 0, 0]])
+        interner = ExpressionInterner()
+        vector = [Integer(0)] * 16
+        vector[0] = Integer(1)
+        sizes = []
+        for layer in range(40):
+            for qubit in range(4):
+                apply_single_qubit_gate(vector, hadamard if layer % 2 else t_gate, qubit,
+                                        interner)
+                interner.release([vector])
+                apply_two_qubit_gate(vector, cnot, qubit, (qubit + 1) % 4, interner)
+                interner.release([vector])
+                self.assertEqual(len(interner._results), 0)
+                self.assertLessEqual(len(interner), len(set(vector)))
+            sizes.append(len(interner))
+        self.assertLessEqual(max(sizes), 16)
+
+
+class SimplificationPolicyTest(QiskitSympyTestCase):
+    """Test when amplitudes are simplified."""
+
+    def test_policies(self):
+        """Test the 'every' and 'threshold' policies."""
+        amplitude = sqrt(2)*exp(I*pi/4)/2 - I*sqrt(2)*exp(-I*pi/4)/2
+
+        policy = SimplificationPolicy('every', 'expand_complex', period=2)
+        vector = [amplitude]
+        policy.after_gate([vector])
+        self.assertEqual(vector, [amplitude])
+        sparse = {3: amplitude}
+        policy.after_gate([vector, sparse])
+        self.assertEqual(vector, [Integer(0)])
+        self.assertEqual(sparse, {})
+
+        policy = SimplificationPolicy('threshold', 'radsimp', threshold=3)
+        vector = [sqrt(2)/2, 1/(1 + sqrt(2))]
+        policy.after_gate([vector])
+        self.assertEqual(vector, [sqrt(2)/2, sqrt(2) - 1])
+
+        with self.assertRaises(ValueError):
+            SimplificationPolicy('sometimes')
+        for options in [{'period': 0}, {'period': 1.5}, {'threshold': -1}]:
+            with self.assertRaises(ValueError):
+                SimplificationPolicy('every', **options)
+        with self.assertRaises(ValueError):
+            SimplificationPolicy('gate', 'factor')
+
+
+class FusionTest(QiskitSympyTestCase):
+    """Test the fusion of single-qubit gates."""
+
+    def test_fuse_single_qubit_gates(self):
+        """Test that runs are fused up to the next operation on their qubit."""
+        instructions = [QobjInstruction(name='u2', qubits=[0], params=[0.0, np.pi]),
+                        QobjInstruction(name='u1', qubits=[1], params=[np.pi / 4]),
+                        QobjInstruction(name='u1', qubits=[0], params=[np.pi / 4]),
+                        QobjInstruction(name='id', qubits=[0]),
+                        QobjInstruction(name='cx', qubits=[0, 1]),
+                        QobjInstruction(name='u3', qubits=[0], params=[0.3, 0.2, 0.1]),
+                        QobjInstruction(name='u1', qubits=[1], params=[np.pi / 2]),
+                        QobjInstruction(name='u1', qubits=[1], params=[np.pi / 2])]
+        fused = fuse_single_qubit_gates(instructions)
+
+        self.assertEqual([(operation.name, operation.qubits) for operation in fused],
+                         [('fused', [0]), ('u1', [1]), ('cx', [0, 1]), ('u3', [0]),
+                          ('fused', [1])])
+        expected = compute_ugate_matrix([0.0, 0.0, np.pi / 4]) * \
+            compute_ugate_matrix([np.pi / 2, 0.0, np.pi])
+        for actual_entry, expected_entry in zip(fused[0].matrix, expected):
+            self.assertAlmostEqual(complex(N(actual_entry)), complex(N(expected_entry)))
+        self.assertEqual(fused[4].matrix[1, 1], -1)
+
+
+class RunExperimentsTest(QiskitSympyTestCase):
+    """Test the execution of the experiments of a qobj."""
+
+    def test_daemonic_worker(self):
+        """Test that a daemonic process runs its experiments serially."""
+        config = QobjItem(parallel_experiments=True)
+        daemon = mock.Mock(daemon=True)
+        with mock.patch('multiprocessing.current_process', return_value=daemon):
+            # a lambda cannot be sent to worker processes
+            self.assertEqual(run_experiments(lambda circuit: circuit * 2, [1, 2, 3], config),
+                             [2, 4, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
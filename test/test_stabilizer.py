@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring
+
+from test.common import QiskitSympyTestCase
+
+import random
+import unittest
+
+import numpy as np
+from sympy import I, Integer, N, sqrt
+
+from qiskit.qobj import QobjExperiment, QobjInstruction
+from qiskit_addon_sympy.simulatortools import (apply_single_qubit_gate, apply_two_qubit_gate,
+                                               compute_ugate_matrix, ugate_parameters)
+from qiskit_addon_sympy.stabilizer import (StabilizerState, is_clifford_circuit,
+                                           ugate_clifford_sequence)
+from qiskit_addon_sympy.statevector_simulator import SympyStatevectorSimulator
+
+
+class StabilizerTest(QiskitSympyTestCase):
+    """Test the stabilizer engine with exact amplitudes."""
+
+    def test_random_clifford_circuits(self):
+        """Compare with the dense engine, global phase included."""
+        rng = random.Random(1234)
+        for _ in range(40):
+            number_of_qubits = rng.randint(1, 4)
+            state = StabilizerState(number_of_qubits)
+            vector = [Integer(1)] + [Integer(0)] * (2 ** number_of_qubits - 1)
+            for _ in range(rng.randint(1, 12)):
+                if number_of_qubits > 1 and rng.random() < 0.3:
+                    control, target = rng.sample(range(number_of_qubits), 2)
+                    state.cx(control, target)
+                    apply_two_qubit_gate(vector, SympyStatevectorSimulator.CX_MATRIX,
+                                         control, target)
+                else:
+                    qubit = rng.randrange(number_of_qubits)
+                    params = [rng.randint(-4, 4) * np.pi / 2 for _ in range(rng.randint(1, 3))]
+                    state.apply_ugate(params, qubit)
+                    apply_single_qubit_gate(
+                        vector, compute_ugate_matrix(ugate_parameters(params)), qubit)
+            actual = state.to_cyclotomic().to_sympy()
+            for amp_actual, amp_expected in zip(actual, vector):
+                self.assertAlmostEqual(complex(N(amp_actual)), complex(N(amp_expected)))
+            self.assertEqual(state.nonzero_amplitudes(),
+                             {index: amp for index, amp in enumerate(actual) if amp != 0})
+
+    def test_phase_is_exact(self):
+        """S H |0> == (|0> + i|1>)/sqrt(2)."""
+        state = StabilizerState(1)
+        state.h(0)
+        state.s(0)
+        self.assertEqual(list(state.to_cyclotomic().to_sympy()), [sqrt(2)/2, sqrt(2)*I/2])
+
+    def test_not_clifford(self):
+        self.assertIsNone(ugate_clifford_sequence([np.pi / 4]))
+        self.assertEqual(ugate_clifford_sequence([0.0, np.pi]), ['s', 's', 'h', 'x'])
+        experiment = QobjExperiment(instructions=[
+            QobjInstruction(name='u2', qubits=[0], params=[0.0, np.pi]),
+            QobjInstruction(name='u1', qubits=[0], params=[np.pi / 4])])
+        self.assertFalse(is_clifford_circuit(experiment))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,17 +5,19 @@
 # This source code is licensed under the Apache License, Version 2.0 found in
 # the LICENSE.txt file in the root directory of this source tree.
 
-# pylint: disable=invalid-name,missing-docstring
+# pylint: disable=invalid-name,missing-docstring,redefined-builtin,protected-access
 
 from test.common import QiskitSympyTestCase
 
 import unittest
 
-from sympy import sqrt
+from sympy import I, N, sqrt
 
-from qiskit import (load_qasm_file, execute, QuantumRegister,
+from qiskit import (load_qasm_file, execute, compile, QuantumRegister,
                     ClassicalRegister, QuantumCircuit, wrapper)
+from qiskit.backends import JobError
 from qiskit_addon_sympy import SympyProvider
+from qiskit_addon_sympy.sympysimulatorerror import SympySimulatorError
 
 
 class SympyStatevectorSimulatorTest(QiskitSympyTestCase):
@@ -40,6 +42,324 @@ class SympyStatevectorSimulatorTest(QiskitSympyTestCase):
         self.assertEqual(actual[2], 0)
         self.assertEqual(actual[3], sqrt(2)/2)
 
+    def test_ket_engine(self):
+        """Test the reference ket engine on the same circuit."""
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        result = execute(self.q_circuit, backend, config={'engine': 'ket'}).result()
+        actual = result.get_statevector(self.q_circuit)
+
+        self.assertEqual(actual[0], sqrt(2)/2)
+        self.assertEqual(actual[1], 0)
+        self.assertEqual(actual[2], 0)
+        self.assertEqual(actual[3], sqrt(2)/2)
+
+    def test_engines_agree(self):
+        """Test the dense engine against the ket engine on a mixed circuit."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.t(qr[1])
+        qc.cx(qr[0], qr[2])
+        qc.u3(0.3, 0.2, 0.1, qr[2])
+        qc.cx(qr[2], qr[1])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        dense = execute(qc, backend, config={'engine': 'dense'}).result().get_statevector(qc)
+        ket = execute(qc, backend, config={'engine': 'ket'}).result().get_statevector(qc)
+
+        self.assertEqual(len(dense), 8)
+        for amp_dense, amp_ket in zip(dense, ket):
+            self.assertAlmostEqual(complex(N(amp_dense)), complex(N(amp_ket)))
+
+    def test_fusion(self):
+        """Test that fusing the single-qubit gates does not change the state."""
+        qr = QuantumRegister(2)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.u3(0.3, 0.2, 0.1, qr[0])
+        qc.t(qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.u1(0.7, qr[1])
+        qc.h(qr[1])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        dense = execute(qc, backend, config={'engine': 'dense'}).result().get_statevector(qc)
+        for engine in ('dense', 'ket'):
+            fused = execute(qc, backend,
+                            config={'engine': engine, 'fusion': True}).result().get_statevector(qc)
+            for amp_fused, amp_dense in zip(fused, dense):
+                self.assertAlmostEqual(complex(N(amp_fused)), complex(N(amp_dense)))
+
+    def test_sparse_engine(self):
+        """Test the sparse engine against the dense engine on a mixed circuit."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.t(qr[1])
+        qc.cx(qr[0], qr[2])
+        qc.u3(0.3, 0.2, 0.1, qr[2])
+        qc.cx(qr[2], qr[1])
+        qc.h(qr[0])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        dense = execute(qc, backend, config={'engine': 'dense'}).result().get_statevector(qc)
+        sparse = execute(qc, backend, config={'engine': 'sparse'}).result().get_statevector(qc)
+        for amp_sparse, amp_dense in zip(sparse, dense):
+            self.assertAlmostEqual(complex(N(amp_sparse)), complex(N(amp_dense)))
+
+        data = execute(qc, backend,
+                       config={'engine': 'dense', 'sparse_output': True}).result().get_data(qc)
+        self.assertNotIn('statevector', data)
+        self.assertEqual([index for index, _ in data['sparse_statevector']],
+                         [index for index, amp in enumerate(dense) if amp != 0])
+
+    def test_sparse_output(self):
+        """Test a reversible circuit on more qubits than a dense vector allows."""
+        qr = QuantumRegister(24)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.x(qr[1])
+        for qubit in range(1, 23):
+            qc.cx(qr[qubit], qr[qubit + 1])
+        qc.cx(qr[0], qr[23])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        data = execute(qc, backend,
+                       config={'engine': 'sparse', 'sparse_output': True}).result().get_data(qc)
+        self.assertEqual(data['sparse_statevector'],
+                         [(2 ** 23 - 1, sqrt(2)/2), (2 ** 24 - 2, sqrt(2)/2)])
+
+    def test_simplification(self):
+        """Test that simplifying the amplitudes does not change their values."""
+        qr = QuantumRegister(2)
+        qc = QuantumCircuit(qr)
+        qc.u3(0.3, 0.2, 0.1, qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.u3(0.5, 0.4, 0.9, qr[1])
+        qc.h(qr[1])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        plain = execute(qc, backend, config={'engine': 'dense'}).result().get_statevector(qc)
+        for config in [{'simplification': 'gate', 'simplifier': 'nsimplify'},
+                       {'simplification': 'every', 'simplify_period': 2},
+                       {'simplification': 'threshold', 'simplify_threshold': 10,
+                        'simplifier': 'expand_complex'}]:
+            config['engine'] = 'dense'
+            simplified = execute(qc, backend, config=config).result().get_statevector(qc)
+            for amp_simplified, amp_plain in zip(simplified, plain):
+                self.assertAlmostEqual(complex(N(amp_simplified)), complex(N(amp_plain)))
+
+        for config in [{'simplification': 'often'},
+                       {'simplification': 'every', 'simplify_period': 0}]:
+            config['engine'] = 'dense'
+            job = execute(qc, backend, config=config)
+            self.assertRaises(SympySimulatorError, job.result)
+
+    def test_cyclotomic_engine(self):
+        """Test the integer engine against the dense engine on a Clifford+T circuit."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.t(qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.h(qr[1])
+        qc.sdg(qr[1])
+        qc.tdg(qr[2])
+        qc.h(qr[2])
+        qc.cx(qr[1], qr[2])
+        qc.s(qr[0])
+        qc.h(qr[0])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        dense = execute(qc, backend, config={'engine': 'dense'}).result().get_statevector(qc)
+        cyclotomic = execute(
+            qc, backend, config={'engine': 'cyclotomic'}).result().get_statevector(qc)
+        auto = execute(qc, backend).result().get_statevector(qc)
+
+        for amp_dense, amp_cyclotomic, amp_auto in zip(dense, cyclotomic, auto):
+            self.assertAlmostEqual(complex(N(amp_dense)), complex(N(amp_cyclotomic)))
+            self.assertEqual(amp_auto, amp_cyclotomic)
+
+    def test_stabilizer_engine(self):
+        """Test a GHZ state too large for the sympy engines."""
+        qr = QuantumRegister(16)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        for qubit in range(15):
+            qc.cx(qr[qubit], qr[qubit + 1])
+        qc.s(qr[15])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        actual = execute(qc, backend, config={'engine': 'stabilizer'}).result().get_statevector(qc)
+
+        self.assertEqual(len(actual), 2 ** 16)
+        self.assertEqual(actual[0], sqrt(2)/2)
+        self.assertEqual(actual[2 ** 16 - 1], sqrt(2)*I/2)
+        self.assertEqual(sum(1 for amp in actual if amp != 0), 2)
+
+    def test_stabilizer_engine_agrees(self):
+        """Test the stabilizer engine against the dense engine on a Clifford circuit."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.s(qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.h(qr[1])
+        qc.sdg(qr[2])
+        qc.y(qr[2])
+        qc.cx(qr[1], qr[2])
+        qc.h(qr[2])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        dense = execute(qc, backend, config={'engine': 'dense'}).result().get_statevector(qc)
+        auto = execute(qc, backend).result().get_statevector(qc)
+
+        for amp_dense, amp_auto in zip(dense, auto):
+            self.assertAlmostEqual(complex(N(amp_dense)), complex(N(amp_auto)))
+
+    def test_cyclotomic_engine_rejects_rotations(self):
+        qr = QuantumRegister(1)
+        qc = QuantumCircuit(qr)
+        qc.u3(0.3, 0.2, 0.1, qr[0])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+        job = execute(qc, backend, config={'engine': 'cyclotomic'})
+        self.assertRaises(SympySimulatorError, job.result)
+
+    def test_parallel_experiments(self):
+        """Test that experiments run in a process pool come back in order."""
+        circuits = []
+        for index in range(4):
+            qr = QuantumRegister(2)
+            qc = QuantumCircuit(qr, name='circuit{}'.format(index))
+            qc.u3(0.1 * (index + 1), 0.2, 0.3, qr[0])
+            qc.cx(qr[0], qr[1])
+            circuits.append(qc)
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        serial = execute(circuits, backend).result()
+        parallel = execute(circuits, backend,
+                           config={'parallel_experiments': True, 'max_workers': 2}).result()
+
+        for circuit in circuits:
+            self.assertEqual(list(parallel.get_statevector(circuit)),
+                             list(serial.get_statevector(circuit)))
+            self.assertGreaterEqual(parallel.get_data(circuit)['time_taken'], 0)
+
+    def test_streamed_results(self):
+        """Test that experiment results are streamed, serially and in parallel."""
+        circuits = []
+        for index in range(3):
+            qr = QuantumRegister(2)
+            qc = QuantumCircuit(qr, name='streamed{}'.format(index))
+            qc.u3(0.1 * (index + 1), 0.2, 0.3, qr[0])
+            qc.cx(qr[0], qr[1])
+            circuits.append(qc)
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        for config in [{}, {'parallel_experiments': True, 'max_workers': 2}]:
+            called = []
+            qobj = compile(circuits, backend, config=config)
+            job = backend.run(qobj, callback=called.append)
+            streamed = {experiment_result.header['name']: experiment_result.data['statevector']
+                        for experiment_result in job.experiment_results(timeout=60)}
+            result = job.result()
+            self.assertEqual(sorted(experiment.header['name'] for experiment in called),
+                             sorted(streamed))
+            for circuit in circuits:
+                self.assertEqual(list(streamed[circuit.name]),
+                                 list(result.get_statevector(circuit)))
+
+        job = backend.run(compile(circuits, backend))
+        self.assertRaises(JobError, list, job.experiment_results())
+
+    def test_instrumentation(self):
+        """Test that every instruction is timed and measured when asked for."""
+        qr = QuantumRegister(2)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.u3(0.3, 0.2, 0.1, qr[1])
+        qc.cx(qr[0], qr[1])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        for engine in ('dense', 'sparse', 'ket'):
+            data = execute(qc, backend,
+                           config={'engine': engine, 'instrument': True}).result().get_data(qc)
+            records = data['instrumentation']
+            self.assertEqual(sorted(records['name']), ['cx', 'u2', 'u3'])
+            self.assertTrue((records['time'] >= 0).all())
+            self.assertTrue((records['count_ops'] > 0).all())
+            self.assertTrue((records['peak_memory'] == 0).all())
+            counters = data['ugate_cache']
+            self.assertEqual(counters['maxsize'], 1024)
+            self.assertGreater(counters['hits'] + counters['misses'], 0)
+
+        config = {'engine': 'dense', 'instrument': True, 'instrument_memory': True}
+        records = execute(qc, backend, config=config).result().get_data(qc)['instrumentation']
+        self.assertTrue((records['peak_memory'] > 0).all())
+
+        data = execute(qc, backend, config={'engine': 'dense'}).result().get_data(qc)
+        self.assertNotIn('instrumentation', data)
+        self.assertNotIn('ugate_cache', data)
+
+    def test_resource_limits(self):
+        """Test that oversized experiments are moved to the sparse engine or rejected."""
+        qr = QuantumRegister(20)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        for qubit in range(19):
+            qc.cx(qr[qubit], qr[qubit + 1])
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+
+        config = {'engine': 'dense', 'max_memory': 10 ** 6}
+        self.assertRaises(SympySimulatorError, execute, qc, backend, config=config)
+
+        config['oversize'] = 'downgrade'
+        data = execute(qc, backend, config=config).result().get_data(qc)
+        self.assertEqual(data['sparse_statevector'],
+                         [(0, sqrt(2)/2), (2 ** 20 - 1, sqrt(2)/2)])
+        self.assertNotIn('statevector', data)
+
+    def test_resource_limits_per_job(self):
+        """Test that moving an experiment to the sparse engine leaves the qobj unchanged."""
+        qr = QuantumRegister(10)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        for qubit in range(9):
+            qc.cx(qr[qubit], qr[qubit + 1])
+        backend = SympyProvider().get_backend('statevector_simulator')
+        qobj = compile(qc, backend, config={'engine': 'dense', 'oversize': 'downgrade'})
+        config = qobj.experiments[0].config.as_dict()
+        try:
+            backend._configuration['max_memory'] = 10 ** 6
+            self.assertIn('sparse_statevector', backend.run(qobj).result().get_data(qc))
+            self.assertEqual(qobj.experiments[0].config.as_dict(), config)
+            backend._configuration['max_memory'] = 10 ** 8
+            self.assertEqual(len(backend.run(qobj).result().get_statevector(qc)), 2 ** 10)
+        finally:
+            backend._configuration['max_memory'] = None
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine is reported."""
+        SyQ = SympyProvider()
+        backend = SyQ.get_backend('statevector_simulator')
+        job = execute(self.q_circuit, backend, config={'engine': 'magic'})
+        self.assertRaises(SympySimulatorError, job.result)
+
 
 class TestQobj(QiskitSympyTestCase):
     """Check the objects compiled for this backend create names properly"""
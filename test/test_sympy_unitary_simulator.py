@@ -11,11 +11,13 @@ from test.common import QiskitSympyTestCase
 
 import unittest
 
-from sympy import sqrt
+import numpy as np
+from sympy import N, sqrt
 
 from qiskit import (load_qasm_file, execute, QuantumRegister,
                     ClassicalRegister, QuantumCircuit, wrapper)
 from qiskit_addon_sympy import SympyProvider
+from qiskit_addon_sympy.sympysimulatorerror import SympySimulatorError
 
 
 class SympyUnitarySimulatorTest(QiskitSympyTestCase):
@@ -51,6 +53,117 @@ class SympyUnitarySimulatorTest(QiskitSympyTestCase):
         self.assertEqual(actual[3][2], 0)
         self.assertEqual(actual[3][3], 0)
 
+    def test_unitary_matches_statevector(self):
+        """Test that the first column is the statevector and that the result is unitary."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.t(qr[1])
+        qc.cx(qr[0], qr[2])
+        qc.u3(0.3, 0.2, 0.1, qr[1])
+        qc.cx(qr[2], qr[1])
+        qc.s(qr[2])
+
+        SyQ = SympyProvider()
+        unitary = execute(qc, SyQ.get_backend('unitary_simulator')).result().get_unitary(qc)
+        statevector = execute(
+            qc, SyQ.get_backend('statevector_simulator')).result().get_statevector(qc)
+
+        self.assertEqual(unitary.shape, (8, 8))
+        numeric = np.array([[complex(N(entry)) for entry in row] for row in unitary])
+        self.assertTrue(np.allclose(numeric.conj().T.dot(numeric), np.eye(8)))
+        for row in range(8):
+            self.assertEqual(unitary[row][0], statevector[row])
+
+    def test_fusion(self):
+        """Test that fusing the single-qubit gates does not change the unitary."""
+        qr = QuantumRegister(2)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.u3(0.3, 0.2, 0.1, qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.t(qr[1])
+        qc.u1(0.7, qr[1])
+
+        backend = SympyProvider().get_backend('unitary_simulator')
+        plain = execute(qc, backend, config={'engine': 'dense'}).result().get_unitary(qc)
+        fused = execute(qc, backend,
+                        config={'engine': 'dense', 'fusion': True}).result().get_unitary(qc)
+        for entry_fused, entry_plain in zip(fused.flatten(), plain.flatten()):
+            self.assertAlmostEqual(complex(N(entry_fused)), complex(N(entry_plain)))
+
+    def test_parallel_columns(self):
+        """Test that the columns computed in parallel make the same unitary."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.u3(0.3, 0.2, 0.1, qr[1])
+        qc.cx(qr[0], qr[2])
+        qc.cx(qr[1], qr[0])
+        backend = SympyProvider().get_backend('unitary_simulator')
+
+        serial = execute(qc, backend).result().get_unitary(qc)
+        config = {'parallel_columns': True, 'max_workers': 3}
+        parallel = execute(qc, backend, config=config).result().get_unitary(qc)
+        self.assertEqual(parallel.shape, (8, 8))
+        self.assertTrue((serial == parallel).all())
+
+    def test_instrumentation(self):
+        """Test that every instruction is timed and measured when asked for."""
+        qr = QuantumRegister(2)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.cx(qr[0], qr[1])
+        qc.t(qr[1])
+
+        backend = SympyProvider().get_backend('unitary_simulator')
+        for engine in ('dense', 'cyclotomic'):
+            data = execute(qc, backend,
+                           config={'engine': engine, 'instrument': True}).result().get_data(qc)
+            records = data['instrumentation']
+            self.assertEqual(list(records['name']), ['u2', 'cx', 'u1'])
+            self.assertEqual((records['count_ops'] > 0).all(), engine == 'dense')
+
+    def test_cyclotomic_engine(self):
+        """Test the integer engine against the dense engine on a Clifford+T circuit."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.t(qr[1])
+        qc.cx(qr[0], qr[2])
+        qc.h(qr[1])
+        qc.sdg(qr[2])
+        qc.cx(qr[2], qr[1])
+        qc.tdg(qr[0])
+
+        backend = SympyProvider().get_backend('unitary_simulator')
+        dense = execute(qc, backend, config={'engine': 'dense'}).result().get_unitary(qc)
+        cyclotomic = execute(qc, backend).result().get_unitary(qc)
+
+        self.assertEqual(cyclotomic.shape, (8, 8))
+        for row in range(8):
+            for col in range(8):
+                self.assertAlmostEqual(complex(N(dense[row][col])),
+                                       complex(N(cyclotomic[row][col])))
+
+    def test_resource_limits(self):
+        """Test that oversized experiments are moved to the cyclotomic engine or rejected."""
+        qr = QuantumRegister(3)
+        qc = QuantumCircuit(qr)
+        qc.h(qr[0])
+        qc.t(qr[1])
+        qc.cx(qr[0], qr[2])
+        backend = SympyProvider().get_backend('unitary_simulator')
+
+        config = {'engine': 'dense', 'max_memory': 10 ** 4}
+        self.assertRaises(SympySimulatorError, execute, qc, backend, config=config)
+
+        config['oversize'] = 'downgrade'
+        unitary = execute(qc, backend, config=config).result().get_unitary(qc)
+        self.assertEqual(unitary[0][0], sqrt(2)/2)
+        self.assertRaises(SympySimulatorError, execute, qc, backend,
+                          config={'max_time': 0})
+
 
 class TestQobj(QiskitSympyTestCase):
     """Check the objects compiled for this backend create names properly"""
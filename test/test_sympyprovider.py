@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring,protected-access
+
+from test.common import QiskitSympyTestCase
+
+import pickle
+import subprocess
+import sys
+import unittest
+from concurrent import futures
+
+from sympy import sqrt
+
+from qiskit import execute, QuantumRegister, QuantumCircuit
+from qiskit_addon_sympy import SympyProvider
+from qiskit_addon_sympy.executor import STANDARD_UGATES, initialize_worker
+from qiskit_addon_sympy.simulatortools import UGATE_CACHE
+from qiskit_addon_sympy.sympysimulatorerror import SympySimulatorError
+
+
+class SympyProviderTest(QiskitSympyTestCase):
+    """Test the executor owned by the provider."""
+
+    def setUp(self):
+        qr = QuantumRegister(2)
+        self.qc = QuantumCircuit(qr)
+        self.qc.h(qr[0])
+        self.qc.cx(qr[0], qr[1])
+
+    def _check_job(self, provider):
+        backend = provider.get_backend('statevector_simulator')
+        job = execute(self.qc, backend)
+        self.assertIs(job._executor, provider.get_executor())
+        self.assertEqual(job.result().get_statevector()[3], sqrt(2)/2)
+
+    def test_thread_executor(self):
+        """Test a provider running its jobs on threads, and its shutdown."""
+        provider = SympyProvider(executor='thread', max_workers=1)
+        self._check_job(provider)
+        executor = provider.get_executor()
+        self.assertIsInstance(executor, futures.ThreadPoolExecutor)
+        provider.shutdown()
+        self.assertIsNot(provider.get_executor(), executor)
+        self._check_job(provider)
+        provider.shutdown()
+
+    def test_ugate_cache_size(self):
+        """Test that the provider sizes the gate cache of the process running its jobs."""
+        provider = SympyProvider(executor='thread', ugate_cache_size=16)
+        try:
+            backend = provider.get_backend('statevector_simulator')
+            qr = QuantumRegister(1)
+            qc = QuantumCircuit(qr)
+            qc.h(qr[0])
+            data = execute(qc, backend, config={'instrument': True}).result().get_data(qc)
+            self.assertEqual(data['ugate_cache']['maxsize'], 16)
+        finally:
+            provider.shutdown()
+            UGATE_CACHE.resize(1024)
+
+    @unittest.skipIf(sys.version_info < (3, 11), 'max_tasks_per_child requires Python 3.11')
+    def test_process_executor(self):
+        """Test a provider replacing its worker processes after every job."""
+        provider = SympyProvider(executor='process', max_workers=1, max_tasks_per_child=1)
+        self._check_job(provider)
+        self._check_job(provider)
+        self.assertIsInstance(provider.get_executor(), futures.ProcessPoolExecutor)
+        provider.shutdown()
+
+    def test_options(self):
+        """Test that the provider pickles without its executor, and the errors."""
+        provider = SympyProvider(executor='thread')
+        provider.get_executor()
+        self.assertIsNone(pickle.loads(pickle.dumps(provider))._executor)
+        provider.shutdown()
+        with self.assertRaises(SympySimulatorError):
+            SympyProvider(executor='fiber')
+
+    def test_initialize_worker(self):
+        """Test that the worker initializer fills the gate cache."""
+        UGATE_CACHE.clear()
+        initialize_worker()
+        self.assertGreaterEqual(UGATE_CACHE.info().currsize, len(STANDARD_UGATES))
+
+    def test_lazy_backends(self):
+        """Test that the provider creates only the backends it is asked for."""
+        provider = SympyProvider()
+        provider.get_backend('unitary_simulator')
+        self.assertEqual(list(provider._backends), ['unitary_simulator'])
+        self.assertEqual(len(provider.backends()), 2)
+        self.assertEqual(provider.backends(name='simulator'), [])
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'lazy module attributes require Python 3.7')
+    def test_import_time(self):
+        """Test the time taken to import the package and list its backends,
+        after qiskit, and that it does not import sympy.physics.quantum."""
+        budget = 0.5
+        script = ("import sys, time\n"
+                  "import qiskit\n"
+                  "start = time.perf_counter()\n"
+                  "import qiskit_addon_sympy\n"
+                  "qiskit_addon_sympy.SympyProvider().backends()\n"
+                  "print(time.perf_counter() - start)\n"
+                  "print('sympy.physics.quantum' in sys.modules)\n")
+        output = subprocess.check_output([sys.executable, '-c', script],
+                                         universal_newlines=True).split()
+        self.assertLess(float(output[0]), budget)
+        self.assertEqual(output[1], 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
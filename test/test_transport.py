@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+# Copyright 2018, IBM.
+#
+# This source code is licensed under the Apache License, Version 2.0 found in
+# the LICENSE.txt file in the root directory of this source tree.
+
+# pylint: disable=invalid-name,missing-docstring
+
+from test.common import QiskitSympyTestCase
+
+import pickle
+import unittest
+
+import numpy as np
+from sympy import E, Float, I, Integer, Symbol, cos, exp, pi, sqrt, srepr
+
+from qiskit_addon_sympy.transport import EncodedArray, decode_data, encode_data
+
+
+class TransportTest(QiskitSympyTestCase):
+    """Test the encoding of results for transport between processes."""
+
+    def test_roundtrip(self):
+        """Test that arrays and pairs are rebuilt identically."""
+        theta = Symbol('theta')
+        amplitude = sqrt(2)*exp(I*pi/4)/2 - sqrt(2)*I*cos(theta/2)*E**(I*Float(0.3))/4
+        array = np.array([[amplitude, Integer(0)], [Float(1.0), Integer(1)]], dtype=object)
+        data = {'unitary': array,
+                'sparse_statevector': [(3, amplitude), (5, -amplitude)],
+                'time_taken': 0.1}
+        encode_data(data)
+        self.assertIsInstance(data['unitary'], EncodedArray)
+        self.assertEqual(data['time_taken'], 0.1)
+
+        data = pickle.loads(pickle.dumps(data))
+        decode_data(data)
+        self.assertEqual(data['unitary'].shape, (2, 2))
+        self.assertEqual([srepr(entry) for entry in data['unitary'].ravel()],
+                         [srepr(entry) for entry in array.ravel()])
+        self.assertEqual(data['sparse_statevector'], [(3, amplitude), (5, -amplitude)])
+
+    def test_shared_subexpressions(self):
+        """Test that equal entries and subexpressions are stored once."""
+        amplitude = sqrt(2)*exp(I*pi/4)/2
+        encoded = EncodedArray.encode([amplitude] * 8 + [amplitude / 2])
+        self.assertEqual(len(set(encoded.positions[:8])), 1)
+        self.assertEqual(len(encoded.table),
+                         len(EncodedArray.encode([amplitude, amplitude / 2]).table))
+
+
+if __name__ == '__main__':
+    unittest.main()